@@ -0,0 +1,112 @@
+"""区块压缩基准测试
+
+在合成链上比较各压缩方式的压缩比和解码吞吐量。压缩比以当前chain.json
+使用的缩进JSON为基准; 训练字典只使用前一半区块, 在后一半区块上测量。
+
+用法:
+    python -m benchmarks.bench_compression --blocks 20000 --output compression.json
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import gzip
+import json
+import lzma
+import sys
+import time
+
+from src.compression import BlockCodec, preset_dictionary, serialize_block, train_dictionary
+from benchmarks.synthetic import generate_blocks
+from config.settings import SEGMENT_SETTINGS
+
+
+def measure_decode(decode: Callable[[], Any], raw_size: int, count: int, time_budget: float) -> Dict[str, float]:
+    """重复解码直至用完时间预算, 返回吞吐量"""
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        decode()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= time_budget:
+            break
+    return {
+        "decode_mb_s": raw_size * runs / elapsed / 1e6,
+        "decode_blocks_s": count * runs / elapsed
+    }
+
+
+def bench_codecs(blocks: List[Dict[str, Any]], frame_size: int, time_budget: float) -> List[Dict[str, Any]]:
+    """测量各压缩方式"""
+    half = len(blocks) // 2
+    training, test = blocks[:half], blocks[half:]
+    pretty = [json.dumps(block, indent=2, ensure_ascii=False).encode("utf-8") for block in test]
+    pretty_size = sum(len(record) for record in pretty)
+    records = [serialize_block(block) for block in test]
+    raw_size = sum(len(record) for record in records)
+    trained = BlockCodec(train_dictionary(training))
+    results = []
+
+    def add(method: str, compressed_size: int, decode: Callable[[], Any], random_access: str) -> None:
+        result = {
+            "method": method,
+            "random_access": random_access,
+            "bytes": compressed_size,
+            "bytes_per_block": compressed_size / len(test),
+            "ratio_vs_pretty_json": pretty_size / compressed_size,
+            "ratio_vs_compact_json": raw_size / compressed_size,
+            **measure_decode(decode, raw_size, len(test), time_budget)
+        }
+        results.append(result)
+        print(f"  {method:<28} {result['bytes_per_block']:8.1f} B/block "
+              f"x{result['ratio_vs_pretty_json']:6.2f} (pretty) x{result['ratio_vs_compact_json']:6.2f} (compact) "
+              f"{result['decode_mb_s']:8.1f} MB/s", file=sys.stderr)
+
+    add("json_pretty", pretty_size, lambda: [json.loads(r) for r in pretty], "block")
+    add("json_compact", raw_size, lambda: [json.loads(r) for r in records], "block")
+
+    for name, codec in (("no_dictionary", BlockCodec()),
+                        ("preset_dictionary", BlockCodec(preset_dictionary())),
+                        ("trained_dictionary", trained)):
+        encoded = [codec.compress(record) for record in records]
+        add(f"zlib_block[{name}]", sum(len(e) for e in encoded),
+            lambda codec=codec, encoded=encoded: [json.loads(codec.decompress(e)) for e in encoded], "block")
+
+    frames = [trained.compress(b"\n".join(records[i:i + frame_size]) + b"\n")
+              for i in range(0, len(records), frame_size)]
+    add(f"zlib_frame[{frame_size}]", sum(len(f) for f in frames),
+        lambda: [json.loads(line) for f in frames for line in trained.decompress(f).splitlines()],
+        f"frame of {frame_size}")
+
+    segment = b"\n".join(records) + b"\n"
+    for method, compress, decompress in (("gzip_segment", gzip.compress, gzip.decompress),
+                                         ("lzma_segment", lzma.compress, lzma.decompress)):
+        data = compress(segment)
+        add(method, len(data), lambda data=data, decompress=decompress:
+            [json.loads(line) for line in decompress(data).splitlines()], "segment")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """基准测试入口"""
+    parser = argparse.ArgumentParser(description="区块压缩基准测试")
+    parser.add_argument("--blocks", type=int, default=20000, help="合成区块数")
+    parser.add_argument("--frame-size", type=int, default=SEGMENT_SETTINGS["index_interval"],
+                        help="分帧压缩的每帧区块数")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="每种方式的解码测量时间(秒)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    blocks = [block.to_dict() for block in generate_blocks(args.blocks, args.seed)][1:]
+    report = {
+        "meta": {"blocks": len(blocks), "frame_size": args.frame_size, "seed": args.seed},
+        "results": bench_codecs(blocks, args.frame_size, args.time_budget)
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
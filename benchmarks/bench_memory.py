@@ -0,0 +1,79 @@
+"""已加载区块链的内存占用报告
+
+分别在关闭和开启去重的情况下加载同一条合成链, 统计区块对象的深度大小
+(同一对象只计一次) 和tracemalloc峰值, 给出每个区块节省的字节数。
+
+用法:
+    python -m benchmarks.bench_memory --blocks 100000 --output memory.json
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.interning import Interner, deep_size
+from benchmarks.synthetic import write_chain_file
+
+
+def measure_load(chain_file: Path, interner: Optional[Interner]) -> Dict[str, Any]:
+    """加载链并统计内存"""
+    blockchain = Blockchain(chain_file, consensus=NoWork())
+    blockchain.interner = interner
+    started = time.perf_counter()
+    blockchain.load_chain()
+    elapsed = time.perf_counter() - started
+    # 峰值内存单独测量一次, tracemalloc会拖慢加载
+    tracemalloc.start()
+    blockchain.load_chain()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    chain = blockchain.chain
+    size = deep_size(chain)
+    blockchain.close()
+    return {
+        "interning": interner is not None,
+        "blocks": len(chain),
+        "chain_bytes": size,
+        "bytes_per_block": size / len(chain),
+        "load_peak_bytes": peak,
+        "load_s": elapsed
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """内存报告入口"""
+    parser = argparse.ArgumentParser(description="已加载区块链的内存占用报告")
+    parser.add_argument("--blocks", type=int, default=100000, help="合成区块数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        chain_file = write_chain_file(Path(work_dir) / "chain.json", args.blocks, args.seed)
+        baseline = measure_load(chain_file, None)
+        interned = measure_load(chain_file, Interner())
+
+    saved = baseline["bytes_per_block"] - interned["bytes_per_block"]
+    report = {
+        "meta": {"blocks": args.blocks, "seed": args.seed},
+        "results": [baseline, interned],
+        "saved_bytes_per_block": saved,
+        "saved_ratio": saved / baseline["bytes_per_block"]
+    }
+    for result in report["results"]:
+        print(f"  interning={result['interning']!s:<5} {result['bytes_per_block']:8.1f} B/block "
+              f"load {result['load_s']:.3f}s peak {result['load_peak_bytes'] / 1e6:.1f} MB", file=sys.stderr)
+    print(f"  saved {saved:.1f} B/block ({report['saved_ratio']:.1%})", file=sys.stderr)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
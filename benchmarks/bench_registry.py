@@ -0,0 +1,284 @@
+"""注册表热点路径基准测试
+
+在不同规模的合成链上测量主要操作的吞吐量、延迟分位数和峰值内存,
+结果以JSON保存, 可通过 --compare 与历史结果对比。
+
+用法:
+    python -m benchmarks.bench_registry --sizes 1000 100000 1000000 --output bench.json
+    python -m benchmarks.bench_registry --sizes 1000 --compare bench.json
+    python -m benchmarks.bench_registry --sizes 1000 --consensus authority
+    python -m benchmarks.bench_registry --sizes 1000 --hash-sizes 1024 1048576
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import math
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.blockchain import Blockchain, Block
+from src.columnar import ColumnarExport, numpy_available
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.consensus import ConsensusEngine, create_consensus, generate_authority_key, load_authority_key
+from src.utils.helpers import HASH_ALGORITHMS, calculate_block_hash, calculate_hash
+from benchmarks.synthetic import synthetic_content, write_chain_file
+from config.settings import get_current_timestamp, get_user_id
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_DIFFICULTIES = [1, 2, 3, 4]
+# 内容哈希测量的内容大小(字节)
+DEFAULT_HASH_SIZES = [1024, 64 * 1024, 1024 * 1024]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """计算已排序样本的分位数 (最近秩法)"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, math.ceil(q / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def measure(operation: str, func: Callable[[int], Any], max_iterations: int,
+            time_budget: float, min_iterations: int = 3) -> Dict[str, Any]:
+    """重复执行func并统计延迟, 最后在tracemalloc下单独执行一次测量峰值内存"""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(max_iterations):
+        t0 = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - t0)
+        if i + 1 >= min_iterations and time.perf_counter() - started > time_budget:
+            break
+    total = sum(latencies)
+
+    tracemalloc.start()
+    try:
+        func(len(latencies))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "operation": operation,
+        "iterations": len(latencies),
+        "total_s": total,
+        "throughput_ops": len(latencies) / total if total else 0.0,
+        "latency_ms": {
+            "mean": total / len(latencies) * 1000,
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000
+        },
+        "peak_memory_bytes": peak
+    }
+
+
+def bench_chain_size(size: int, chain_file: Path, consensus: ConsensusEngine,
+                     args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """在给定规模的链上测量各项操作"""
+    rng = random.Random(args.seed)
+    results = []
+
+    def run(operation: str, func: Callable[[int], Any]) -> None:
+        result = measure(operation, func, args.iterations, args.time_budget)
+        result["chain_size"] = size
+        results.append(result)
+        print(f"  {operation:<28} p50={result['latency_ms']['p50']:10.3f}ms "
+              f"p99={result['latency_ms']['p99']:10.3f}ms "
+              f"{result['throughput_ops']:12.1f} ops/s", file=sys.stderr)
+
+    blockchain = Blockchain(chain_file, consensus=consensus)
+    registry = ContentRegistry(blockchain)
+    protection = CopyrightProtection(registry)
+    try:
+        run("load_chain", lambda i: blockchain.load_chain())
+        run("verify_content[hit]",
+            lambda i: registry.verify_content(synthetic_content(rng.randrange(1, size))))
+        run("verify_content[miss]",
+            lambda i: registry.verify_content(f"never registered #{i}"))
+        # 偏斜负载: 反复验证少量热门内容, 命中结果缓存
+        run("verify_ownership[hot]",
+            lambda i: protection.verify_ownership(synthetic_content(1 + i % min(16, size - 1))))
+        run("search_content", lambda i: registry.search_content({"license": "MIT"}))
+        run("get_content_history",
+            lambda i: protection.get_content_history(synthetic_content(rng.randrange(1, size))))
+        run("get_statistics", lambda i: protection.get_statistics())
+        if numpy_available():
+            run("columnar_export", lambda i: ColumnarExport(blockchain).refresh())
+            export = ColumnarExport(blockchain)
+            export.refresh()
+            run("get_statistics[columnar]", lambda i: export.statistics())
+        run("is_chain_valid", lambda i: blockchain.is_chain_valid())
+        run("register_content", lambda i: registry.register_content(
+            f"benchmark registration {size}-{rng.random()}-{i}",
+            {
+                "title": f"Registration {i}",
+                "description": "Benchmark registration",
+                "content_type": "text"
+            }
+        ))
+    finally:
+        blockchain.close()
+    return results
+
+
+def bench_mining(difficulties: List[int], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """测量不同难度下的挖矿耗时"""
+    results = []
+    for difficulty in difficulties:
+        def mine(i: int) -> None:
+            block = Block(i, get_current_timestamp(), {"message": f"mining {i}", "user_id": get_user_id()}, "0")
+            block.mine_block(difficulty)
+
+        result = measure(f"mine_block[difficulty={difficulty}]", mine, args.iterations, args.time_budget)
+        result["difficulty"] = difficulty
+        results.append(result)
+        print(f"  {result['operation']:<28} p50={result['latency_ms']['p50']:10.3f}ms "
+              f"{result['throughput_ops']:12.1f} ops/s", file=sys.stderr)
+
+    # 不需要工作量证明的共识模式的封装开销
+    for mode in ("authority", "none"):
+        consensus = create_consensus(mode, generate_authority_key() if mode == "authority" else None)
+
+        def seal(i: int) -> None:
+            block = Block(i, get_current_timestamp(), {"message": f"sealing {i}", "user_id": get_user_id()}, "0")
+            consensus.seal(block, 0)
+
+        result = measure(f"seal_block[{mode}]", seal, args.iterations, args.time_budget)
+        results.append(result)
+        print(f"  {result['operation']:<28} p50={result['latency_ms']['p50']:10.3f}ms "
+              f"{result['throughput_ops']:12.1f} ops/s", file=sys.stderr)
+    return results
+
+
+def bench_hashing(sizes: List[int], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """比较各哈希算法计算内容哈希和区块哈希的耗时"""
+    results = []
+    for algorithm in HASH_ALGORITHMS:
+        for size in sizes:
+            content = "x" * size
+            result = measure(f"content_hash[{algorithm}]", lambda i: calculate_hash(content, algorithm),
+                             args.iterations, args.time_budget)
+            result["content_bytes"] = size
+            result["throughput_mb_s"] = result["throughput_ops"] * size / (1024 * 1024)
+            results.append(result)
+            print(f"  {result['operation']:<28} size={size:<8} p50={result['latency_ms']['p50']:10.3f}ms "
+                  f"{result['throughput_mb_s']:10.1f} MB/s", file=sys.stderr)
+
+        data = {"message": "block hashing", "user_id": get_user_id(), "content_hash": "0" * 64}
+        result = measure(f"block_hash[{algorithm}]",
+                         lambda i: calculate_block_hash(i, get_current_timestamp(), data, "0" * 64, i, algorithm),
+                         args.iterations, args.time_budget)
+        results.append(result)
+        print(f"  {result['operation']:<28} p50={result['latency_ms']['p50']:10.3f}ms "
+              f"{result['throughput_ops']:12.1f} ops/s", file=sys.stderr)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """当前代码的git提交号"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """打印与历史结果相比的p50延迟和吞吐量变化"""
+    def key(result: Dict[str, Any]) -> tuple:
+        return result["operation"], result.get("chain_size"), result.get("difficulty"), result.get("content_bytes")
+
+    previous = {key(r): r for r in baseline.get("results", [])}
+    print(f"\n对比基线 {baseline.get('meta', {}).get('git_revision')}:")
+    for result in current["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        old_p50 = old["latency_ms"]["p50"]
+        ratio = result["latency_ms"]["p50"] / old_p50 if old_p50 else float("inf")
+        old_ops = old["throughput_ops"]
+        ops_ratio = result["throughput_ops"] / old_ops if old_ops else float("inf")
+        size = result.get("chain_size", result.get("content_bytes", "-"))
+        print(f"  {result['operation']:<28} size={size!s:<8} p50 x{ratio:6.2f} "
+              f"({old_p50:.3f}ms -> {result['latency_ms']['p50']:.3f}ms) "
+              f"ops/s x{ops_ratio:6.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """基准测试入口"""
+    parser = argparse.ArgumentParser(description="注册表热点路径基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="合成链的区块数")
+    parser.add_argument("--difficulties", type=int, nargs="+", default=DEFAULT_DIFFICULTIES,
+                        help="mine_block测量的难度")
+    parser.add_argument("--hash-sizes", type=int, nargs="+", default=DEFAULT_HASH_SIZES,
+                        help="内容哈希测量的内容大小(字节)")
+    parser.add_argument("--iterations", type=int, default=200, help="每项操作的最大执行次数")
+    parser.add_argument("--time-budget", type=float, default=5.0, help="每项操作的最长测量时间(秒)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--consensus", choices=["pow", "authority", "none"], default="none",
+                        help="合成链及注册使用的共识模式 (pow模式生成大链较慢)")
+    parser.add_argument("--data-dir", type=Path, help="缓存合成链文件的目录, 避免重复生成")
+    parser.add_argument("--output", type=Path, help="结果JSON输出路径")
+    parser.add_argument("--compare", type=Path, help="用于对比的历史结果JSON")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "consensus": args.consensus,
+            "sizes": args.sizes
+        },
+        "results": []
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = args.data_dir or Path(work_dir) / "data"
+        key = None
+        if args.consensus == "authority":
+            # 密钥与缓存的合成链保存在同一目录, 复用的链仍由同一授权方签名
+            key = load_authority_key(data_dir / "authority.key", create=True)
+        consensus = create_consensus(args.consensus, key)
+        for size in args.sizes:
+            source = data_dir / f"chain_{size}_{args.seed}_{args.consensus}.json"
+            if not source.exists():
+                print(f"生成 {size} 个区块的合成链...", file=sys.stderr)
+                write_chain_file(source, size, args.seed, consensus=consensus)
+            # 写入测试会修改链文件, 在副本上运行以保持缓存不变
+            chain_file = Path(work_dir) / f"chain_{size}.json"
+            shutil.copyfile(source, chain_file)
+            print(f"链长度 {size}:", file=sys.stderr)
+            report["results"].extend(bench_chain_size(size, chain_file, consensus, args))
+            chain_file.unlink()
+
+    print("挖矿:", file=sys.stderr)
+    report["results"].extend(bench_mining(args.difficulties, args))
+
+    print("哈希算法:", file=sys.stderr)
+    report["results"].extend(bench_hashing(args.hash_sizes, args))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+    return report
+
+
+if __name__ == "__main__":
+    main()
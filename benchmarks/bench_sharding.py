@@ -0,0 +1,89 @@
+"""分片注册表写入吞吐量基准测试
+
+在不同分片数下批量注册合成内容, 比较注册吞吐量及相对单分片的加速比。
+process模式下加速比受CPU核数限制。
+
+用法:
+    python -m benchmarks.bench_sharding --shards 1 2 4 8 --registrations 4000 --output sharding.json
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src.sharding import ShardedRegistry
+from benchmarks.synthetic import synthetic_content
+
+
+def bench_shards(count: int, registrations: int, batch_size: int, backend: str, consensus: str,
+                 mode: str) -> Dict[str, Any]:
+    """测量指定分片数下的注册吞吐量"""
+    items = [
+        (synthetic_content(i), {"title": f"Benchmark {i}", "description": "Sharding benchmark",
+                                "content_type": "text"})
+        for i in range(registrations)
+    ]
+    with tempfile.TemporaryDirectory() as work_dir:
+        with ShardedRegistry(Path(work_dir), shards=count, backend=backend, consensus=consensus,
+                             mode=mode) as registry:
+            started = time.perf_counter()
+            failed = 0
+            for offset in range(0, registrations, batch_size):
+                results = registry.register_many(items[offset:offset + batch_size])
+                failed += sum(result["status"] != "success" for result in results)
+            elapsed = time.perf_counter() - started
+            status = registry.get_chain_status(validate=False)
+
+    return {
+        "shards": count,
+        "registrations": registrations,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "throughput": registrations / elapsed,
+        "shard_lengths": [shard["length"] for shard in status["shards"]]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """基准测试入口"""
+    parser = argparse.ArgumentParser(description="分片注册表写入吞吐量基准测试")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="分片数")
+    parser.add_argument("--registrations", type=int, default=4000, help="每轮注册数")
+    parser.add_argument("--batch-size", type=int, default=256, help="每次register_many的注册数")
+    parser.add_argument("--backend", choices=["json", "segmented", "sqlite"], default="sqlite", help="分片存储后端")
+    parser.add_argument("--consensus", choices=["pow", "authority", "none"], default="pow", help="共识模式")
+    parser.add_argument("--mode", choices=["process", "thread"], default="process", help="分片运行方式")
+    parser.add_argument("--output", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.shards:
+        result = bench_shards(count, args.registrations, args.batch_size, args.backend, args.consensus,
+                              args.mode)
+        result["speedup"] = result["throughput"] / results[0]["throughput"] if results else 1.0
+        results.append(result)
+        print(f"  shards={count:<3} {result['throughput']:10.1f} reg/s  speedup {result['speedup']:.2f}x",
+              file=sys.stderr)
+
+    report = {
+        "meta": {
+            "registrations": args.registrations,
+            "batch_size": args.batch_size,
+            "backend": args.backend,
+            "consensus": args.consensus,
+            "mode": args.mode,
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
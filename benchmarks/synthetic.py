@@ -0,0 +1,93 @@
+"""合成区块链数据生成工具"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+import json
+import random
+
+from src.blockchain import Block
+from src.consensus import ConsensusEngine, NoWork
+from src.utils.helpers import calculate_hash
+from config.settings import (
+    AI_MODEL_SETTINGS,
+    COPYRIGHT_SETTINGS,
+    MINING_DIFFICULTY,
+    TIMESTAMP_FORMAT,
+    get_user_id
+)
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def synthetic_content(i: int) -> str:
+    """第i条合成内容"""
+    return f"benchmark synthetic content #{i}"
+
+
+def synthetic_transaction(i: int, rng: random.Random) -> Dict[str, Any]:
+    """生成第i条内容的注册交易数据"""
+    timestamp = (BASE_TIME + timedelta(seconds=i)).strftime(TIMESTAMP_FORMAT)
+    return {
+        "type": "content_registration",
+        "content_hash": calculate_hash(synthetic_content(i)),
+        "timestamp": timestamp,
+        "user_id": f"user-{rng.randrange(1000):04d}",
+        "metadata": {
+            "title": f"Synthetic {i}",
+            "description": "Synthetic benchmark content",
+            "content_type": rng.choice(COPYRIGHT_SETTINGS["supported_content_types"]),
+            "ai_info": {
+                "model": rng.choice(AI_MODEL_SETTINGS["supported_models"]),
+                "parameters": AI_MODEL_SETTINGS["default_parameters"]
+            },
+            "license": rng.choice(COPYRIGHT_SETTINGS["supported_licenses"]),
+            "registration_time": timestamp,
+            "user_id": get_user_id()
+        }
+    }
+
+
+def generate_blocks(size: int, seed: int = 0, consensus: Optional[ConsensusEngine] = None,
+                    difficulty: int = MINING_DIFFICULTY) -> Iterator[Block]:
+    """生成包含创世区块在内共size个区块的合成链
+
+    区块按consensus封装, 默认为无工作量模式 (不挖矿, 仅保证哈希链接正确)。
+    """
+    consensus = consensus or NoWork()
+    rng = random.Random(seed)
+    genesis = Block(0, BASE_TIME.strftime(TIMESTAMP_FORMAT), {
+        "message": "Genesis Block",
+        "user_id": get_user_id()
+    }, "0")
+    yield genesis
+
+    previous_hash = genesis.hash
+    for i in range(1, size):
+        data = synthetic_transaction(i, rng)
+        block = Block(i, data["timestamp"], data, previous_hash)
+        consensus.seal(block, difficulty)
+        previous_hash = block.hash
+        yield block
+
+
+def write_chain_file(file_path: Path, size: int, seed: int = 0,
+                     difficulty: int = MINING_DIFFICULTY,
+                     consensus: Optional[ConsensusEngine] = None) -> Path:
+    """流式写出合成链文件, 内存占用与链长度无关"""
+    consensus = consensus or NoWork()
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write('{"chain": [')
+        for block in generate_blocks(size, seed, consensus, difficulty):
+            if block.index:
+                f.write(",")
+            f.write(json.dumps(block.to_dict(), ensure_ascii=False))
+        f.write('], "metadata": ')
+        f.write(json.dumps({
+            "last_updated": BASE_TIME.strftime(TIMESTAMP_FORMAT),
+            "user_id": get_user_id(),
+            "difficulty": difficulty,
+            "consensus": consensus.name
+        }))
+        f.write("}")
+    return file_path
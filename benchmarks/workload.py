@@ -0,0 +1,461 @@
+"""混合负载生成与回放
+
+按配置的内容大小分布、AI模型和许可证比例以及验证/注册/历史/搜索操作比例
+合成负载, 以目标速率开环驱动CopyrightProtection (进程内或通过本地服务),
+也可以回放记录的负载轨迹。报告给出各速率下的p50/p99/p999延迟、吞吐量、
+错误率及其随时间的变化, 并按SLO找出吞吐量曲线的拐点。
+
+延迟从计划发出时刻开始计算, 包含请求在客户端排队的时间; 系统饱和时
+延迟随排队增长, 而不会因为发送方等待而被低估。
+
+轨迹为JSON Lines: 首行为生成器参数 ({"type": "header", ...}), 之后每行一个操作,
+t为相对开始时间(秒)。操作通过content_id引用生成器合成的内容, 也可以直接
+携带content字段, 以便回放从其他来源转换的轨迹。
+
+用法:
+    python -m benchmarks.workload run --rates 50 100 200 400 --duration 10 --slo-p99-ms 50 --output workload.json
+    python -m benchmarks.workload run --rates 100 --duration 30 --record trace.jsonl
+    python -m benchmarks.workload replay trace.jsonl --speed 2 --target server
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import math
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from src.replication import parse_address
+from src.server import ProtectionClient
+from src.sharding import dispatch
+from benchmarks.bench_registry import percentile
+from config.settings import AI_MODEL_SETTINGS, COPYRIGHT_SETTINGS, PROJECT_ROOT
+
+DEFAULT_MIX = {"verify": 0.6, "register": 0.2, "history": 0.1, "search": 0.1}
+OPERATIONS = ("verify", "register", "history", "search")
+# 单条内容上限与validate_content一致
+MAX_CONTENT_SIZE = 1024 * 1024
+FILLER = "Generated passage for workload replay with mixed vocabulary and punctuation. "
+
+# (相对开始时间, 操作)
+ScheduledOp = Tuple[float, Dict[str, Any]]
+
+
+def parse_weights(text: Optional[str]) -> Optional[Dict[str, float]]:
+    """解析 "名称=权重,..." 形式的比例, 未指定时返回None (使用默认比例)"""
+    if not text:
+        return None
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.rpartition("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+class WorkloadGenerator:
+    def __init__(self, mix: Optional[Dict[str, float]] = None, size_median: int = 2048,
+                 size_sigma: float = 1.0, model_mix: Optional[Dict[str, float]] = None,
+                 license_mix: Optional[Dict[str, float]] = None, miss_ratio: float = 0.1,
+                 seed: int = 0) -> None:
+        """初始化负载生成器
+
+        内容大小服从中位数为size_median的对数正态分布; 验证和历史操作以
+        miss_ratio的比例查询未注册的内容, 其余查询已注册的内容。
+        内容由 (seed, content_id) 确定性生成, 轨迹只需记录编号。
+        """
+        self.mix = mix or dict(DEFAULT_MIX)
+        unknown = set(self.mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported operations in mix: {sorted(unknown)}")
+        self.size_median = size_median
+        self.size_sigma = size_sigma
+        self.model_mix = model_mix or {model: 1.0 for model in AI_MODEL_SETTINGS["supported_models"]}
+        self.license_mix = license_mix or {name: 1.0 for name in COPYRIGHT_SETTINGS["supported_licenses"]}
+        self.miss_ratio = miss_ratio
+        self.seed = seed
+        self._rng = random.Random(seed)
+        # 已生成注册操作的内容数, 编号从0开始连续分配
+        self.registered = 0
+
+    def params(self) -> Dict[str, Any]:
+        """生成器参数 (写入轨迹头)"""
+        return {
+            "mix": self.mix,
+            "size_median": self.size_median,
+            "size_sigma": self.size_sigma,
+            "model_mix": self.model_mix,
+            "license_mix": self.license_mix,
+            "miss_ratio": self.miss_ratio,
+            "seed": self.seed
+        }
+
+    def content(self, content_id: int) -> str:
+        """第content_id条合成内容, 负编号为从未注册的内容"""
+        rng = random.Random(f"{self.seed}:{content_id}")
+        size = int(self.size_median * math.exp(rng.gauss(0, self.size_sigma)))
+        prefix = f"workload {self.seed} content #{content_id}: "
+        size = max(len(prefix) + 1, min(MAX_CONTENT_SIZE, size))
+        body = FILLER * (size // len(FILLER) + 1)
+        return prefix + body[:size - len(prefix)]
+
+    def _choice(self, weights: Dict[str, float]) -> str:
+        return self._rng.choices(list(weights), list(weights.values()))[0]
+
+    def register_op(self) -> Dict[str, Any]:
+        """生成一次注册操作"""
+        content_id = self.registered
+        self.registered += 1
+        return {
+            "op": "register",
+            "content_id": content_id,
+            "title": f"Workload {content_id}",
+            "model": self._choice(self.model_mix),
+            "license": self._choice(self.license_mix)
+        }
+
+    def next_op(self) -> Dict[str, Any]:
+        """按操作比例生成下一次操作"""
+        kind = self._choice(self.mix)
+        if kind == "register" or (kind in ("verify", "history") and self.registered == 0):
+            return self.register_op()
+        if kind == "search":
+            return {"op": "search", "query": {"license": self._choice(self.license_mix)}}
+        if self._rng.random() < self.miss_ratio:
+            content_id = -1 - self._rng.randrange(1 << 30)
+        else:
+            content_id = self._rng.randrange(self.registered)
+        return {"op": kind, "content_id": content_id}
+
+    def schedule(self, rate: float, duration: float, arrival: str = "poisson") -> Iterator[ScheduledOp]:
+        """按目标速率生成duration秒内的操作; poisson为指数分布间隔, uniform为等间隔"""
+        offset = 0.0
+        index = 0
+        while True:
+            if arrival == "poisson":
+                offset += self._rng.expovariate(rate)
+            else:
+                offset = index / rate
+            if offset >= duration:
+                return
+            index += 1
+            yield offset, self.next_op()
+
+
+class InProcessTarget:
+    """在当前进程中调用CopyrightProtection"""
+
+    def __init__(self, protection: Any) -> None:
+        self.protection = protection
+
+    def call(self, method: str, *params: Any) -> Dict[str, Any]:
+        return dispatch(self.protection, method, params)
+
+    def close(self) -> None:
+        pass
+
+
+class ServerTarget:
+    """通过本地服务调用, 每个工作线程使用独立连接"""
+
+    def __init__(self, address: Any) -> None:
+        self.address = address
+        self._local = threading.local()
+        self._clients: List[ProtectionClient] = []
+        self._lock = threading.Lock()
+
+    def call(self, method: str, *params: Any) -> Dict[str, Any]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = ProtectionClient(self.address)
+            with self._lock:
+                self._clients.append(client)
+        return client.call(method, *params)
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+
+
+def execute(target: Any, generator: WorkloadGenerator, op: Dict[str, Any]) -> Dict[str, Any]:
+    """在目标上执行一次操作"""
+    kind = op["op"]
+    if kind == "search":
+        return target.call("search_content", op["query"])
+    content = op.get("content")
+    if content is None:
+        content = generator.content(op["content_id"])
+    if kind == "register":
+        return target.call("protect_ai_content", content, op.get("title", "Workload"), "Workload content",
+                           op.get("model", AI_MODEL_SETTINGS["supported_models"][0]), None, op.get("license"))
+    if kind == "verify":
+        return target.call("verify_ownership", content)
+    if kind == "history":
+        return target.call("get_content_history", content)
+    raise ValueError(f"Unsupported operation: {kind}")
+
+
+def drive(target: Any, generator: WorkloadGenerator, ops: Iterable[ScheduledOp],
+          concurrency: int) -> List[Tuple[float, str, float, bool]]:
+    """开环驱动: 按计划时刻提交操作, 返回 (计划时刻, 操作, 延迟秒, 是否成功) 列表"""
+    samples: List[Tuple[float, str, float, bool]] = []
+    lock = threading.Lock()
+
+    def run(started: float, offset: float, op: Dict[str, Any]) -> None:
+        try:
+            ok = execute(target, generator, op).get("status") == "success"
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - (started + offset)
+        with lock:
+            samples.append((offset, op["op"], latency, ok))
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="workload") as executor:
+        started = time.perf_counter()
+        for offset, op in ops:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run, started, offset, op)
+    samples.sort()
+    return samples
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """延迟分位数 (毫秒)"""
+    latencies = sorted(latencies)
+    return {
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "p999": percentile(latencies, 99.9) * 1000,
+        "max": latencies[-1] * 1000 if latencies else 0.0
+    }
+
+
+def summarize(samples: List[Tuple[float, str, float, bool]], window: float) -> Dict[str, Any]:
+    """汇总总体、各操作和按时间窗口的延迟、吞吐量与错误率"""
+    def stats(group: List[Tuple[float, str, float, bool]], elapsed: float) -> Dict[str, Any]:
+        errors = sum(not ok for _, _, _, ok in group)
+        return {
+            "count": len(group),
+            "errors": errors,
+            "error_rate": errors / len(group) if group else 0.0,
+            "throughput": len(group) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": latency_summary([latency for _, _, latency, _ in group])
+        }
+
+    # 以最后一个操作完成的时刻作为运行时长
+    elapsed = max((offset + latency for offset, _, latency, _ in samples), default=0.0)
+    by_op = {
+        kind: stats([s for s in samples if s[1] == kind], elapsed)
+        for kind in OPERATIONS if any(s[1] == kind for s in samples)
+    }
+    timeline = []
+    if samples:
+        for start in range(int(elapsed // window) + 1):
+            group = [s for s in samples if start * window <= s[0] < (start + 1) * window]
+            if group:
+                timeline.append({"start_s": start * window, **stats(group, window)})
+    return {"elapsed_s": elapsed, **stats(samples, elapsed), "operations": by_op, "timeline": timeline}
+
+
+def find_knee(steps: List[Dict[str, Any]], slo_p99_ms: Optional[float],
+              min_efficiency: float = 0.95) -> Optional[float]:
+    """最高的满足SLO的目标速率: 完成吞吐量不低于实际发出速率的min_efficiency且p99不超过SLO"""
+    knee = None
+    for step in steps:
+        efficiency = step["throughput"] / step["offered_rate"] if step["offered_rate"] else 0.0
+        within_slo = slo_p99_ms is None or step["latency_ms"]["p99"] <= slo_p99_ms
+        if efficiency >= min_efficiency and within_slo:
+            knee = step["target_rate"]
+        else:
+            break
+    return knee
+
+
+def preload(target: Any, generator: WorkloadGenerator, count: int) -> None:
+    """预先注册count条内容 (不计入结果), 使验证和历史操作可以命中"""
+    for _ in range(count):
+        execute(target, generator, generator.register_op())
+
+
+def write_trace(path: Path, generator: WorkloadGenerator, preloaded: int, ops: List[ScheduledOp]) -> None:
+    """保存负载轨迹"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "header", "preload": preloaded, "generator": generator.params()}) + "\n")
+        for offset, op in ops:
+            f.write(json.dumps({"t": round(offset, 6), **op}, ensure_ascii=False) + "\n")
+
+
+def read_trace(path: Path) -> Tuple[Dict[str, Any], List[ScheduledOp]]:
+    """读取负载轨迹, 返回 (轨迹头, 操作列表)"""
+    header: Dict[str, Any] = {}
+    ops = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("type") == "header":
+                header = record
+                continue
+            offset = record.pop("t")
+            ops.append((offset, record))
+    ops.sort(key=lambda item: item[0])
+    return header, ops
+
+
+class _Target:
+    """按命令行参数创建进程内目标或本地服务目标"""
+
+    def __init__(self, args: argparse.Namespace, work_dir: Path) -> None:
+        self._blockchain = None
+        self._process: Optional[subprocess.Popen] = None
+        names = {"json": "chain.json", "segmented": "segments", "sqlite": "chain.db"}
+        data = args.data or work_dir / names[args.backend]
+        if args.target == "inprocess":
+            from src.blockchain import Blockchain
+            from src.consensus import create_consensus
+            from src.content_registry import ContentRegistry
+            from src.copyright_protection import CopyrightProtection
+            from src.storage import create_storage
+
+            self._blockchain = Blockchain(storage=create_storage(args.backend, data),
+                                          consensus=create_consensus(args.consensus))
+            self.target: Any = InProcessTarget(CopyrightProtection(ContentRegistry(self._blockchain)))
+            return
+        address = args.server
+        if address is None:
+            # 未指定地址时在子进程中启动本地服务
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "src.server", "--address", "127.0.0.1:0", "--backend", args.backend,
+                 "--data", str(data), "--consensus", args.consensus],
+                cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True
+            )
+            address = json.loads(self._process.stdout.readline())["address"]
+        self.target = ServerTarget(parse_address(address))
+
+    def close(self) -> None:
+        self.target.close()
+        if self._blockchain is not None:
+            self._blockchain.close()
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process.stdout.close()
+
+
+def print_step(step: Dict[str, Any]) -> None:
+    """打印一个速率档位的结果"""
+    latency = step["latency_ms"]
+    print(f"  rate={step['target_rate']:<8g} {step['throughput']:9.1f} ops/s  p50={latency['p50']:9.3f}ms "
+          f"p99={latency['p99']:9.3f}ms p999={latency['p999']:9.3f}ms errors={step['error_rate']:.2%}",
+          file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """负载测试入口"""
+    parser = argparse.ArgumentParser(description="混合负载生成与回放")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="按目标速率生成并执行负载")
+    run_parser.add_argument("--rates", type=float, nargs="+", default=[50, 100, 200, 400],
+                            help="依次测量的目标速率(操作/秒), 用于寻找拐点")
+    run_parser.add_argument("--duration", type=float, default=10.0, help="每个速率的持续时间(秒)")
+    run_parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson", help="到达间隔分布")
+    run_parser.add_argument("--mix", help="操作比例, 如 verify=6,register=2,history=1,search=1")
+    run_parser.add_argument("--models", help="AI模型比例, 如 GPT-4=3,Claude 2=1 (默认均匀)")
+    run_parser.add_argument("--licenses", help="许可证比例 (默认均匀)")
+    run_parser.add_argument("--size-median", type=int, default=2048, help="内容大小中位数(字节)")
+    run_parser.add_argument("--size-sigma", type=float, default=1.0, help="内容大小对数正态分布的sigma")
+    run_parser.add_argument("--miss-ratio", type=float, default=0.1, help="查询未注册内容的比例")
+    run_parser.add_argument("--preload", type=int, default=200, help="开始前注册的内容数")
+    run_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    run_parser.add_argument("--record", type=Path, help="保存生成的负载轨迹")
+    replay_parser = subparsers.add_parser("replay", help="回放负载轨迹")
+    replay_parser.add_argument("trace", type=Path, help="轨迹文件")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="回放速度倍数")
+    for sub in (run_parser, replay_parser):
+        sub.add_argument("--target", choices=["inprocess", "server"], default="inprocess", help="调用方式")
+        sub.add_argument("--server", help="已运行的本地服务地址; 未指定时自动启动")
+        sub.add_argument("--backend", choices=["json", "segmented", "sqlite"], default="sqlite", help="存储后端")
+        sub.add_argument("--data", type=Path, help="存储路径 (默认使用临时目录)")
+        sub.add_argument("--consensus", choices=["pow", "authority", "none"], default="pow", help="共识模式")
+        sub.add_argument("--concurrency", type=int, default=16, help="并发发出请求的线程数")
+        sub.add_argument("--window", type=float, default=1.0, help="时间序列的窗口长度(秒)")
+        sub.add_argument("--slo-p99-ms", type=float, help="p99延迟SLO(毫秒), 用于判断拐点")
+        sub.add_argument("--output", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        generator = WorkloadGenerator(
+            mix=parse_weights(args.mix),
+            size_median=args.size_median,
+            size_sigma=args.size_sigma,
+            model_mix=parse_weights(args.models),
+            license_mix=parse_weights(args.licenses),
+            miss_ratio=args.miss_ratio,
+            seed=args.seed
+        )
+        preloaded = args.preload
+        rates = args.rates
+    else:
+        header, trace_ops = read_trace(args.trace)
+        generator = WorkloadGenerator(**header.get("generator", {}))
+        preloaded = header.get("preload", 0)
+        rates = [len(trace_ops) / max(trace_ops[-1][0], 1e-9) * args.speed if trace_ops else 0.0]
+
+    steps = []
+    recorded: List[ScheduledOp] = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        target = _Target(args, Path(work_dir))
+        try:
+            preload(target.target, generator, preloaded)
+            for rate in rates:
+                if args.command == "run":
+                    duration = args.duration
+                    ops = list(generator.schedule(rate, duration, args.arrival))
+                    recorded.extend((offset + args.duration * len(steps), op) for offset, op in ops)
+                else:
+                    ops = [(offset / args.speed, op) for offset, op in trace_ops]
+                    duration = ops[-1][0] if ops else 0.0
+                step = {
+                    "target_rate": rate,
+                    # 泊松到达下实际发出的速率与目标速率有随机偏差
+                    "offered_rate": len(ops) / duration if duration else 0.0,
+                    **summarize(drive(target.target, generator, ops, args.concurrency), args.window)
+                }
+                steps.append(step)
+                print_step(step)
+        finally:
+            target.close()
+
+    report = {
+        "meta": {
+            "command": args.command,
+            "target": args.target,
+            "backend": args.backend,
+            "consensus": args.consensus,
+            "concurrency": args.concurrency,
+            "preload": preloaded,
+            "slo_p99_ms": args.slo_p99_ms,
+            "generator": generator.params()
+        },
+        "steps": steps,
+        "knee_rate": find_knee(steps, args.slo_p99_ms)
+    }
+    print(f"  knee: {report['knee_rate']}", file=sys.stderr)
+    if args.command == "run" and args.record:
+        write_trace(args.record, generator, preloaded, recorded)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -23,9 +23,7 @@ def get_user_id() -> str:
     """获取当前用户ID"""
     return DEFAULT_USER_ID
 
-# 确保存储目录存在
-STORAGE_DIR.mkdir(exist_ok=True)
-BLOCKCHAIN_DATA_DIR.mkdir(exist_ok=True)
+# 存储目录由存储后端在首次写入时创建, 导入配置不产生副作用
 
 # 版权配置
 COPYRIGHT_SETTINGS = {
@@ -59,4 +57,130 @@ AI_MODEL_SETTINGS = {
         "max_tokens": 1000,
         "top_p": 0.95
     }
-}
\ No newline at end of file
+}
+
+# 指标与性能分析配置
+METRICS_SETTINGS = {
+    "enabled": False,
+    "profiling": False,
+    "profile_interval": 0.005  # 采样间隔(秒)
+}
+
+# 分段存储配置
+SEGMENT_SETTINGS = {
+    "segment_size": 10000,  # 每个分段的区块数
+    "index_interval": 16,  # 稀疏索引间隔
+    "keep_uncompressed": 1,  # 保持不压缩的最近封存段数
+    "cold_codec": "zlib"  # 封存段压缩方式: zlib (按索引间隔分帧, 使用共享字典, 可随机读取) / gzip (整段)
+}
+
+# 存储后端配置
+STORAGE_SETTINGS = {
+    "backend": "json",  # json / segmented / sqlite
+    "json_file": "chain.json",
+    "segment_dir": "segments",
+    "sqlite_file": "chain.db",
+    "compression": None  # None / zlib (SQLite按区块压缩)
+}
+
+# 区块压缩配置
+COMPRESSION_SETTINGS = {
+    "level": 6,
+    "dictionary_size": 32768,  # zlib预置字典最多使用32KB
+    "sample_blocks": 2000  # 训练字典的区块样本数
+}
+
+# 共识配置
+CONSENSUS_SETTINGS = {
+    "mode": "pow",  # pow / authority / none
+    "authority_key_file": "authority.key"  # 相对区块链数据目录
+}
+
+# 区块封装调度配置
+SEALING_SETTINGS = {
+    "adaptive_difficulty": False,  # 按目标封装时间逐块调整难度 (仅pow), 只用于新建的链
+    "target_seal_time": 0.05,  # 单个区块的目标封装时间(秒)
+    "min_difficulty": 1,
+    "max_difficulty": 6,
+    "retarget_window": 8,  # 估计封装时间的采样区块数
+    "max_batch": 64,  # 每次落盘最多合并的区块数
+    "latency_budget": None  # 交易从提交到持久化的目标延迟(秒), None为合并已排队的交易后立即落盘
+}
+
+# 交易签名配置
+SIGNATURE_SETTINGS = {
+    "enabled": False,
+    "algorithm": "ed25519",  # ed25519 / ecdsa-p256
+    "key_file": "signing_key.pem",  # 相对区块链数据目录
+    "require": False,  # 是否拒绝未签名交易
+    "workers": None,  # 整链校验进程数, None为CPU核数
+    "batch_size": 512,  # 每个进程任务的交易数
+    "parallel_threshold": 2048,  # 达到该交易数才使用进程池
+    "key_cache_size": 1024  # 每个进程缓存的已解析公钥数
+}
+
+# 变更订阅配置
+FEED_SETTINGS = {
+    "poll_interval": 0.5,  # 等待新区块时的轮询间隔(秒), 用于发现其他进程追加的区块
+    "commit_interval": 100,  # 自动保存消费位置的区块间隔
+    "fetch_size": 1000  # 每次读取的区块数
+}
+
+# 区块数据去重配置
+INTERN_SETTINGS = {
+    "enabled": True,
+    "max_length": 48,  # 驻留的字符串最大长度, 64位十六进制哈希不驻留
+    "shared_keys": ["ai_info", "parameters"]  # 按内容共享的字典
+}
+
+# 主从复制配置
+REPLICATION_SETTINGS = {
+    "batch_size": 500,  # 每条消息的最大区块数
+    "heartbeat_interval": 1.0,  # 主节点空闲时的心跳间隔(秒), 也是发现其他进程写入的轮询间隔
+    "reconnect_interval": 1.0,  # 从节点重连间隔(秒)
+    "connect_timeout": 5.0
+}
+
+# 分片注册表配置
+SHARD_SETTINGS = {
+    "count": 4,  # 分片数, 创建后不可更改
+    "prefix_length": 8,  # 路由使用的内容哈希前缀长度(十六进制字符)
+    "mode": "process",  # process (每个分片独立进程, 挖矿并行) / thread (同一进程, 仅持久化并行)
+    "directory": "shards"  # 相对区块链数据目录
+}
+
+# 查询结果缓存配置 (verify_ownership / get_content_history)
+CACHE_SETTINGS = {
+    "enabled": True,
+    "max_bytes": 16 * 1024 * 1024,  # 按结果估算字节数限制容量
+    "recent_touches": 4096  # 记录的最近追加内容哈希数, 用于丢弃计算期间已过期的结果
+}
+
+# 区块体归档配置 (仅SQLite存储)
+PRUNE_SETTINGS = {
+    "enabled": False,  # 写入后自动归档超出keep_recent的旧区块体
+    "keep_recent": 100000,  # 保留在线区块体的最新区块数
+    "archive_blocks": 10000,  # 每个归档文件的区块数, 也是自动归档的最小批量
+    "frame_blocks": 64,  # 归档内每个压缩帧的区块数, 读取单个区块需解压一帧
+    "cache_frames": 16  # 内存中缓存的已解压帧数
+}
+
+# 列式导出配置
+COLUMNAR_SETTINGS = {
+    "chunk_size": 10000  # 每次物化为列的区块数
+}
+
+# 哈希算法配置 (sha256 / blake2b), 只用于新建的链, 实际算法记录在链元数据中
+HASH_SETTINGS = {
+    "content": "sha256",  # 内容哈希算法, 已有链通过Blockchain.migrate_content_hash切换
+    "block": "sha256"  # 区块哈希算法, 链创建后不可更改
+}
+
+# 内容哈希布隆过滤器配置
+BLOOM_SETTINGS = {
+    "enabled": True,
+    "false_positive_rate": 0.01,
+    "initial_capacity": 10000,
+    "growth": 4,  # 扩容时容量倍数
+    "tightening": 0.5  # 扩容时误判率倍数
+}
@@ -1,6 +1,6 @@
-from src.copyright_protection import CopyrightProtection
 from datetime import datetime, UTC
 import json
+import sys
 from typing import Dict, Any
 from config.settings import AI_MODEL_SETTINGS, COPYRIGHT_SETTINGS, get_current_timestamp, get_user_id
 
@@ -71,6 +71,8 @@ def format_result(result: Dict[str, Any]) -> None:
 
 def main() -> None:
     """主程序入口"""
+    from src.copyright_protection import CopyrightProtection
+
     protection = CopyrightProtection()
 
     while True:
@@ -165,4 +167,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+        sys.exit(cli_main())
     main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import threading
+from .compression import BlockCodec, serialize_block
+from config.settings import PRUNE_SETTINGS
+
+
+class ArchiveError(Exception):
+    """归档文件缺失或与在线区块头不一致"""
+    pass
+
+
+class BlockArchive:
+    def __init__(self, directory: Path, frame_blocks: Optional[int] = None,
+                 cache_frames: Optional[int] = None) -> None:
+        """初始化区块体归档
+
+        每个归档文件由若干帧组成, 每帧为frame_blocks个连续区块的紧凑JSON行,
+        整帧以raw deflate压缩。在线的区块头记录所在帧的偏移、长度和SHA256校验和,
+        读取单个区块只需解压一帧; 最近解压的帧缓存在内存中, 顺序遍历时每帧只解压一次。
+        归档文件写入后不再修改。
+        """
+        self.directory = Path(directory)
+        self.frame_blocks = frame_blocks or PRUNE_SETTINGS["frame_blocks"]
+        self.cache_frames = cache_frames or PRUNE_SETTINGS["cache_frames"]
+        self._codec = BlockCodec()
+        self._frames: "OrderedDict[tuple, Dict[int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, archive_id: int) -> Path:
+        """归档文件路径"""
+        return self.directory / f"archive_{archive_id:06d}.zdf"
+
+    def write(self, archive_id: int, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """写入归档文件 (先写临时文件再替换), 返回每个区块的位置记录"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(archive_id)
+        tmp = path.with_suffix(".tmp")
+        pointers = []
+        offset = 0
+        with open(tmp, "wb") as f:
+            for start in range(0, len(blocks), self.frame_blocks):
+                frame = blocks[start:start + self.frame_blocks]
+                data = self._codec.compress(b"\n".join(serialize_block(block) for block in frame))
+                f.write(data)
+                pointer = {
+                    "id": archive_id,
+                    "offset": offset,
+                    "length": len(data),
+                    "checksum": hashlib.sha256(data).hexdigest()
+                }
+                pointers.extend(pointer for _ in frame)
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return pointers
+
+    def read(self, pointer: Dict[str, Any], height: int) -> Dict[str, Any]:
+        """按位置记录读取区块, 校验帧的校验和"""
+        key = (pointer["id"], pointer["offset"])
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+        if frame is None:
+            try:
+                with open(self.path(pointer["id"]), "rb") as f:
+                    f.seek(pointer["offset"])
+                    data = f.read(pointer["length"])
+            except FileNotFoundError:
+                raise ArchiveError(f"Archive {pointer['id']} is missing")
+            if hashlib.sha256(data).hexdigest() != pointer["checksum"]:
+                raise ArchiveError(f"Archive {pointer['id']} frame at {pointer['offset']} failed checksum")
+            frame = {}
+            for line in self._codec.decompress(data).split(b"\n"):
+                block = json.loads(line)
+                frame[block["index"]] = block
+            with self._lock:
+                self._frames[key] = frame
+                while len(self._frames) > self.cache_frames:
+                    self._frames.popitem(last=False)
+        block = frame.get(height)
+        if block is None:
+            raise ArchiveError(f"Block {height} not found in archive {pointer['id']}")
+        return block
+
+    def delete(self, archive_id: int) -> None:
+        """删除归档文件及其缓存的帧"""
+        with self._lock:
+            for key in [key for key in self._frames if key[0] == archive_id]:
+                del self._frames[key]
+        try:
+            os.remove(self.path(archive_id))
+        except FileNotFoundError:
+            pass
+
+    def size(self) -> int:
+        """归档文件的总字节数"""
+        if not self.directory.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.directory.glob("archive_*.zdf"))
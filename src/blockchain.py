@@ -1,42 +1,77 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from .utils.helpers import calculate_hash, get_current_info, load_json_file, save_json_file
-from config.settings import BLOCKCHAIN_DATA_DIR, MINING_DIFFICULTY, get_current_timestamp, get_user_id
+from .utils.helpers import DEFAULT_HASH_ALGORITHM, calculate_hash, calculate_block_hash, get_current_info
+from .metrics import metrics, instrumented, MINING_ATTEMPT_BUCKETS, SEAL_BATCH_BUCKETS
+from .storage import ChainStorage, JsonFileStorage, create_storage
+from .segments import SegmentedChainStore
+from .bloom import ScalableBloomFilter
+from .indexes import BlockIndex, TimeBound, TimeIndex, normalize_time
+from .consensus import ConsensusEngine, create_consensus
+from .signatures import SignerIndex, TransactionVerifier
+from .feed import ConsumerOffsets, Subscription
+from .snapshot import ChainSnapshot
+from .interning import Interner
+from .hashing import HashScheme
+from .sealing import DifficultyRetarget, SealScheduler
+from config.settings import (
+    BLOOM_SETTINGS,
+    INTERN_SETTINGS,
+    MINING_DIFFICULTY,
+    PRUNE_SETTINGS,
+    SIGNATURE_SETTINGS,
+    get_current_timestamp,
+    get_user_id
+)
 
 
 class Block:
-    def __init__(self, index: int, timestamp: str, data: Dict[str, Any], previous_hash: str) -> None:
+    # 区块哈希算法; 使用其他算法的链在创建和恢复区块时按实例覆盖
+    hash_algorithm = DEFAULT_HASH_ALGORITHM
+
+    def __init__(self, index: int, timestamp: str, data: Dict[str, Any], previous_hash: str,
+                 hash_algorithm: Optional[str] = None, difficulty: Optional[int] = None) -> None:
         """初始化区块"""
         self.index = index
         self.timestamp = timestamp
         self.data = data
         self.previous_hash = previous_hash
         self.nonce = 0
+        # 自适应难度的链记录每个区块的难度, 固定难度的链为None (使用链的难度)
+        self.difficulty = difficulty
+        # 授权签名模式下的签名及签名方, 其他模式为None
+        self.signature: Optional[str] = None
+        self.signer: Optional[str] = None
+        if hash_algorithm is not None and hash_algorithm != Block.hash_algorithm:
+            self.hash_algorithm = hash_algorithm
         self.hash = self.calculate_hash()
 
     def calculate_hash(self) -> str:
         """计算区块哈希值"""
-        block_string = json.dumps({
-            "index": self.index,
-            "timestamp": self.timestamp,
-            "data": self.data,
-            "previous_hash": self.previous_hash,
-            "nonce": self.nonce
-        }, sort_keys=True)
-        return calculate_hash(block_string)
+        return calculate_block_hash(self.index, self.timestamp, self.data, self.previous_hash, self.nonce,
+                                    self.hash_algorithm, self.difficulty)
 
     def mine_block(self, difficulty: int) -> str:
         """挖掘区块"""
         target = "0" * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        start_nonce = self.nonce
+        with metrics.timer("mine_block"):
+            while self.hash[:difficulty] != target:
+                self.nonce += 1
+                self.hash = self.calculate_hash()
+        if metrics.enabled:
+            attempts = self.nonce - start_nonce + 1
+            metrics.inc("mining_attempts_total", attempts)
+            metrics.observe("mining_attempts", attempts, MINING_ATTEMPT_BUCKETS)
         return self.hash
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        return {
+        block_data = {
             "index": self.index,
             "timestamp": self.timestamp,
             "data": self.data,
@@ -44,21 +79,242 @@ class Block:
             "nonce": self.nonce,
             "hash": self.hash
         }
+        if self.difficulty is not None:
+            block_data["difficulty"] = self.difficulty
+        if self.signature is not None:
+            block_data["signature"] = self.signature
+            block_data["signer"] = self.signer
+        return block_data
+
+    @classmethod
+    def from_dict(cls, block_data: Dict[str, Any], hash_algorithm: Optional[str] = None) -> "Block":
+        """从字典恢复区块, 保留已存储的nonce和哈希"""
+        block = cls.__new__(cls)
+        block.index = block_data["index"]
+        block.timestamp = block_data["timestamp"]
+        block.data = block_data["data"]
+        block.previous_hash = block_data["previous_hash"]
+        block.nonce = block_data["nonce"]
+        block.hash = block_data["hash"]
+        block.difficulty = block_data.get("difficulty")
+        block.signature = block_data.get("signature")
+        block.signer = block_data.get("signer")
+        if hash_algorithm is not None and hash_algorithm != Block.hash_algorithm:
+            block.hash_algorithm = hash_algorithm
+        return block
 
 
 class Blockchain:
-    def __init__(self) -> None:
-        """初始化区块链"""
-        self.chain: List[Block] = []
-        self.difficulty = MINING_DIFFICULTY
-        self.chain_file = BLOCKCHAIN_DATA_DIR / "chain.json"
-
-        if self.chain_file.exists():
-            self.load_chain()
+    def __init__(self, chain_file: Optional[Path] = None, segment_dir: Optional[Path] = None,
+                 storage: Optional[ChainStorage] = None,
+                 consensus: Optional[ConsensusEngine] = None,
+                 verifier: Optional[TransactionVerifier] = None,
+                 create_genesis: bool = True,
+                 hash_scheme: Optional[HashScheme] = None,
+                 retarget: Optional[DifficultyRetarget] = None,
+                 scheduler: Optional[SealScheduler] = None) -> None:
+        """初始化区块链
+
+        存储后端优先取storage参数, 其次是chain_file(JSON文件)或segment_dir(分段存储),
+        都未指定时按STORAGE_SETTINGS创建。已有的链在首次访问chain时才加载;
+        支持随机访问的后端在此之前直接从存储读取链尾和索引。
+        共识模式未指定时按CONSENSUS_SETTINGS创建; 启用SIGNATURE_SETTINGS或传入
+        verifier时, 交易签名在追加前和整链校验时检查。
+        create_genesis为False时新建的链为空, 用于从主节点复制完整链的从节点。
+        哈希算法只对新建的链生效 (未指定时按HASH_SETTINGS), 已有的链使用
+        元数据中记录的算法。难度调整规则同样只对新建的链生效 (未指定时按
+        SEALING_SETTINGS), 已有的链通过set_retarget切换; scheduler决定写线程
+        何时落盘。
+        """
+        self.consensus = consensus or create_consensus()
+        # 共识引擎是否已采用链元数据记录的共识参数
+        self._consensus_checked = False
+        if verifier is None and SIGNATURE_SETTINGS["enabled"]:
+            verifier = TransactionVerifier()
+        self.verifier = verifier
+        self._chain: Optional[List[Block]] = None
+        self._difficulty: Optional[int] = None
+        self._hash_scheme: Optional[HashScheme] = None
+        # 难度调整规则, None为固定难度; 未加载时在首次访问时从元数据读取
+        self._retarget: Optional[DifficultyRetarget] = None
+        self._retarget_known = False
+        self.scheduler = scheduler or SealScheduler()
+        self._tip: Optional[Block] = None
+        # 内容哈希 -> 区块高度列表, 随加载和追加维护
+        self._content_index: Dict[str, List[int]] = {}
+        # 二级索引: 加载时重建, 追加时增量更新
+        self.time_index = TimeIndex()
+        self._indexes: List[BlockIndex] = [self.time_index]
+        self.signer_index: Optional[SignerIndex] = None
+        if self.verifier is not None:
+            self.signer_index = SignerIndex()
+            self._indexes.append(self.signer_index)
+        self._load_lock = threading.RLock()
+        # 加载和追加时去重重复的字符串与参数字典
+        self.interner = Interner() if INTERN_SETTINGS["enabled"] else None
+        if storage is None:
+            if segment_dir:
+                storage = SegmentedChainStore(segment_dir)
+            elif chain_file:
+                storage = JsonFileStorage(chain_file)
+            else:
+                storage = create_storage()
+        self.storage = storage
+        # 写入后自动归档旧区块体
+        self.auto_prune = PRUNE_SETTINGS["enabled"] and storage.supports_pruning
+
+        # 已注册内容哈希的布隆过滤器, 未加载链时无需访问存储即可排除未注册内容
+        self.content_filter: Optional[ScalableBloomFilter] = None
+        self._filter_synced = False
+        if BLOOM_SETTINGS["enabled"]:
+            self.content_filter = ScalableBloomFilter(self.storage.index_path("bloom"))
+
+        # 单写线程模型: 挖矿与持久化只在写线程中进行, 读操作不加锁
+        # 队列项为 (区块数据, Future, 提交时间)
+        self._write_queue: "queue.Queue[Optional[Tuple[Union[Dict[str, Any], Block], Future, float]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # 新区块持久化后通知订阅者
+        self._appended = threading.Condition()
+        self.consumer_offsets = ConsumerOffsets(self.storage.index_path("consumers"))
+
+        if not self.storage.exists():
+            self._chain = []
+            self._difficulty = MINING_DIFFICULTY
+            self._consensus_checked = True
+            self._hash_scheme = hash_scheme or HashScheme.from_settings()
+            if retarget is None and self.consensus.name == "pow":
+                retarget = DifficultyRetarget.from_settings()
+            self._check_retarget(retarget)
+            self._set_retarget(retarget)
+            if self.content_filter is not None:
+                self.content_filter.clear()
+                self._filter_synced = True
+            if create_genesis:
+                self.create_genesis_block()
+                self.save_chain()
+
+    @property
+    def chain(self) -> List[Block]:
+        """内存中的完整区块列表, 首次访问时从存储加载"""
+        chain = self._chain
+        if chain is None:
+            with self._load_lock:
+                if self._chain is None:
+                    self.load_chain()
+                chain = self._chain
+        return chain
+
+    @chain.setter
+    def chain(self, chain: List[Block]) -> None:
+        self._chain = chain
+
+    @property
+    def loaded(self) -> bool:
+        """区块链是否已加载到内存"""
+        return self._chain is not None
+
+    @property
+    def difficulty(self) -> int:
+        """挖矿难度"""
+        if self._difficulty is None:
+            if self.storage.random_access:
+                metadata = self.storage.get_metadata()
+                self._difficulty = metadata.get("difficulty", MINING_DIFFICULTY)
+            else:
+                self.chain
+        return self._difficulty
+
+    @difficulty.setter
+    def difficulty(self, difficulty: int) -> None:
+        self._difficulty = difficulty
+
+    @property
+    def hash_scheme(self) -> HashScheme:
+        """链的内容哈希与区块哈希算法"""
+        if self._hash_scheme is None:
+            content_filter = self.content_filter
+            if self.storage.random_access:
+                self._hash_scheme = HashScheme.from_dict(self.storage.get_metadata().get("hashing"))
+            elif (content_filter is not None and content_filter.hashing is not None and
+                  content_filter.fingerprint == self.storage.fingerprint()):
+                # 与存储一致的布隆过滤器记录了链的哈希配置, 无需为计算内容哈希加载链
+                self._hash_scheme = HashScheme.from_dict(content_filter.hashing)
+            else:
+                self.chain
+        return self._hash_scheme
+
+    @hash_scheme.setter
+    def hash_scheme(self, hash_scheme: HashScheme) -> None:
+        self._hash_scheme = hash_scheme
+
+    @property
+    def retarget(self) -> Optional[DifficultyRetarget]:
+        """难度调整规则, 固定难度的链为None"""
+        if not self._retarget_known:
+            if self.storage.random_access:
+                self._set_retarget(DifficultyRetarget.from_dict(self.storage.get_metadata().get("retarget")))
+            else:
+                self.chain
+        return self._retarget
+
+    @retarget.setter
+    def retarget(self, retarget: Optional[DifficultyRetarget]) -> None:
+        self._set_retarget(retarget)
+
+    def _set_retarget(self, retarget: Optional[DifficultyRetarget]) -> None:
+        self._retarget = retarget
+        self._retarget_known = True
+
+    def _check_retarget(self, retarget: Optional[DifficultyRetarget]) -> None:
+        """难度调整只对工作量证明有意义"""
+        if retarget is not None and self.consensus.name != "pow":
+            raise ValueError(f"Adaptive difficulty requires proof of work, not {self.consensus.name}")
+
+    def set_retarget(self, retarget: Optional[DifficultyRetarget]) -> None:
+        """切换难度调整规则 (None为恢复固定难度) 并立即写入链元数据
+
+        规则只约束之后追加的区块; 已追加区块记录的难度在校验时按当前规则检查,
+        收紧取值范围可能使已有区块校验失败。应在没有写操作进行时调用。
+        """
+        self._check_retarget(retarget)
+        self._set_retarget(retarget)
+        self._save_metadata()
+
+    def block_difficulty(self, block: Block) -> int:
+        """区块的难度: 区块记录的难度, 未记录时为链的固定难度"""
+        return self.difficulty if block.difficulty is None else block.difficulty
+
+    def migrate_content_hash(self, algorithm: str) -> HashScheme:
+        """切换内容哈希算法并进入迁移期
+
+        迁移期间新注册和许可证更新同时记录新旧算法的摘要, 查询时依次按
+        新旧算法查找, 以旧算法注册的内容仍可验证。新的配置立即写入链元数据,
+        应在没有写操作进行时调用。
+        """
+        self.hash_scheme = self.hash_scheme.migrate(algorithm)
+        self._save_metadata()
+        return self._hash_scheme
+
+    def end_hash_migration(self) -> HashScheme:
+        """结束迁移期, 之后只按当前算法查询 (以旧算法注册的内容不再可查)"""
+        scheme = self.hash_scheme
+        self.hash_scheme = HashScheme(scheme.content, scheme.block)
+        self._save_metadata()
+        return self._hash_scheme
+
+    def _save_metadata(self) -> None:
+        """立即持久化链元数据"""
+        if self._chain is None and self.storage.random_access:
+            self.storage.append([], self._chain_metadata())
         else:
-            self.create_genesis_block()
             self.save_chain()
 
+    @property
+    def chain_file(self) -> Optional[Path]:
+        """JSON存储的链文件路径"""
+        return getattr(self.storage, "chain_file", None)
+
     def create_genesis_block(self) -> None:
         """创建创世区块"""
         genesis_block = Block(
@@ -68,68 +324,596 @@ class Blockchain:
                 "message": "Genesis Block",
                 "user_id": get_user_id()
             },
-            "0"
+            "0",
+            self.hash_scheme.block
         )
+        self._index_block(genesis_block)
         self.chain.append(genesis_block)
 
     def get_latest_block(self) -> Block:
         """获取最新区块"""
+        if self._chain is None and self.storage.random_access:
+            tip = self._tip
+            if tip is None:
+                tip = self._tip = Block.from_dict(self.storage.read_block(self.storage.height - 1),
+                                                  self.hash_scheme.block)
+            return tip
         return self.chain[-1]
 
+    @property
+    def height(self) -> int:
+        """当前区块数量"""
+        if self._chain is None and self.storage.random_access:
+            return self.storage.height
+        return len(self.chain)
+
+    def find_blocks(self, content_hash: str) -> List[Block]:
+        """按内容哈希查找区块 (按高度排序)
+
+        未加载时若存储后端带索引则直接查询存储, 否则使用内存中的内容索引。
+        """
+        if self._chain is None:
+            if not self.might_contain(content_hash):
+                return []
+            if self.storage.indexed_lookups:
+                algorithm = self.hash_scheme.block
+                return [Block.from_dict(b, algorithm) for b in self.storage.find_blocks(content_hash=content_hash)]
+        chain = self.chain
+        return [chain[i] for i in self._content_index.get(content_hash, ()) if i < len(chain)]
+
+    def add_index(self, index: BlockIndex) -> BlockIndex:
+        """注册二级索引; 链已加载时立即构建"""
+        with self._load_lock:
+            if self._chain is not None:
+                index.rebuild(self.iter_blocks())
+            self._indexes.append(index)
+        return index
+
+    def iter_time_range(self, start: TimeBound, end: TimeBound) -> Iterator[Block]:
+        """按区块时间戳遍历闭区间内的区块 (按时间排序, 流式返回)"""
+        if self._chain is None and self.storage.indexed_lookups:
+            algorithm = self.hash_scheme.block
+            for block_data in self.storage.iter_time_range(normalize_time(start), normalize_time(end)):
+                yield Block.from_dict(block_data, algorithm)
+            return
+        chain = self.chain
+        for height in self.time_index.heights(start, end):
+            if height < len(chain):
+                yield chain[height]
+
+    def might_contain(self, content_hash: str) -> bool:
+        """布隆过滤器判断: 返回False表示该内容哈希一定未上链"""
+        content_filter = self.content_filter
+        if content_filter is None:
+            return True
+        if not self._filter_synced:
+            with self._load_lock:
+                self._sync_filter()
+        return content_hash in content_filter
+
+    def _sync_filter(self) -> None:
+        """使布隆过滤器与存储一致: 指纹相同直接使用, 否则增量补齐或随加载重建"""
+        content_filter = self.content_filter
+        if self._filter_synced:
+            return
+        if content_filter.fingerprint is not None and content_filter.fingerprint == self.storage.fingerprint():
+            self._filter_synced = True
+        elif (self._chain is None and self.storage.random_access and
+              content_filter.height <= self.storage.height):
+            for block_data in self.storage.iter_blocks(content_filter.height):
+                content_hash = block_data["data"].get("content_hash")
+                if content_hash is not None:
+                    content_filter.add(content_hash)
+            content_filter.flush(self.storage.height, self.storage.fingerprint(), self.hash_scheme.to_dict())
+            self._filter_synced = True
+        else:
+            # 加载链时会重建过滤器
+            self.chain
+            self._filter_synced = True
+
+    def _flush_filter(self) -> None:
+        """持久化后记录过滤器覆盖的高度"""
+        if self.content_filter is not None and self._filter_synced:
+            self.content_filter.flush(self.height, self.storage.fingerprint(), self.hash_scheme.to_dict())
+
+    def iter_blocks(self) -> Iterator[Block]:
+        """遍历调用时刻的区块快照
+
+        链只追加不修改, 固定列表引用和长度即可得到一致的前缀视图,
+        读操作无需等待写线程。
+        """
+        chain = self.chain
+        for i in range(len(chain)):
+            yield chain[i]
+
+    def snapshot(self, height: Optional[int] = None, load: bool = False) -> ChainSnapshot:
+        """固定当前高度 (或更早的height) 的一致只读视图
+
+        快照不阻塞写线程, 之后追加的区块和许可证更新对其不可见。
+        未加载链时若存储支持索引查询则快照直接读取存储; load为True时
+        先加载链, 以便通过snapshot.index读取二级索引视图。
+        """
+        chain = self._chain
+        if chain is None and (load or not self.storage.indexed_lookups):
+            chain = self.chain
+        # 先固定链, 再取索引视图: 索引总是先于链更新, 视图不会缺少快照内的区块
+        current = len(chain) if chain is not None else self.storage.height
+        if height is None:
+            height = current
+        elif not 0 <= height <= current:
+            raise ValueError(f"Snapshot height {height} out of range (chain height {current})")
+        indexes = {id(index): index.snapshot(height) for index in list(self._indexes)}
+        return ChainSnapshot(self, chain, height, self._content_index, indexes)
+
+    def blocks_from(self, start: int) -> Iterator[Block]:
+        """从指定高度遍历到调用时刻的链尾, 未加载时直接读取存储"""
+        if self._chain is None and self.storage.random_access:
+            algorithm = self.hash_scheme.block
+            for block_data in self.storage.iter_blocks(start):
+                yield Block.from_dict(block_data, algorithm)
+            return
+        chain = self.chain
+        for i in range(start, len(chain)):
+            yield chain[i]
+
+    def wait_for_block(self, index: int, timeout: Optional[float] = None) -> bool:
+        """等待高度为index的区块持久化, 超时返回False"""
+        with self._appended:
+            return self._appended.wait_for(lambda: self.height > index, timeout)
+
+    def subscribe(self, start: Optional[int] = None, consumer: Optional[str] = None,
+                  follow: bool = True, timeout: Optional[float] = None) -> Subscription:
+        """订阅区块事件
+
+        返回可同步或异步迭代的Subscription, 产出ContentRegistered和LicenseUpdated事件。
+        指定consumer时消费位置保存在存储的辅助索引目录下, 重启后从该位置继续。
+        """
+        return Subscription(self, start, consumer, self.consumer_offsets, follow, timeout)
+
+    def _notify_appended(self) -> None:
+        """唤醒等待新区块的订阅者"""
+        with self._appended:
+            self._appended.notify_all()
+
+    @instrumented("add_block")
     def add_block(self, data: Dict[str, Any]) -> Block:
         """添加新区块"""
+        if threading.current_thread() is self._writer:
+            new_block = self._append_block(data)
+            try:
+                self.save_chain()
+            except Exception:
+                self._rollback()
+                raise
+            self._notify_appended()
+            return new_block
+        return self.submit_block(data).result()
+
+    def apply_blocks(self, blocks: List[Block]) -> List[Block]:
+        """追加其他节点已封装的区块 (复制用)
+
+        区块经写线程逐个增量校验: 必须紧接当前链尾, 并通过共识和签名校验;
+        整批校验通过的区块统一落盘一次。
+        """
+        futures = [self.submit_block(block) for block in blocks]
+        return [future.result() for future in futures]
+
+    def submit_block(self, data: Union[Dict[str, Any], Block]) -> Future:
+        """将区块数据提交给写线程, 返回在区块持久化后完成的Future"""
+        future: Future = Future()
+        self._ensure_writer()
+        self._write_queue.put((data, future, time.monotonic()))
+        return future
+
+    def close(self) -> None:
+        """等待排队中的写操作完成, 停止写线程并释放存储"""
+        with self._writer_lock:
+            writer = self._writer
+            if writer is not None:
+                self._write_queue.put(None)
+        if writer is not None:
+            writer.join()
+            with self._writer_lock:
+                if self._writer is writer:
+                    self._writer = None
+        if self.verifier is not None:
+            self.verifier.close()
+        self.storage.close()
+
+    def _ensure_writer(self) -> None:
+        """按需启动写线程"""
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._writer_loop,
+                    name="blockchain-writer",
+                    daemon=True
+                )
+                self._writer.start()
+
+    def _writer_loop(self) -> None:
+        """写线程主循环: 逐个封装排队的交易, 由调度器决定何时统一落盘一次"""
+        scheduler = self.scheduler
+        write_queue = self._write_queue
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            # 队列按提交顺序处理, 批中第一个交易等待最久
+            submitted = item[2]
+            done = []
+            stop = False
+            while True:
+                data, future, _ = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        done.append((future, self._append_block(data)))
+                    except Exception as e:
+                        future.set_exception(e)
+                waited = time.monotonic() - submitted
+                queued = write_queue.qsize()
+                if scheduler.should_flush(len(done), queued, waited):
+                    break
+                linger = 0.0 if queued else scheduler.linger(waited)
+                try:
+                    item = write_queue.get(timeout=linger) if linger > 0 else write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+
+            if done:
+                started = time.perf_counter()
+                try:
+                    self.save_chain()
+                except Exception as e:
+                    # 未能持久化的区块从内存中撤回, 读者不会看到, 之后的落盘也不会写入
+                    persisted = self._rollback()
+                    for future, block in done:
+                        if block.index < persisted:
+                            future.set_result(block)
+                        else:
+                            future.set_exception(e)
+                else:
+                    scheduler.record_flush(time.perf_counter() - started)
+                    metrics.observe("seal_batch_blocks", len(done), SEAL_BATCH_BUCKETS)
+                    for future, block in done:
+                        future.set_result(block)
+                    self._notify_appended()
+                    self._auto_prune()
+
+            if stop:
+                return
+
+    def _append_block(self, data: Dict[str, Any]) -> Block:
+        """挖掘并追加区块 (仅在写线程中调用)"""
+        self._ensure_consensus()
+        if isinstance(data, Block):
+            return self._apply_block(data)
+        self._check_transaction(data)
+        if self.interner is not None:
+            data = self.interner.intern(data)
+        if self._chain is None and self.storage.random_access:
+            with self._load_lock:
+                if self._chain is None:
+                    return self._append_unloaded(data)
+
         previous_block = self.get_latest_block()
-        new_block = Block(
-            len(self.chain),
-            get_current_timestamp(),
-            data,
-            previous_block.hash
-        )
-        new_block.mine_block(self.difficulty)
+        timestamp = get_current_timestamp()
+        if self.interner is not None:
+            timestamp = self.interner.intern(timestamp)
+        new_block = self._seal(len(self.chain), timestamp, data, previous_block)
+        self._index_block(new_block)
         self.chain.append(new_block)
-        self.save_chain()
         return new_block
 
+    def _append_unloaded(self, data: Dict[str, Any]) -> Block:
+        """未加载链时直接基于存储中的链尾追加并立即持久化"""
+        previous_block = self.get_latest_block()
+        new_block = self._seal(previous_block.index + 1, get_current_timestamp(), data, previous_block)
+        return self._persist_unloaded(new_block)
+
+    def _seal(self, index: int, timestamp: str, data: Dict[str, Any], previous_block: Block) -> Block:
+        """创建并封装区块; 自适应难度的链按调整规则选择并记录区块的难度"""
+        retarget = self.retarget
+        difficulty = None
+        if retarget is not None:
+            difficulty = retarget.next_difficulty(previous_block.difficulty, self.difficulty)
+        new_block = Block(index, timestamp, data, previous_block.hash, self.hash_scheme.block, difficulty)
+        started = time.perf_counter()
+        self.consensus.seal(new_block, self.block_difficulty(new_block))
+        elapsed = time.perf_counter() - started
+        self.scheduler.record_seal(elapsed)
+        if retarget is not None:
+            retarget.record(difficulty, elapsed)
+        return new_block
+
+    def _persist_unloaded(self, block: Block) -> Block:
+        """未加载链时直接写入存储并更新链尾, 写入成功后才加入二级索引"""
+        content_hash = block.data.get("content_hash")
+        if content_hash is not None and self.content_filter is not None:
+            self.content_filter.add(content_hash)
+        with metrics.timer("disk_write"):
+            self.storage.append([block.to_dict()], self._chain_metadata())
+        for index in self._indexes:
+            if not index.requires_full_chain:
+                index.add(block)
+        self._tip = block
+        self._flush_filter()
+        return block
+
+    def _apply_block(self, block: Block) -> Block:
+        """校验并追加已封装的区块 (仅在写线程中调用)"""
+        self._ensure_consensus()
+        algorithm = self.hash_scheme.block
+        if block.hash_algorithm != algorithm:
+            block.hash_algorithm = algorithm
+        height = self.height
+        if height == 0:
+            if block.index != 0 or block.previous_hash != "0" or block.hash != block.calculate_hash():
+                raise ValueError("Invalid genesis block")
+        else:
+            previous_block = self.get_latest_block()
+            if block.index != previous_block.index + 1 or block.previous_hash != previous_block.hash:
+                raise ValueError(f"Block {block.index} does not extend the chain at height {height}")
+            if not self._valid_difficulty(block, previous_block):
+                raise ValueError(f"Block {block.index} records difficulty {block.difficulty} "
+                                 f"outside the chain's difficulty rules")
+            if not self.consensus.verify(block, self.block_difficulty(block)):
+                raise ValueError(f"Block {block.index} failed {self.consensus.name} verification")
+            self._check_transaction(block.data)
+            if self.interner is not None:
+                self.interner.intern_block(block, previous_block)
+
+        if self._chain is None and self.storage.random_access:
+            with self._load_lock:
+                if self._chain is None:
+                    return self._persist_unloaded(block)
+        self._index_block(block)
+        self.chain.append(block)
+        return block
+
+    def prune(self, below_height: Optional[int] = None, vacuum: bool = False) -> Dict[str, Any]:
+        """将旧区块体移入压缩归档, 默认保留PRUNE_SETTINGS["keep_recent"]个最新区块
+
+        已归档区块的区块头和索引列保留在线, 按内容哈希、时间范围等读取时
+        从归档按需恢复。内存中已加载的链不受影响。
+        """
+        if not self.storage.supports_pruning:
+            raise ValueError(f"{type(self.storage).__name__} does not support pruning")
+        if below_height is None:
+            below_height = self.height - PRUNE_SETTINGS["keep_recent"]
+        with metrics.timer("prune"):
+            return self.storage.prune(max(0, below_height), vacuum)
+
+    def _rollback(self) -> int:
+        """落盘失败后撤回内存中未持久化的区块, 返回存储中的区块数量 (仅在写线程中调用)
+
+        与加载相同, 整体替换列表引用并重建内容索引和二级索引, 正在遍历旧列表的
+        读者不受影响。布隆过滤器不能删除元素, 撤回区块的内容哈希只会成为误判。
+        """
+        with self._load_lock:
+            height = self.storage.height
+            chain = self._chain
+            if chain is None or len(chain) <= height:
+                return height
+            chain = chain[:height]
+            content_index = self._build_content_index(chain)
+            for index in self._indexes:
+                index.rebuild(chain)
+            self._content_index = content_index
+            self.chain = chain
+            self._tip = None
+            return height
+
+    def _auto_prune(self) -> None:
+        """未归档的旧区块攒够一个归档文件时移入归档 (仅在写线程中调用)"""
+        if not self.auto_prune:
+            return
+        below_height = self.height - PRUNE_SETTINGS["keep_recent"]
+        if below_height - self.storage.prunable_from() < PRUNE_SETTINGS["archive_blocks"]:
+            return
+        try:
+            self.prune(below_height)
+        except Exception:
+            # 区块已持久化, 归档失败时保留在线, 下一批写入后重试
+            metrics.inc("prune_failures_total")
+
+    def verify_headers(self) -> bool:
+        """只用区块头校验哈希链接, 不读取区块体 (已归档的区块同样适用)
+
+        区块体与区块头的一致性在从归档恢复时核对, 完整校验见is_chain_valid。
+        """
+        if self._chain is not None:
+            headers = ((block.index, block.previous_hash, block.hash) for block in self.iter_blocks())
+        else:
+            headers = ((h["index"], h["previous_hash"], h["hash"]) for h in self.storage.iter_headers())
+        expected_hash = "0"
+        for height, (index, previous_hash, block_hash) in enumerate(headers):
+            if index != height or previous_hash != expected_hash:
+                return False
+            expected_hash = block_hash
+        return True
+
+    def _valid_difficulty(self, block: Block, previous_block: Block) -> bool:
+        """区块记录的难度是否符合链的难度规则
+
+        没有调整规则 (固定难度) 时, 记录的难度不得低于链的难度。
+        """
+        if block.difficulty is None:
+            return True
+        retarget = self.retarget
+        if retarget is None:
+            return block.difficulty >= self.difficulty
+        return retarget.allows(previous_block.difficulty, block.difficulty)
+
+    def _check_transaction(self, data: Dict[str, Any]) -> None:
+        """追加前校验交易签名及用户与公钥的绑定"""
+        if self.verifier is None:
+            return
+        self.verifier.check(data, self._bound_key(data.get("user_id")))
+
+    def _bound_key(self, user_id: Optional[str]) -> Optional[str]:
+        """用户已绑定的公钥 (仅在写线程中调用)
+
+        未加载链时, 带索引的存储按用户ID查询其首个签名交易并缓存到签名索引;
+        其他存储遍历一次全部区块构建完整的签名索引, 之后随追加增量维护。
+        """
+        signer_index = self.signer_index
+        if self._chain is None and not signer_index.complete:
+            if self.storage.indexed_lookups:
+                if not signer_index.known(user_id):
+                    public_key = None
+                    for block_data in self.storage.find_blocks(user_id=user_id):
+                        signature = block_data["data"].get("signature")
+                        if isinstance(signature, dict):
+                            public_key = signature.get("public_key")
+                            break
+                    signer_index.bind(user_id, public_key)
+            elif self.storage.random_access:
+                signer_index.rebuild(self.blocks_from(0))
+            else:
+                self.chain
+        return signer_index.get(user_id)
+
+    def _index_block(self, block: Block) -> None:
+        """将区块加入内容索引和布隆过滤器 (在区块对读者可见之前调用)"""
+        content_hash = block.data.get("content_hash")
+        if content_hash is not None:
+            if self.content_filter is not None:
+                self.content_filter.add(content_hash)
+            self._content_index.setdefault(content_hash, []).append(block.index)
+        for index in self._indexes:
+            index.add(block)
+
+    @instrumented("is_chain_valid")
     def is_chain_valid(self) -> bool:
-        """验证区块链的完整性"""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
+        """验证区块链的完整性 (区块封装按当前共识模式校验)"""
+        chain = self.chain
+        consensus = self.consensus
+        difficulty = self.difficulty
+        for i in range(1, len(chain)):
+            current_block = chain[i]
+            previous_block = chain[i - 1]
 
-            if current_block.hash != current_block.calculate_hash():
+            if current_block.difficulty is not None:
+                if not self._valid_difficulty(current_block, previous_block):
+                    return False
+                if not consensus.verify(current_block, current_block.difficulty):
+                    return False
+            elif not consensus.verify(current_block, difficulty):
                 return False
 
             if current_block.previous_hash != previous_block.hash:
                 return False
 
+        if self.verifier is not None:
+            return self.verifier.verify_chain([chain[i].data for i in range(1, len(chain))])
         return True
 
+    @instrumented("save_chain")
     def save_chain(self) -> None:
         """保存区块链到文件"""
-        chain_data = {
-            "chain": [block.to_dict() for block in self.chain],
-            "metadata": {
-                "last_updated": get_current_timestamp(),
-                "user_id": get_user_id(),
-                "difficulty": self.difficulty
-            }
+        if self._chain is None:
+            # 未加载时新区块已在追加时持久化
+            return
+        with metrics.timer("disk_write"):
+            self.storage.save(self._chain, self._chain_metadata())
+        self._flush_filter()
+
+    def _ensure_consensus(self) -> None:
+        """封装或校验区块前, 使共识引擎采用链元数据记录的共识参数"""
+        if not self._consensus_checked:
+            if self.storage.random_access:
+                self._check_consensus(self.storage.get_metadata())
+            else:
+                self.chain
+
+    def adopt_consensus(self, params: Dict[str, Any]) -> None:
+        """采用主节点的共识参数 (复制用), 与本链记录的参数不一致时抛出ValueError"""
+        self._ensure_consensus()
+        self.consensus.adopt(params)
+
+    def _check_consensus(self, metadata: Dict[str, Any]) -> None:
+        """核对链元数据记录的共识模式并采用其参数 (如授权公钥), 不一致时抛出ValueError
+
+        以其他共识模式追加的区块会使链在原模式下校验失败, 因此打开链时必须使用
+        创建时的模式; 自适应难度只用于工作量证明。
+        """
+        recorded = metadata.get("consensus")
+        if recorded is not None and recorded != self.consensus.name:
+            raise ValueError(f"Chain uses {recorded} consensus, not {self.consensus.name}")
+        if metadata.get("retarget") and self.consensus.name != "pow":
+            raise ValueError(f"Chain uses adaptive difficulty, which requires proof of work, "
+                             f"not {self.consensus.name}")
+        self.consensus.adopt(metadata.get("consensus_params") or {})
+        self._consensus_checked = True
+
+    def _chain_metadata(self) -> Dict[str, Any]:
+        """链元数据"""
+        return {
+            "last_updated": get_current_timestamp(),
+            "user_id": get_user_id(),
+            "difficulty": self.difficulty,
+            "consensus": self.consensus.name,
+            "consensus_params": self.consensus.params(),
+            "hashing": self.hash_scheme.to_dict(),
+            "retarget": self.retarget.to_dict() if self.retarget is not None else None
         }
-        save_json_file(chain_data, self.chain_file)
 
+    def _rebuild_filter(self, content_index: Dict[str, List[int]]) -> None:
+        """加载链后若过滤器与存储不一致则按内容索引重建"""
+        content_filter = self.content_filter
+        if content_filter is None or self._filter_synced:
+            return
+        fingerprint = self.storage.fingerprint()
+        hashing = self.hash_scheme.to_dict()
+        if content_filter.fingerprint is None or content_filter.fingerprint != fingerprint:
+            content_filter.clear()
+            for content_hash in content_index:
+                content_filter.add(content_hash)
+            content_filter.flush(len(self._chain), fingerprint, hashing)
+        elif content_filter.hashing != hashing:
+            content_filter.flush(content_filter.height, fingerprint, hashing)
+        self._filter_synced = True
+
+    @staticmethod
+    def _build_content_index(chain: List[Block]) -> Dict[str, List[int]]:
+        """按内容哈希索引区块高度"""
+        content_index: Dict[str, List[int]] = {}
+        for block in chain:
+            content_hash = block.data.get("content_hash")
+            if content_hash is not None:
+                content_index.setdefault(content_hash, []).append(block.index)
+        return content_index
+
+    @instrumented("load_chain")
     def load_chain(self) -> None:
         """从文件加载区块链"""
-        chain_data = load_json_file(self.chain_file)
-
-        self.chain = []
-        for block_data in chain_data.get("chain", []):
-            block = Block(
-                block_data["index"],
-                block_data["timestamp"],
-                block_data["data"],
-                block_data["previous_hash"]
-            )
-            block.nonce = block_data["nonce"]
-            block.hash = block_data["hash"]
-            self.chain.append(block)
-
-        self.difficulty = chain_data.get("metadata", {}).get("difficulty", MINING_DIFFICULTY)
\ No newline at end of file
+        blocks, metadata = self.storage.load()
+        self._check_consensus(metadata)
+        hash_scheme = HashScheme.from_dict(metadata.get("hashing"))
+        algorithm = hash_scheme.block
+        chain = [Block.from_dict(block_data, algorithm) for block_data in blocks]
+        interner = self.interner
+        if interner is not None:
+            previous = None
+            for block in chain:
+                previous = interner.intern_block(block, previous)
+        content_index = self._build_content_index(chain)
+        for index in self._indexes:
+            index.rebuild(chain)
+
+        # 整体替换列表引用, 正在遍历旧列表的读者不受影响
+        self._content_index = content_index
+        self.chain = chain
+        self._tip = None
+        self.hash_scheme = hash_scheme
+        retarget = DifficultyRetarget.from_dict(metadata.get("retarget"))
+        if not self._retarget_known or retarget != self._retarget:
+            # 规则未变时保留已有的封装时间采样
+            self._set_retarget(retarget)
+        self._rebuild_filter(content_index)
+
+        self.difficulty = metadata.get("difficulty", MINING_DIFFICULTY)
\ No newline at end of file
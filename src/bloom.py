@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import math
+import mmap
+import os
+from pathlib import Path
+from .utils.helpers import load_json_file, save_json_file
+from config.settings import BLOOM_SETTINGS
+
+
+def filter_digest(key: str) -> bytes:
+    """取键的摘要字节; 十六进制哈希直接解码, 其他字符串先做SHA256"""
+    try:
+        digest = bytes.fromhex(key)
+    except ValueError:
+        digest = b""
+    if len(digest) < 16:
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return digest
+
+
+class BloomFilter:
+    def __init__(self, path: Path, capacity: int, error_rate: float) -> None:
+        """初始化映射到文件的布隆过滤器, 置位直接写入页缓存"""
+        self.path = Path(path)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+
+        size = (self.num_bits + 7) // 8
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "r+b" if self.path.exists() and self.path.stat().st_size == size else "w+b"
+        self._file = open(self.path, mode)
+        if mode == "w+b":
+            self._file.truncate(size)
+        self._bits = mmap.mmap(self._file.fileno(), size)
+
+    def _positions(self, digest: bytes) -> List[int]:
+        """双重哈希计算位位置"""
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, digest: bytes) -> None:
+        """加入元素"""
+        bits = self._bits
+        for position in self._positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, digest: bytes) -> bool:
+        """元素可能存在时返回True; 返回False表示一定不存在"""
+        bits = self._bits
+        for position in self._positions(digest):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def flush(self) -> None:
+        """将位数组刷写到磁盘"""
+        self._bits.flush()
+
+    def close(self) -> None:
+        """关闭映射"""
+        self._bits.close()
+        self._file.close()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为头信息记录"""
+        return {
+            "file": self.path.name,
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count
+        }
+
+
+class ScalableBloomFilter:
+    HEADER = "bloom.json"
+
+    def __init__(self, directory: Path, error_rate: Optional[float] = None,
+                 initial_capacity: Optional[int] = None) -> None:
+        """初始化可扩容布隆过滤器
+
+        当前子过滤器写满后追加一个容量乘以growth、误判率乘以tightening的新子过滤器,
+        整体误判率收敛于 error_rate / (1 - tightening)。
+        height和fingerprint记录过滤器覆盖到的链高度及对应的存储状态,
+        hashing记录计算内容哈希的算法 (链元数据中的哈希配置)。
+        """
+        self.directory = Path(directory)
+        self.error_rate = error_rate or BLOOM_SETTINGS["false_positive_rate"]
+        self.initial_capacity = initial_capacity or BLOOM_SETTINGS["initial_capacity"]
+        self.growth = BLOOM_SETTINGS["growth"]
+        self.tightening = BLOOM_SETTINGS["tightening"]
+        self.filters: List[BloomFilter] = []
+        self.height = 0
+        self.fingerprint: Optional[str] = None
+        self.hashing: Optional[Dict[str, Any]] = None
+
+        header = load_json_file(self.directory / self.HEADER)
+        if header and header.get("error_rate") == self.error_rate:
+            self.height = header.get("height", 0)
+            self.fingerprint = header.get("fingerprint")
+            self.hashing = header.get("hashing")
+            for entry in header.get("filters", []):
+                bloom = BloomFilter(self.directory / entry["file"], entry["capacity"], entry["error_rate"])
+                bloom.count = entry["count"]
+                self.filters.append(bloom)
+
+    def __contains__(self, key: str) -> bool:
+        digest = filter_digest(key)
+        return any(bloom.contains(digest) for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, key: str) -> None:
+        """加入元素, 当前子过滤器写满时自动扩容"""
+        digest = filter_digest(key)
+        if any(bloom.contains(digest) for bloom in self.filters):
+            return
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            self._grow()
+        self.filters[-1].add(digest)
+
+    def _grow(self) -> None:
+        """追加新的子过滤器"""
+        n = len(self.filters)
+        self.filters.append(BloomFilter(
+            self.directory / f"bloom_{n:03d}.bin",
+            self.initial_capacity * self.growth ** n,
+            self.error_rate * self.tightening ** n
+        ))
+
+    def clear(self) -> None:
+        """清空过滤器 (重建前调用)"""
+        for bloom in self.filters:
+            bloom.close()
+            os.remove(bloom.path)
+        self.filters = []
+        self.height = 0
+        self.fingerprint = None
+        self.hashing = None
+
+    def flush(self, height: int, fingerprint: Optional[str],
+              hashing: Optional[Dict[str, Any]] = None) -> None:
+        """刷写位数组和头信息, 记录覆盖的链高度"""
+        self.height = height
+        self.fingerprint = fingerprint
+        if hashing is not None:
+            self.hashing = hashing
+        for bloom in self.filters:
+            bloom.flush()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        save_json_file({
+            "error_rate": self.error_rate,
+            "height": height,
+            "fingerprint": fingerprint,
+            "hashing": self.hashing,
+            "filters": [bloom.to_dict() for bloom in self.filters]
+        }, self.directory / self.HEADER)
+
+    def close(self) -> None:
+        """关闭全部子过滤器"""
+        for bloom in self.filters:
+            bloom.close()
+        self.filters = []
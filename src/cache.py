@@ -0,0 +1,141 @@
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional, Set, Tuple
+import threading
+from .indexes import BlockIndex
+from .interning import deep_size
+from .metrics import metrics
+from config.settings import CACHE_SETTINGS
+
+# (操作名, 内容哈希)
+CacheKey = Tuple[str, str]
+# 计算开始时的 (缓存代数, 链高度)
+CacheToken = Tuple[int, int]
+
+
+class ResultCache(BlockIndex):
+    """按内容哈希缓存查询结果的LRU缓存
+
+    条目以 (操作, 内容哈希) 为键, 并记录计算结果时的链高度。缓存作为二级索引
+    注册到区块链, 追加的区块只使缓存中同一内容哈希的条目失效; 计算期间追加的
+    相关区块使结果不被写入缓存。容量按结果的估算字节数限制。
+    只有通过同一Blockchain实例追加的区块会触发失效。
+    """
+    # 未加载链时追加的区块同样需要通知缓存
+    requires_full_chain = False
+
+    def __init__(self, max_bytes: Optional[int] = None, recent_touches: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes or CACHE_SETTINGS["max_bytes"]
+        self._entries: "OrderedDict[CacheKey, Tuple[int, Dict[str, Any], int]]" = OrderedDict()
+        self._keys_by_hash: Dict[str, Set[CacheKey]] = {}
+        # 最近追加的 (区块高度, 内容哈希), 用于判断计算期间是否有相关区块追加
+        self._touches: Deque[Tuple[int, str]] = deque(maxlen=recent_touches or CACHE_SETTINGS["recent_touches"])
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, blocks: Iterable[Any]) -> None:
+        # 重新加载链时清空缓存, 正在计算的结果也不再写入
+        self.clear()
+
+    def add(self, block: Any) -> None:
+        content_hash = block.data.get("content_hash")
+        if content_hash is None:
+            return
+        content_hashes = [content_hash]
+        # 哈希迁移期间的区块同时记录各算法的摘要, 缓存以当前算法的摘要为键
+        content_digests = block.data.get("content_digests")
+        if content_digests:
+            content_hashes.extend(h for h in content_digests.values() if h != content_hash)
+        with self._lock:
+            for touched_hash in content_hashes:
+                self._touches.append((block.index, touched_hash))
+                keys = self._keys_by_hash.pop(touched_hash, ())
+                for key in keys:
+                    self.bytes -= self._entries.pop(key)[2]
+                self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_hash.clear()
+            self._touches.clear()
+            self._generation += 1
+            self.bytes = 0
+
+    def get(self, operation: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """查询缓存, 命中时返回结果的浅拷贝"""
+        key = (operation, content_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.inc("result_cache_requests_total", operation=operation, result="miss" if entry is None else "hit")
+        return None if entry is None else dict(entry[1])
+
+    def token(self, height: int) -> CacheToken:
+        """在计算结果之前取得, 写入缓存时用于检查计算期间是否有相关区块追加"""
+        return self._generation, height
+
+    def put(self, token: CacheToken, operation: str, content_hash: str, result: Dict[str, Any]) -> bool:
+        """写入结果; 计算期间有同一内容哈希的区块追加或缓存被清空时放弃写入"""
+        generation, height = token
+        size = deep_size(result) + deep_size(content_hash)
+        if size > self.max_bytes:
+            return False
+        key = (operation, content_hash)
+        with self._lock:
+            if generation != self._generation or self._touched_since(content_hash, height):
+                return False
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (height, result, size)
+            self._keys_by_hash.setdefault(content_hash, set()).add(key)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[2]
+                keys = self._keys_by_hash[evicted_key[1]]
+                keys.discard(evicted_key)
+                if not keys:
+                    del self._keys_by_hash[evicted_key[1]]
+                self.evictions += 1
+        return True
+
+    def _touched_since(self, content_hash: str, height: int) -> bool:
+        """高度不低于height的区块中是否有该内容哈希 (无法确定时视为有)"""
+        touches = self._touches
+        if len(touches) == touches.maxlen and touches[0][0] >= height:
+            return True
+        for index, touched_hash in reversed(touches):
+            if index < height:
+                return False
+            if touched_hash == content_hash:
+                return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率与容量统计"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
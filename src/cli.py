@@ -0,0 +1,124 @@
+"""非交互式命令行接口
+
+用法:
+    python main.py register --title 标题 --description 描述 --model GPT-4 --content "..."
+    python main.py verify --file content.txt
+    python main.py history --content "..."
+    python main.py stats
+    python main.py status --quick
+    python main.py owner --owner 202400130071 --offset 0 --limit 50
+
+所有命令输出JSON, 结果status为error时退出码为1。内容可通过--content、
+--file或标准输入提供。重量级模块在命令解析完成后才导入, 查询类命令
+只打开所需的存储索引。
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import sys
+
+COMMANDS = ("register", "verify", "history", "stats", "status", "owner")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行解析器"""
+    parser = argparse.ArgumentParser(prog="ai_copyright", description="AI生成内容版权保护命令行工具")
+    parser.add_argument("--backend", choices=["json", "segmented", "sqlite"], help="存储后端 (默认取配置)")
+    parser.add_argument("--data", type=Path, help="存储路径 (JSON文件、分段目录或SQLite数据库)")
+    parser.add_argument("--consensus", choices=["pow", "authority", "none"], help="共识模式 (默认取配置)")
+    parser.add_argument("--pretty", action="store_true", help="缩进输出JSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_content_args(sub: argparse.ArgumentParser) -> None:
+        group = sub.add_mutually_exclusive_group()
+        group.add_argument("--content", help="内容文本")
+        group.add_argument("--file", type=Path, help="从文件读取内容")
+
+    register = subparsers.add_parser("register", help="注册AI生成内容")
+    add_content_args(register)
+    register.add_argument("--title", required=True, help="标题")
+    register.add_argument("--description", required=True, help="描述")
+    register.add_argument("--model", required=True, help="AI模型")
+    register.add_argument("--license", help="许可证类型")
+    register.add_argument("--params", help="AI参数 (JSON对象)")
+
+    verify = subparsers.add_parser("verify", help="验证内容注册状态")
+    add_content_args(verify)
+
+    history = subparsers.add_parser("history", help="查看内容历史")
+    add_content_args(history)
+
+    subparsers.add_parser("stats", help="查看系统统计")
+
+    status = subparsers.add_parser("status", help="查看区块链状态")
+    status.add_argument("--quick", action="store_true", help="跳过整链校验")
+
+    owner = subparsers.add_parser("owner", help="分页列出所有者的内容")
+    owner.add_argument("--owner", help="所有者ID (默认当前用户)")
+    owner.add_argument("--offset", type=int, default=0, help="起始位置")
+    owner.add_argument("--limit", type=int, default=50, help="每页数量")
+    return parser
+
+
+def read_content(args: argparse.Namespace) -> str:
+    """按参数读取内容"""
+    if args.content is not None:
+        return args.content
+    if args.file is not None:
+        return args.file.read_text(encoding="utf-8")
+    return sys.stdin.read()
+
+
+def create_protection(args: argparse.Namespace) -> Any:
+    """按全局选项创建版权保护系统 (延迟导入)"""
+    from src.blockchain import Blockchain
+    from src.consensus import create_consensus
+    from src.content_registry import ContentRegistry
+    from src.copyright_protection import CopyrightProtection
+    from src.storage import create_storage
+
+    storage = create_storage(args.backend, args.data)
+    return CopyrightProtection(ContentRegistry(Blockchain(storage=storage, consensus=create_consensus(args.consensus))))
+
+
+def run_command(protection: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    """执行子命令并返回结果字典"""
+    if args.command == "register":
+        params = json.loads(args.params) if args.params else None
+        return protection.protect_ai_content(
+            content=read_content(args),
+            title=args.title,
+            description=args.description,
+            ai_model=args.model,
+            ai_params=params,
+            license_type=args.license
+        )
+    if args.command == "verify":
+        return protection.verify_ownership(read_content(args))
+    if args.command == "history":
+        return protection.get_content_history(read_content(args))
+    if args.command == "stats":
+        return protection.get_statistics()
+    if args.command == "owner":
+        return protection.registry.list_owner_contents(args.owner, args.offset, args.limit)
+    return protection.registry.get_chain_status(validate=not args.quick)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口, 返回退出码"""
+    args = build_parser().parse_args(argv)
+    try:
+        protection = create_protection(args)
+        try:
+            result = run_command(protection, args)
+        finally:
+            protection.registry.blockchain.close()
+    except Exception as e:
+        result = {
+            "status": "error",
+            "message": f"Command failed: {str(e)}"
+        }
+
+    print(json.dumps(result, ensure_ascii=False, indent=2 if args.pretty else None))
+    return 0 if result.get("status") == "success" else 1
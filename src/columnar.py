@@ -0,0 +1,329 @@
+"""链数据的列式导出
+
+将区块字段物化为NumPy列, 供分析任务做向量化的分组统计和直方图:
+    index, timestamp (UTC秒, int64), content_size (字节, 未知为-1)
+    type, model, license, user, content_type (分类编码, int32, 缺失为-1)
+license列为区块设置的许可证: 注册区块取注册时的许可证, 许可证更新区块取新许可证。
+
+指定directory时每列保存为定长原始二进制文件 (<列名>.bin) 并以内存映射读取,
+columns.json记录已导出高度、最后一个区块的哈希和各分类列的取值表;
+refresh只追加新区块的行。未安装numpy时导出不可用。
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+from .utils.helpers import load_json_file, save_json_file
+from config.settings import COLUMNAR_SETTINGS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 数值列 -> dtype
+NUMERIC_COLUMNS = {
+    "index": "int64",
+    "timestamp": "int64",
+    "content_size": "int64"
+}
+# 分类列, 以int32编码保存
+CATEGORICAL_COLUMNS = ("type", "model", "license", "user", "content_type")
+CODE_DTYPE = "int32"
+# 缺失值的分类编码及数值
+MISSING = -1
+
+
+class ColumnarError(Exception):
+    """列式导出错误"""
+
+
+def numpy_available() -> bool:
+    """是否安装了numpy"""
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ColumnarError("numpy is required for columnar export")
+
+
+def block_fields(block: Any) -> Tuple[Optional[str], ...]:
+    """提取区块的分类字段 (与CATEGORICAL_COLUMNS顺序一致)"""
+    data = block.data
+    metadata = data.get("metadata") or {}
+    block_type = data.get("type")
+    if block_type == "license_update":
+        license_type = data.get("new_license")
+    else:
+        license_type = metadata.get("license")
+    return (
+        block_type,
+        (metadata.get("ai_info") or {}).get("model"),
+        license_type,
+        data.get("user_id"),
+        metadata.get("content_type")
+    )
+
+
+class ColumnarExport:
+    HEADER = "columns.json"
+
+    def __init__(self, blockchain: Any, directory: Optional[Path] = None) -> None:
+        """初始化列式导出
+
+        directory为None时列保存在内存中, 按容量倍增追加; 否则使用目录中的列文件,
+        已有导出与链不一致 (高度超出或最后一个区块的哈希不同) 时重新导出。
+        构造时不读取区块, 调用refresh导出新区块。
+        """
+        _require_numpy()
+        self.blockchain = blockchain
+        self.directory = Path(directory) if directory is not None else None
+        self.chunk_size = COLUMNAR_SETTINGS["chunk_size"]
+        self.height = 0
+        self._last_hash: Optional[str] = None
+        self._categories: Dict[str, List[str]] = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_COLUMNS}
+        # 列数组, 长度为容量; 有效行为前height行
+        self._columns: Dict[str, Any] = {name: np.empty(0, dtype) for name, dtype in self._dtypes().items()}
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self._open()
+
+    @staticmethod
+    def _dtypes() -> Dict[str, str]:
+        """全部列的dtype"""
+        return {**NUMERIC_COLUMNS, **{name: CODE_DTYPE for name in CATEGORICAL_COLUMNS}}
+
+    def _open(self) -> None:
+        """读取已有的列文件, 截去未记录在头信息中的残留行"""
+        header = load_json_file(self.directory / self.HEADER)
+        if not header or header.get("columns") != self._dtypes():
+            self._reset_files()
+            return
+        self.height = header["height"]
+        self._last_hash = header["last_hash"]
+        for name in CATEGORICAL_COLUMNS:
+            self._categories[name] = header["categories"][name]
+            self._codes[name] = {value: code for code, value in enumerate(self._categories[name])}
+        for name, dtype in self._dtypes().items():
+            path = self._column_path(name)
+            expected = self.height * np.dtype(dtype).itemsize
+            if not path.exists() or path.stat().st_size < expected:
+                self._reset_files()
+                return
+            if path.stat().st_size > expected:
+                os.truncate(path, expected)
+        self._map_files()
+
+    def _column_path(self, name: str) -> Path:
+        """列文件路径"""
+        return self.directory / f"{name}.bin"
+
+    def _reset_files(self) -> None:
+        """清空列文件, 从高度0重新导出"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name in self._dtypes():
+            self._column_path(name).write_bytes(b"")
+        self.height = 0
+        self._last_hash = None
+        self._categories = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._codes = {name: {} for name in CATEGORICAL_COLUMNS}
+        self._columns = {name: np.empty(0, dtype) for name, dtype in self._dtypes().items()}
+        self._save_header()
+
+    def _map_files(self) -> None:
+        """以只读内存映射打开列文件"""
+        for name, dtype in self._dtypes().items():
+            if self.height:
+                self._columns[name] = np.memmap(self._column_path(name), dtype=dtype, mode="r",
+                                                shape=(self.height,))
+            else:
+                self._columns[name] = np.empty(0, dtype)
+
+    def _save_header(self) -> None:
+        """写入头信息 (先写临时文件再替换)"""
+        tmp = self.directory / f"{self.HEADER}.tmp"
+        save_json_file({
+            "height": self.height,
+            "last_hash": self._last_hash,
+            "columns": self._dtypes(),
+            "categories": self._categories
+        }, tmp)
+        os.replace(tmp, self.directory / self.HEADER)
+
+    def refresh(self) -> int:
+        """导出上次refresh之后追加的区块, 返回新增行数"""
+        with self._lock:
+            snapshot = self.blockchain.snapshot()
+            if self.height:
+                if self.height > snapshot.height or snapshot.get_block(self.height - 1).hash != self._last_hash:
+                    # 链被替换, 重新导出
+                    self._clear()
+            added = 0
+            rows: List[Any] = []
+            for block in snapshot.blocks_from(self.height):
+                rows.append(block)
+                if len(rows) >= self.chunk_size:
+                    added += self._append(rows)
+                    rows = []
+            if rows:
+                added += self._append(rows)
+            return added
+
+    def wait_and_refresh(self, timeout: Optional[float] = None) -> int:
+        """等待新区块追加后导出, 超时返回0"""
+        if not self.blockchain.wait_for_block(self.height, timeout):
+            return 0
+        return self.refresh()
+
+    def _clear(self) -> None:
+        """链被替换时丢弃已导出的行"""
+        if self.directory is not None:
+            self._reset_files()
+            return
+        self.height = 0
+        self._last_hash = None
+        self._categories = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._codes = {name: {} for name in CATEGORICAL_COLUMNS}
+
+    def _encode(self, name: str, value: Optional[str]) -> int:
+        """分类值的编码, 新值追加到取值表"""
+        if value is None:
+            return MISSING
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._categories[name])
+            self._categories[name].append(value)
+        return code
+
+    def _append(self, blocks: List[Any]) -> int:
+        """将一批区块物化为列并追加"""
+        indexes = [block.index for block in blocks]
+        # 时间戳格式为 "YYYY-MM-DD HH:MM:SS", numpy可直接解析
+        timestamps = np.array([block.timestamp for block in blocks], dtype="datetime64[s]").astype("int64")
+        sizes = [(block.data.get("metadata") or {}).get("content_size", MISSING) for block in blocks]
+        categorical: Dict[str, List[int]] = {name: [] for name in CATEGORICAL_COLUMNS}
+        encode = self._encode
+        for block in blocks:
+            for name, value in zip(CATEGORICAL_COLUMNS, block_fields(block)):
+                categorical[name].append(encode(name, value))
+
+        chunk = {
+            "index": np.array(indexes, dtype=NUMERIC_COLUMNS["index"]),
+            "timestamp": timestamps,
+            "content_size": np.array(sizes, dtype=NUMERIC_COLUMNS["content_size"])
+        }
+        for name in CATEGORICAL_COLUMNS:
+            chunk[name] = np.array(categorical[name], dtype=CODE_DTYPE)
+
+        height = self.height + len(blocks)
+        if self.directory is not None:
+            for name, values in chunk.items():
+                with open(self._column_path(name), "ab") as f:
+                    values.tofile(f)
+            self.height = height
+            self._last_hash = blocks[-1].hash
+            self._save_header()
+            self._map_files()
+        else:
+            for name, values in chunk.items():
+                column = self._columns[name]
+                if len(column) < height:
+                    # 容量倍增; 读者持有的旧数组不受影响
+                    grown = np.empty(max(height, 2 * len(column), 1024), column.dtype)
+                    grown[:self.height] = column[:self.height]
+                    column = self._columns[name] = grown
+                column[self.height:height] = values
+            self.height = height
+            self._last_hash = blocks[-1].hash
+        return len(blocks)
+
+    def column(self, name: str) -> Any:
+        """列的只读数组 (前height行)"""
+        if name not in self._columns:
+            raise KeyError(f"Unknown column: {name}")
+        values = self._columns[name][:self.height]
+        if self.directory is None:
+            values = values.view()
+            values.flags.writeable = False
+        return values
+
+    def columns(self) -> Dict[str, Any]:
+        """全部列"""
+        return {name: self.column(name) for name in self._columns}
+
+    def categories(self, name: str) -> List[str]:
+        """分类列的取值表, 下标即编码"""
+        return list(self._categories[name])
+
+    def code(self, name: str, value: str) -> int:
+        """分类值的编码, 不存在时返回MISSING"""
+        return self._codes[name].get(value, MISSING)
+
+    def where(self, **equals: str) -> Any:
+        """按分类列取值筛选行的布尔掩码, 如 where(type="content_registration", model="GPT-4")
+
+        从未出现的取值不匹配任何行 (不与编码为MISSING的缺失字段混淆)。
+        """
+        mask = np.ones(self.height, dtype=bool)
+        for name, value in equals.items():
+            code = self._codes[name].get(value)
+            if code is None:
+                return np.zeros(self.height, dtype=bool)
+            mask &= self.column(name) == code
+        return mask
+
+    def value_counts(self, name: str, mask: Optional[Any] = None) -> Dict[str, int]:
+        """分类列各取值的行数 (不含缺失值)"""
+        codes = self.column(name)
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self._categories[name]))
+        categories = self._categories[name]
+        return {categories[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def group_by(self, name: str, value: str = "content_size",
+                 mask: Optional[Any] = None) -> Dict[str, Dict[str, float]]:
+        """按分类列分组, 统计数值列的行数、总和与均值 (忽略缺失的数值)"""
+        codes = self.column(name)
+        values = self.column(value)
+        valid = (codes >= 0) & (values != MISSING)
+        if mask is not None:
+            valid &= mask
+        codes = codes[valid]
+        values = values[valid]
+        size = len(self._categories[name])
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=values, minlength=size)
+        categories = self._categories[name]
+        return {
+            categories[code]: {
+                "count": int(counts[code]),
+                "sum": float(sums[code]),
+                "mean": float(sums[code] / counts[code])
+            }
+            for code in range(size) if counts[code]
+        }
+
+    def histogram(self, name: str, bins: Any = 10, mask: Optional[Any] = None,
+                  bounds: Optional[Tuple[float, float]] = None) -> Tuple[Any, Any]:
+        """数值列的直方图, 返回 (计数, 区间边界)"""
+        values = self.column(name)
+        if mask is not None:
+            values = values[mask]
+        if name == "content_size":
+            values = values[values != MISSING]
+        return np.histogram(values, bins=bins, range=bounds)
+
+    def statistics(self) -> Dict[str, Any]:
+        """与CopyrightProtection.get_statistics相同口径的统计"""
+        registrations = self.where(type="content_registration")
+        return {
+            "total_blocks": self.height,
+            "total_registrations": int(registrations.sum()),
+            "total_updates": int(self.where(type="license_update").sum()),
+            "models_usage": self.value_counts("model", registrations),
+            "licenses_usage": self.value_counts("license", registrations)
+        }
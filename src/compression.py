@@ -0,0 +1,133 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import hashlib
+import json
+import zlib
+from config.settings import AI_MODEL_SETTINGS, COMPRESSION_SETTINGS, COPYRIGHT_SETTINGS
+
+# 片段长度上限, 更长的值 (如内容哈希和描述) 很少重复
+MAX_FRAGMENT_LENGTH = 256
+
+
+def serialize_block(block: Dict[str, Any]) -> bytes:
+    """区块的紧凑JSON编码, 压缩前的统一表示"""
+    return json.dumps(block, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def block_fragments(value: Any) -> Iterator[bytes]:
+    """遍历区块中可能重复的JSON片段: 键名、"键":值 以及较短的子对象"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            key_fragment = json.dumps(key, ensure_ascii=False) + ":"
+            yield key_fragment.encode("utf-8")
+            fragment = key_fragment + json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+            if len(fragment) <= MAX_FRAGMENT_LENGTH:
+                yield fragment.encode("utf-8")
+            yield from block_fragments(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from block_fragments(item)
+
+
+def train_dictionary(samples: Iterable[Dict[str, Any]], size: Optional[int] = None) -> bytes:
+    """按片段出现频率训练压缩字典
+
+    只保留在样本中重复出现的片段; 出现次数最多的片段放在字典末尾,
+    与待压缩数据的距离最近, 引用编码最短。
+    """
+    size = size or COMPRESSION_SETTINGS["dictionary_size"]
+    counts: Counter = Counter()
+    for block in samples:
+        counts.update(set(block_fragments(block)))
+    chosen: List[bytes] = []
+    total = 0
+    for fragment, count in counts.most_common():
+        if count < 2:
+            break
+        if total + len(fragment) > size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+    return b"".join(reversed(chosen))
+
+
+def preset_samples() -> Iterator[Dict[str, Any]]:
+    """按配置中的模型、许可证和内容类型构造的典型交易, 用于生成预置字典"""
+    parameters = AI_MODEL_SETTINGS["default_parameters"]
+    for model in AI_MODEL_SETTINGS["supported_models"]:
+        for license_type in COPYRIGHT_SETTINGS["supported_licenses"]:
+            for content_type in COPYRIGHT_SETTINGS["supported_content_types"]:
+                yield {
+                    "index": 0,
+                    "timestamp": "",
+                    "data": {
+                        "type": "content_registration",
+                        "content_hash": "",
+                        "timestamp": "",
+                        "user_id": "",
+                        "metadata": {
+                            "title": "",
+                            "description": "",
+                            "content_type": content_type,
+                            "ai_info": {"model": model, "parameters": parameters},
+                            "license": license_type,
+                            "creation_time": "",
+                            "creator_id": "",
+                            "registration_time": "",
+                            "user_id": ""
+                        }
+                    },
+                    "previous_hash": "",
+                    "nonce": 0,
+                    "hash": ""
+                }
+            yield {
+                "data": {
+                    "type": "license_update",
+                    "content_hash": "",
+                    "previous_license": license_type,
+                    "new_license": license_type,
+                    "timestamp": "",
+                    "user_id": ""
+                }
+            }
+
+
+def preset_dictionary() -> bytes:
+    """由配置生成的预置字典, 在还没有可训练的区块时使用"""
+    return train_dictionary(preset_samples())
+
+
+class BlockCodec:
+    def __init__(self, dictionary: bytes = b"", level: Optional[int] = None) -> None:
+        """初始化使用预置字典的zlib编解码器
+
+        使用无头部的raw deflate流, 每条记录独立压缩, 可单独解码。
+        """
+        self.dictionary = dictionary
+        self.level = COMPRESSION_SETTINGS["level"] if level is None else level
+        self.dictionary_id = hashlib.sha256(dictionary).hexdigest()[:16]
+
+    def compress(self, raw: bytes) -> bytes:
+        """压缩一条记录"""
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(raw) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        """解压一条记录"""
+        if self.dictionary:
+            decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj(-15)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def encode_block(self, block: Dict[str, Any]) -> bytes:
+        """压缩单个区块"""
+        return self.compress(serialize_block(block))
+
+    def decode_block(self, data: bytes) -> Dict[str, Any]:
+        """解压单个区块"""
+        return json.loads(self.decompress(data))
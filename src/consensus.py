@@ -0,0 +1,179 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+import hashlib
+import os
+from pathlib import Path
+from .signatures import load_public_key
+from config.settings import BLOCKCHAIN_DATA_DIR, CONSENSUS_SETTINGS
+
+try:
+    from Crypto.PublicKey import ECC
+    from Crypto.Signature import eddsa
+except ImportError:
+    ECC = None
+
+
+def _require_crypto() -> None:
+    if ECC is None:
+        raise ValueError("pycryptodome is required for authority sealing")
+
+
+class ConsensusEngine(ABC):
+    """区块封装与校验策略
+
+    seal在区块加入链之前调用, 负责确定区块的最终哈希;
+    verify只校验区块自身, 前后哈希链接由Blockchain.is_chain_valid检查。
+    """
+    name = ""
+
+    @abstractmethod
+    def seal(self, block: Any, difficulty: int) -> None:
+        """封装区块"""
+
+    @abstractmethod
+    def verify(self, block: Any, difficulty: int) -> bool:
+        """校验已封装的区块"""
+
+    def params(self) -> Dict[str, Any]:
+        """记录在链元数据中的共识参数"""
+        return {}
+
+    def adopt(self, params: Dict[str, Any]) -> None:
+        """采用链元数据 (或主节点) 记录的共识参数, 与本节点不一致时抛出ValueError"""
+
+
+class ProofOfWork(ConsensusEngine):
+    """工作量证明: 搜索nonce使哈希满足难度前缀"""
+    name = "pow"
+
+    def seal(self, block: Any, difficulty: int) -> None:
+        block.mine_block(difficulty)
+
+    def verify(self, block: Any, difficulty: int) -> bool:
+        return block.hash == block.calculate_hash() and block.hash.startswith("0" * difficulty)
+
+
+class NoWork(ConsensusEngine):
+    """无工作量模式: 区块哈希即nonce为0时的哈希, 用于测试"""
+    name = "none"
+
+    def seal(self, block: Any, difficulty: int) -> None:
+        block.hash = block.calculate_hash()
+
+    def verify(self, block: Any, difficulty: int) -> bool:
+        return block.hash == block.calculate_hash()
+
+
+class AuthoritySeal(ConsensusEngine):
+    name = "authority"
+
+    def __init__(self, private_key: Any = None, public_key: Optional[str] = None,
+                 key_file: Optional[Path] = None) -> None:
+        """初始化授权签名模式
+
+        单一授权方用Ed25519私钥对区块哈希签名代替nonce搜索, 每个区块只需一次
+        哈希和一次签名。公钥 (十六进制DER) 记录在链元数据中, 校验只需公钥,
+        从节点等校验方无法伪造区块。未传入私钥时在首次封装时读取key_file;
+        链尚未记录授权公钥时生成新密钥, 否则密钥文件缺失时报错。
+        authority_id为公钥指纹, 记录在区块中以便识别签名方。
+        """
+        _require_crypto()
+        self.key_file = Path(key_file or BLOCKCHAIN_DATA_DIR / CONSENSUS_SETTINGS["authority_key_file"])
+        self.public_key: Optional[str] = None
+        self.authority_id: Optional[str] = None
+        self._signer: Any = None
+        if private_key is not None:
+            self._set_private_key(private_key)
+        elif public_key is not None:
+            self._set_public_key(public_key)
+
+    def _set_public_key(self, public_key: str) -> None:
+        self.public_key = public_key
+        self.authority_id = hashlib.sha256(bytes.fromhex(public_key)).hexdigest()[:16]
+
+    def _set_private_key(self, private_key: Any) -> None:
+        public_key = private_key.public_key().export_key(format="DER").hex()
+        if self.public_key is not None and public_key != self.public_key:
+            raise ValueError(f"Authority key in {self.key_file} does not match the chain's authority "
+                             f"{self.authority_id}")
+        self._set_public_key(public_key)
+        self._signer = eddsa.new(private_key, "rfc8032")
+
+    def params(self) -> Dict[str, Any]:
+        return {"public_key": self.public_key}
+
+    def adopt(self, params: Dict[str, Any]) -> None:
+        public_key = params.get("public_key")
+        if public_key is None or public_key == self.public_key:
+            return
+        if self.public_key is not None:
+            raise ValueError(f"Authority mismatch: chain is sealed by "
+                             f"{hashlib.sha256(bytes.fromhex(public_key)).hexdigest()[:16]}, "
+                             f"this node uses {self.authority_id}")
+        self._set_public_key(public_key)
+
+    def seal(self, block: Any, difficulty: int) -> None:
+        if self._signer is None:
+            try:
+                # 链已记录授权公钥时只读取已有密钥, 不生成新密钥
+                self._set_private_key(load_authority_key(self.key_file, create=self.public_key is None))
+            except FileNotFoundError:
+                raise ValueError(f"Authority key {self.key_file} not found; this node can only verify "
+                                 f"blocks sealed by {self.authority_id}")
+        block.hash = block.calculate_hash()
+        block.signature = self._signer.sign(block.hash.encode("utf-8")).hex()
+        block.signer = self.authority_id
+
+    def verify(self, block: Any, difficulty: int) -> bool:
+        signature = getattr(block, "signature", None)
+        if self.public_key is None or signature is None or getattr(block, "signer", None) != self.authority_id:
+            return False
+        if block.hash != block.calculate_hash():
+            return False
+        try:
+            eddsa.new(load_public_key(self.public_key), "rfc8032").verify(
+                block.hash.encode("utf-8"), bytes.fromhex(signature)
+            )
+            return True
+        except (TypeError, ValueError):
+            return False
+
+
+def generate_authority_key() -> Any:
+    """生成新的Ed25519授权私钥"""
+    _require_crypto()
+    return ECC.generate(curve="Ed25519")
+
+
+def load_authority_key(path: Optional[Path] = None, create: bool = False) -> Any:
+    """读取PEM授权私钥文件
+
+    文件不存在时, create为True则生成新密钥并保存 (仅所有者可读), 否则抛出FileNotFoundError。
+    """
+    _require_crypto()
+    path = Path(path or BLOCKCHAIN_DATA_DIR / CONSENSUS_SETTINGS["authority_key_file"])
+    if path.exists():
+        return ECC.import_key(path.read_text(encoding="utf-8"))
+    if not create:
+        raise FileNotFoundError(f"Authority key file not found: {path}")
+    key = generate_authority_key()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(key.export_key(format="PEM"))
+    return key
+
+
+def create_consensus(mode: Optional[str] = None, key: Any = None) -> ConsensusEngine:
+    """按配置创建共识模式: pow / authority / none
+
+    authority模式下key为授权私钥, 未指定时在首次封装时读取配置的密钥文件。
+    """
+    mode = mode or CONSENSUS_SETTINGS["mode"]
+    if mode == "pow":
+        return ProofOfWork()
+    if mode == "authority":
+        return AuthoritySeal(key)
+    if mode == "none":
+        return NoWork()
+    raise ValueError(f"Unsupported consensus mode: {mode}")
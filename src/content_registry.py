@@ -1,22 +1,42 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 import json
 from pathlib import Path
 from .blockchain import Blockchain
+from .indexes import OwnerIndex, TimeBound, block_matches
+from .metrics import metrics, instrumented
+from .signatures import TransactionSigner
 from .utils.helpers import (
-    calculate_hash,
     validate_metadata,
     validate_content,
     ValidationError,
     get_current_info
 )
-from config.settings import COPYRIGHT_SETTINGS, AI_MODEL_SETTINGS, get_current_timestamp, get_user_id
+from config.settings import (
+    COPYRIGHT_SETTINGS,
+    AI_MODEL_SETTINGS,
+    SIGNATURE_SETTINGS,
+    get_current_timestamp,
+    get_user_id
+)
 
 
 class ContentRegistry:
-    def __init__(self) -> None:
-        """初始化内容注册管理器"""
-        self.blockchain = Blockchain()
+    def __init__(self, blockchain: Optional[Blockchain] = None,
+                 signer: Optional[TransactionSigner] = None) -> None:
+        """初始化内容注册管理器, 启用签名时用signer为交易签名"""
+        self.blockchain = blockchain or Blockchain()
+        self.owner_index = self.blockchain.add_index(OwnerIndex())
+        if signer is None and SIGNATURE_SETTINGS["enabled"]:
+            signer = TransactionSigner.load()
+        self.signer = signer
+
+    def sign_transaction(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """为交易签名 (未配置签名器时原样返回)"""
+        if self.signer is None:
+            return data
+        return self.signer.sign(data)
 
+    @instrumented("register_content")
     def register_content(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """注册AI生成内容"""
         try:
@@ -31,7 +51,8 @@ class ContentRegistry:
             metadata.update({
                 "registration_time": get_current_timestamp(),
                 "user_id": get_user_id(),
-                "license": metadata.get("license", COPYRIGHT_SETTINGS["default_license"])
+                "license": metadata.get("license", COPYRIGHT_SETTINGS["default_license"]),
+                "content_size": len(content.encode("utf-8"))
             })
 
             # 验证元数据
@@ -39,7 +60,10 @@ class ContentRegistry:
                 raise ValidationError("Invalid metadata format")
 
             # 计算内容哈希
-            content_hash = calculate_hash(content)
+            hash_scheme = self.blockchain.hash_scheme
+            with metrics.timer("content_hash"):
+                content_digests = hash_scheme.content_digests(content)
+            content_hash = content_digests[hash_scheme.content]
 
             # 准备交易数据
             transaction_data = {
@@ -49,9 +73,12 @@ class ContentRegistry:
                 "user_id": get_user_id(),
                 "metadata": metadata
             }
+            if hash_scheme.migrating:
+                # 迁移期间同时记录旧算法的摘要
+                transaction_data["content_digests"] = content_digests
 
             # 添加到区块链
-            new_block = self.blockchain.add_block(transaction_data)
+            new_block = self.blockchain.add_block(self.sign_transaction(transaction_data))
 
             return {
                 "status": "success",
@@ -73,28 +100,56 @@ class ContentRegistry:
                 "message": f"Registration failed: {str(e)}"
             }
 
+    @instrumented("verify_content")
     def verify_content(self, content: str) -> Dict[str, Any]:
         """验证内容在区块链上的注册状态"""
         try:
             # 验证内容
             validate_content(content)
 
-            # 计算内容哈希
-            content_hash = calculate_hash(content)
-
-            # 搜索区块链
-            for block in self.blockchain.chain:
-                if (block.data.get("type") == "content_registration" and
-                        block.data.get("content_hash") == content_hash):
-                    return {
-                        "status": "success",
-                        "verified": True,
-                        "block_number": block.index,
-                        "block_hash": block.hash,
-                        "timestamp": block.data["timestamp"],
-                        "user_id": block.data["user_id"],
-                        "metadata": block.data["metadata"]
-                    }
+            # 计算内容哈希 (迁移期间包括旧算法的摘要)
+            with metrics.timer("content_hash"):
+                content_hashes = list(self.blockchain.hash_scheme.content_digests(content).values())
+
+        except ValidationError as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Verification failed: {str(e)}"
+            }
+        return self.verify_content_hash(*content_hashes)
+
+    def verify_content_hash(self, content_hash: str, *legacy_hashes: str) -> Dict[str, Any]:
+        """按内容哈希验证注册状态
+
+        迁移期间同时查找旧算法的哈希, 以各算法下最早的注册为准:
+        迁移后以新算法重新注册同一内容不能取代原注册者。
+        """
+        try:
+            # 通过内容索引查找区块
+            first = None
+            for candidate in (content_hash, *legacy_hashes):
+                for block in self.blockchain.find_blocks(candidate):
+                    if block.data.get("type") == "content_registration":
+                        if first is None or block.index < first[1].index:
+                            first = (candidate, block)
+                        break
+            if first is not None:
+                candidate, block = first
+                return {
+                    "status": "success",
+                    "verified": True,
+                    "content_hash": candidate,
+                    "block_number": block.index,
+                    "block_hash": block.hash,
+                    "timestamp": block.data["timestamp"],
+                    "user_id": block.data["user_id"],
+                    "metadata": block.data["metadata"]
+                }
 
             return {
                 "status": "success",
@@ -102,26 +157,29 @@ class ContentRegistry:
                 "message": "Content not found in blockchain"
             }
 
-        except ValidationError as e:
-            return {
-                "status": "error",
-                "message": str(e)
-            }
         except Exception as e:
             return {
                 "status": "error",
                 "message": f"Verification failed: {str(e)}"
             }
 
-    def get_chain_status(self) -> Dict[str, Any]:
-        """获取区块链状态"""
+    @instrumented("get_chain_status")
+    def get_chain_status(self, validate: bool = True) -> Dict[str, Any]:
+        """获取区块链状态, validate为False时跳过整链校验"""
         try:
+            snapshot = self.blockchain.snapshot()
             return {
                 "status": "success",
-                "length": len(self.blockchain.chain),
-                "latest_block": self.blockchain.get_latest_block().to_dict(),
-                "is_valid": self.blockchain.is_chain_valid(),
-                "difficulty": self.blockchain.difficulty
+                "length": snapshot.height,
+                "latest_block": snapshot.get_latest_block().to_dict(),
+                "is_valid": self.blockchain.is_chain_valid() if validate else None,
+                "difficulty": self.blockchain.difficulty,
+                "latest_difficulty": self.blockchain.block_difficulty(snapshot.get_latest_block()),
+                "retarget": self.blockchain.retarget.stats() if self.blockchain.retarget is not None else None,
+                "scheduler": self.blockchain.scheduler.stats(),
+                "consensus": self.blockchain.consensus.name,
+                "hashing": self.blockchain.hash_scheme.to_dict(),
+                "archive": self.blockchain.storage.archive_stats() if self.blockchain.storage.supports_pruning else None
             }
         except Exception as e:
             return {
@@ -129,11 +187,13 @@ class ContentRegistry:
                 "message": f"Failed to get chain status: {str(e)}"
             }
 
+    @instrumented("search_content")
     def search_content(self, query: Dict[str, Any]) -> Dict[str, Any]:
-        """搜索内容"""
+        """在固定高度的快照上搜索内容, 搜索期间追加的区块不影响结果"""
         results = []
         try:
-            for block in self.blockchain.chain:
+            snapshot = self.blockchain.snapshot()
+            for block in snapshot.iter_blocks():
                 if block.data.get("type") != "content_registration":
                     continue
 
@@ -158,6 +218,7 @@ class ContentRegistry:
                 "status": "success",
                 "results": results,
                 "count": len(results),
+                "snapshot_height": snapshot.height,
                 "query_time": get_current_timestamp()
             }
 
@@ -165,4 +226,127 @@ class ContentRegistry:
             return {
                 "status": "error",
                 "message": f"Search failed: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+    def iter_time_range(
+            self,
+            start: TimeBound,
+            end: TimeBound,
+            block_type: Optional[str] = None,
+            model: Optional[str] = None,
+            license_type: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """按时间范围流式遍历注册和许可证更新记录 (固定在开始遍历时的高度)"""
+        for block in self.blockchain.snapshot().iter_time_range(start, end):
+            data = block.data
+            if data.get("type") not in ("content_registration", "license_update"):
+                continue
+            if not block_matches(data, block_type, model, license_type):
+                continue
+            record = {
+                "block_number": block.index,
+                "type": data["type"],
+                "content_hash": data.get("content_hash"),
+                "timestamp": block.timestamp,
+                "user_id": data.get("user_id")
+            }
+            if data["type"] == "license_update":
+                record["previous_license"] = data.get("previous_license")
+                record["new_license"] = data.get("new_license")
+            else:
+                record["metadata"] = data.get("metadata", {})
+            yield record
+
+    @instrumented("query_time_range")
+    def query_time_range(
+            self,
+            start: TimeBound,
+            end: TimeBound,
+            block_type: Optional[str] = None,
+            model: Optional[str] = None,
+            license_type: Optional[str] = None,
+            limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """查询时间范围内的注册和许可证更新记录 (闭区间)"""
+        try:
+            results = []
+            for record in self.iter_time_range(start, end, block_type, model, license_type):
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    break
+
+            return {
+                "status": "success",
+                "results": results,
+                "count": len(results),
+                "query_time": get_current_timestamp()
+            }
+
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": f"Invalid time range: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Time range query failed: {str(e)}"
+            }
+
+    @instrumented("list_owner_contents")
+    def list_owner_contents(self, owner: Optional[str] = None, offset: int = 0,
+                            limit: int = 50) -> Dict[str, Any]:
+        """分页列出所有者持有的内容及当前许可证"""
+        try:
+            if offset < 0 or limit <= 0:
+                raise ValidationError("Invalid pagination parameters")
+            owner = owner or get_user_id()
+            # 所有者索引随加载构建; 分页和总数取自同一快照
+            owner_index = self.blockchain.snapshot(load=True).index(self.owner_index)
+            items = [
+                {
+                    "content_hash": content_hash,
+                    "license": license_type,
+                    "block_number": block_number
+                }
+                for content_hash, license_type, block_number in owner_index.page(owner, offset, limit)
+            ]
+
+            return {
+                "status": "success",
+                "owner": owner,
+                "total": owner_index.count(owner),
+                "offset": offset,
+                "limit": limit,
+                "items": items,
+                "query_time": get_current_timestamp()
+            }
+
+        except ValidationError as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to list owner contents: {str(e)}"
+            }
+
+    @instrumented("get_owner_counts")
+    def get_owner_counts(self) -> Dict[str, Any]:
+        """统计各所有者持有的内容数量"""
+        try:
+            counts = self.blockchain.snapshot(load=True).index(self.owner_index).counts()
+            return {
+                "status": "success",
+                "owners": counts,
+                "count": len(counts),
+                "query_time": get_current_timestamp()
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to get owner counts: {str(e)}"
+            }
@@ -1,11 +1,13 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional
+from .cache import ResultCache
 from .content_registry import ContentRegistry
+from .metrics import instrumented
 from .utils.helpers import (
-    calculate_hash,
     validate_content,
     ValidationError
 )
 from config.settings import (
+    CACHE_SETTINGS,
     COPYRIGHT_SETTINGS,
     AI_MODEL_SETTINGS,
     get_current_timestamp,
@@ -14,10 +16,39 @@ from config.settings import (
 
 
 class CopyrightProtection:
-    def __init__(self) -> None:
-        """初始化版权保护系统"""
-        self.registry = ContentRegistry()
+    def __init__(self, registry: Optional[ContentRegistry] = None,
+                 cache: Optional[ResultCache] = None) -> None:
+        """初始化版权保护系统, 启用CACHE_SETTINGS时所有权验证和历史查询结果经LRU缓存"""
+        self.registry = registry or ContentRegistry()
+        if cache is None and CACHE_SETTINGS["enabled"]:
+            cache = ResultCache()
+        self.cache = self.registry.blockchain.add_index(cache) if cache is not None else None
 
+    def _cached(self, operation: str, content_hashes: List[str],
+                compute: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        """先查结果缓存, 未命中时计算并缓存成功的结果 (以当前算法的内容哈希为键)
+
+        布隆过滤器判定一定未上链的内容直接计算, 不经缓存, 也不加载链。
+        """
+        blockchain = self.registry.blockchain
+        if not any(blockchain.might_contain(h) for h in content_hashes):
+            return compute(*content_hashes)
+        cache = self.cache
+        content_hash = content_hashes[0]
+        result = cache.get(operation, content_hash)
+        if result is None:
+            # 非随机访问存储上取高度会加载整链, 查询可能上链的内容本就需要加载;
+            # 在取令牌前加载, 避免加载时清空缓存使本次结果无法写入
+            token = cache.token(blockchain.height)
+            result = compute(*content_hashes)
+            if result.get("status") == "success":
+                cache.put(token, operation, content_hash, result)
+                result = dict(result)
+        if "query_time" in result:
+            result["query_time"] = get_current_timestamp()
+        return result
+
+    @instrumented("protect_ai_content")
     def protect_ai_content(
             self,
             content: str,
@@ -70,24 +101,54 @@ class CopyrightProtection:
                 "message": f"Protection failed: {str(e)}"
             }
 
+    @instrumented("verify_ownership")
     def verify_ownership(self, content: str) -> Dict[str, Any]:
         """验证内容所有权"""
-        return self.registry.verify_content(content)
+        if self.cache is None:
+            return self.registry.verify_content(content)
+        try:
+            validate_content(content)
+        except ValidationError:
+            return self.registry.verify_content(content)
+        return self._cached("verify", self._content_hashes(content), self.registry.verify_content_hash)
 
+    @instrumented("get_content_history")
     def get_content_history(self, content: str) -> Dict[str, Any]:
         """获取内容的历史记录"""
         try:
-            content_hash = calculate_hash(content)
+            content_hashes = self._content_hashes(content)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to get content history: {str(e)}"
+            }
+        if self.cache is None:
+            return self.content_hash_history(*content_hashes)
+        return self._cached("history", content_hashes, self.content_hash_history)
+
+    def _content_hashes(self, content: str) -> List[str]:
+        """内容在当前算法及迁移期间各旧算法下的哈希"""
+        return list(self.registry.blockchain.hash_scheme.content_digests(content).values())
+
+    def content_hash_history(self, content_hash: str, *legacy_hashes: str) -> Dict[str, Any]:
+        """按内容哈希获取历史记录, 迁移期间合并旧算法哈希下的记录"""
+        try:
             history = []
 
-            for block in self.registry.blockchain.chain:
-                if block.data.get("content_hash") == content_hash:
-                    history.append({
-                        "block_number": block.index,
-                        "timestamp": block.timestamp,
-                        "action": block.data.get("type", "unknown"),
-                        "metadata": block.data.get("metadata", {})
-                    })
+            blockchain = self.registry.blockchain
+            blocks = blockchain.find_blocks(content_hash)
+            if legacy_hashes:
+                for legacy_hash in legacy_hashes:
+                    blocks.extend(blockchain.find_blocks(legacy_hash))
+                # 同一区块可能同时记录新旧摘要
+                blocks = sorted({block.index: block for block in blocks}.values(), key=lambda b: b.index)
+            for block in blocks:
+                history.append({
+                    "block_number": block.index,
+                    "timestamp": block.timestamp,
+                    "action": block.data.get("type", "unknown"),
+                    "metadata": block.data.get("metadata", {})
+                })
 
             return {
                 "status": "success",
@@ -102,6 +163,20 @@ class CopyrightProtection:
                 "message": f"Failed to get content history: {str(e)}"
             }
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """查询结果缓存的命中率与容量统计"""
+        if self.cache is None:
+            return {
+                "status": "success",
+                "enabled": False
+            }
+        return {
+            "status": "success",
+            "enabled": True,
+            **self.cache.stats()
+        }
+
+    @instrumented("update_license")
     def update_license(self, content: str, new_license: str) -> Dict[str, Any]:
         """更新内容的许可证类型"""
         try:
@@ -117,19 +192,21 @@ class CopyrightProtection:
             if verify_result["user_id"] != get_user_id():
                 raise ValidationError("Not authorized to update license")
 
-            # 准备更新数据
-            content_hash = calculate_hash(content)
+            # 准备更新数据: 沿用注册时的内容哈希, 迁移期间同时记录各算法的摘要
+            hash_scheme = self.registry.blockchain.hash_scheme
             update_data = {
                 "type": "license_update",
-                "content_hash": content_hash,
+                "content_hash": verify_result["content_hash"],
                 "previous_license": verify_result["metadata"]["license"],
                 "new_license": new_license,
                 "timestamp": get_current_timestamp(),
                 "user_id": get_user_id()
             }
+            if hash_scheme.migrating:
+                update_data["content_digests"] = hash_scheme.content_digests(content)
 
             # 添加到区块链
-            new_block = self.registry.blockchain.add_block(update_data)
+            new_block = self.registry.blockchain.add_block(self.registry.sign_transaction(update_data))
 
             return {
                 "status": "success",
@@ -151,16 +228,20 @@ class CopyrightProtection:
                 "message": f"License update failed: {str(e)}"
             }
 
+    @instrumented("get_statistics")
     def get_statistics(self) -> Dict[str, Any]:
         """获取版权保护系统的统计信息"""
         try:
-            total_blocks = len(self.registry.blockchain.chain)
+            total_blocks = 0
             registrations = 0
             updates = 0
             models_usage = {}
             licenses_usage = {}
 
-            for block in self.registry.blockchain.chain:
+            # 在固定高度的快照上统计, 各项计数相互一致
+            snapshot = self.registry.blockchain.snapshot()
+            for block in snapshot.iter_blocks():
+                total_blocks += 1
                 if block.data.get("type") == "content_registration":
                     registrations += 1
                     metadata = block.data.get("metadata", {})
@@ -185,6 +266,7 @@ class CopyrightProtection:
                 "total_updates": updates,
                 "models_usage": models_usage,
                 "licenses_usage": licenses_usage,
+                "snapshot_height": snapshot.height,
                 "query_time": get_current_timestamp()
             }
 
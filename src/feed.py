@@ -0,0 +1,242 @@
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional, Tuple
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from .utils.helpers import load_json_file
+from config.settings import FEED_SETTINGS, get_current_timestamp
+
+if TYPE_CHECKING:
+    from .blockchain import Blockchain
+
+CONSUMER_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class BlockEvent:
+    """区块事件基类"""
+    name = ""
+
+    def __init__(self, block_number: int, block_hash: str, content_hash: str, timestamp: str) -> None:
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.content_hash = content_hash
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {"event": self.name, **vars(self)}
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"{self.name}({self.block_number}, {self.content_hash})"
+
+
+class ContentRegistered(BlockEvent):
+    """对应合约的ContentRegistered事件"""
+    name = "ContentRegistered"
+
+    def __init__(self, block_number: int, block_hash: str, content_hash: str, owner: str,
+                 license: Optional[str], ai_model: Optional[str], timestamp: str) -> None:
+        super().__init__(block_number, block_hash, content_hash, timestamp)
+        self.owner = owner
+        self.license = license
+        self.ai_model = ai_model
+
+
+class LicenseUpdated(BlockEvent):
+    """对应合约的LicenseUpdated事件"""
+    name = "LicenseUpdated"
+
+    def __init__(self, block_number: int, block_hash: str, content_hash: str, owner: str,
+                 old_license: Optional[str], new_license: Optional[str], timestamp: str) -> None:
+        super().__init__(block_number, block_hash, content_hash, timestamp)
+        self.owner = owner
+        self.old_license = old_license
+        self.new_license = new_license
+
+
+def block_event(block: Any) -> Optional[BlockEvent]:
+    """将区块转换为事件, 不对应合约事件的区块 (如创世区块) 返回None"""
+    data = block.data
+    block_type = data.get("type")
+    if block_type == "content_registration":
+        metadata = data.get("metadata", {})
+        return ContentRegistered(
+            block.index, block.hash, data["content_hash"], data.get("user_id"),
+            metadata.get("license"), metadata.get("ai_info", {}).get("model"), block.timestamp
+        )
+    if block_type == "license_update":
+        return LicenseUpdated(
+            block.index, block.hash, data["content_hash"], data.get("user_id"),
+            data.get("previous_license"), data.get("new_license"), block.timestamp
+        )
+    return None
+
+
+class ConsumerOffsets:
+    def __init__(self, directory: Path) -> None:
+        """初始化消费位置存储, 每个消费者一个JSON文件"""
+        self.directory = Path(directory)
+
+    def _path(self, consumer: str) -> Path:
+        if not CONSUMER_NAME.match(consumer):
+            raise ValueError(f"Invalid consumer name: {consumer}")
+        return self.directory / f"{consumer}.json"
+
+    def get(self, consumer: str) -> Optional[int]:
+        """读取消费者下一个待处理的区块高度"""
+        return load_json_file(self._path(consumer)).get("position")
+
+    def commit(self, consumer: str, position: int) -> None:
+        """原子写入消费位置"""
+        path = self._path(consumer)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"position": position, "updated": get_current_timestamp()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def delete(self, consumer: str) -> None:
+        """删除消费位置"""
+        path = self._path(consumer)
+        if path.exists():
+            path.unlink()
+
+
+_END = object()
+
+
+class Subscription:
+    def __init__(self, blockchain: "Blockchain", start: Optional[int] = None,
+                 consumer: Optional[str] = None, offsets: Optional[ConsumerOffsets] = None,
+                 follow: bool = True, timeout: Optional[float] = None,
+                 auto_commit: bool = True) -> None:
+        """初始化区块事件订阅
+
+        从start高度开始按顺序产出事件; 指定consumer且未给出start时从已保存的
+        消费位置继续。follow为True时读到链尾后等待新区块, timeout为等待新区块
+        的最长秒数。position为已处理完毕的下一个区块高度: 取下一个事件即视为
+        上一个事件已处理, auto_commit时按commit_interval批量保存, 保证至少一次投递。
+        """
+        self.blockchain = blockchain
+        self.consumer = consumer
+        self.offsets = offsets
+        if consumer is not None and offsets is None:
+            raise ValueError("Consumer offsets require an offset store")
+        if start is None:
+            start = (offsets.get(consumer) if consumer is not None else None) or 0
+        if start < 0:
+            raise ValueError("Start height must be non-negative")
+        self.position = start
+        self.follow = follow
+        self.timeout = timeout
+        self.auto_commit = auto_commit and consumer is not None
+        self.poll_interval = FEED_SETTINGS["poll_interval"]
+        self.commit_interval = FEED_SETTINGS["commit_interval"]
+        self.fetch_size = FEED_SETTINGS["fetch_size"]
+        self._read_position = start
+        self._pending: Deque[Tuple[int, BlockEvent]] = deque()
+        self._delivered: Optional[int] = None
+        self._committed = offsets.get(consumer) if consumer is not None else None
+        self._commit_lock = threading.Lock()
+        self._closed = False
+
+    def __iter__(self) -> "Subscription":
+        return self
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __next__(self) -> BlockEvent:
+        self._acknowledge()
+        while not self._pending:
+            # 已读区块中没有待处理事件, 消费位置随读取位置前进
+            self.position = self._read_position
+            if self._closed:
+                raise StopIteration
+            if self._fetch():
+                continue
+            if self.auto_commit:
+                self.commit()
+            if not self.follow or not self._wait():
+                raise StopIteration
+        position, event = self._pending.popleft()
+        self._delivered = position
+        return event
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> BlockEvent:
+        event = await asyncio.to_thread(self._next_or_end)
+        if event is _END:
+            raise StopAsyncIteration
+        return event
+
+    def _next_or_end(self) -> Any:
+        # StopIteration不能跨线程抛入协程, 以哨兵值代替
+        try:
+            return next(self)
+        except StopIteration:
+            return _END
+
+    def _acknowledge(self) -> None:
+        """确认上一个已投递的事件已处理"""
+        if self._delivered is None:
+            return
+        self.position = self._delivered
+        self._delivered = None
+        if self.auto_commit and self.position - (self._committed or 0) >= self.commit_interval:
+            self.commit()
+
+    def _fetch(self) -> bool:
+        """读取至多fetch_size个新区块, 返回是否读到区块"""
+        read = 0
+        for block in self.blockchain.blocks_from(self._read_position):
+            event = block_event(block)
+            if event is not None:
+                self._pending.append((block.index + 1, event))
+            self._read_position = block.index + 1
+            read += 1
+            if read >= self.fetch_size:
+                break
+        return read > 0
+
+    def _wait(self) -> bool:
+        """等待新区块, 超时或关闭时返回False"""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._closed:
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+            if self.blockchain.wait_for_block(self._read_position, wait):
+                return True
+        return False
+
+    def commit(self) -> None:
+        """保存消费位置"""
+        with self._commit_lock:
+            position = self.position
+            if self.consumer is None or position == self._committed:
+                return
+            self.offsets.commit(self.consumer, position)
+            self._committed = position
+
+    def close(self) -> None:
+        """停止订阅 (可在其他线程调用), 已确认的位置自动保存"""
+        self._closed = True
+        if self.auto_commit:
+            self.commit()
@@ -0,0 +1,63 @@
+from typing import Any, Dict, Optional, Sequence
+from .utils.helpers import DEFAULT_HASH_ALGORITHM, HASH_ALGORITHMS, calculate_hash
+from config.settings import HASH_SETTINGS
+
+
+class HashScheme:
+    def __init__(self, content: str = DEFAULT_HASH_ALGORITHM, block: str = DEFAULT_HASH_ALGORITHM,
+                 legacy: Sequence[str] = ()) -> None:
+        """初始化链的哈希算法配置
+
+        content为注册内容使用的算法, block为区块哈希算法; 区块哈希串联整条链,
+        链创建后不可更改。legacy为内容哈希迁移期间仍需查询的旧算法: 迁移期间
+        新交易同时记录各算法的摘要, 以旧算法注册的内容仍可按旧摘要验证。
+        """
+        for algorithm in (content, block, *legacy):
+            if algorithm not in HASH_ALGORITHMS:
+                raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+        self.content = content
+        self.block = block
+        self.legacy = tuple(a for a in dict.fromkeys(legacy) if a != content)
+
+    @classmethod
+    def from_settings(cls) -> "HashScheme":
+        """按HASH_SETTINGS创建 (用于新建的链)"""
+        return cls(HASH_SETTINGS["content"], HASH_SETTINGS["block"])
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "HashScheme":
+        """从链元数据恢复; 没有记录时为引入可配置算法之前的SHA256链"""
+        if not data:
+            return cls()
+        return cls(data["content"], data["block"], data.get("legacy", ()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为链元数据"""
+        return {
+            "content": self.content,
+            "block": self.block,
+            "legacy": list(self.legacy)
+        }
+
+    @property
+    def migrating(self) -> bool:
+        """是否处于内容哈希迁移期"""
+        return bool(self.legacy)
+
+    def migrate(self, algorithm: str) -> "HashScheme":
+        """切换内容哈希算法, 当前算法转为迁移期间仍需查询的旧算法"""
+        return HashScheme(algorithm, self.block, (self.content, *self.legacy))
+
+    def content_hash(self, content: str) -> str:
+        """按当前算法计算内容哈希"""
+        return calculate_hash(content, self.content)
+
+    def content_digests(self, content: str) -> Dict[str, str]:
+        """当前算法及迁移期间各旧算法的内容摘要 (当前算法在前)"""
+        return {algorithm: calculate_hash(content, algorithm) for algorithm in (self.content, *self.legacy)}
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, HashScheme) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash((self.content, self.block, self.legacy))
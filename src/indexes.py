@@ -0,0 +1,186 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import bisect
+import copy
+from config.settings import TIMESTAMP_FORMAT
+
+TimeBound = Union[str, datetime]
+
+
+class BlockIndex:
+    """区块二级索引: 加载链时整体构建, 追加区块时增量更新
+
+    读者通过snapshot取得固定在某一高度的只读视图。视图与索引共享底层结构,
+    写线程只追加或整体替换 (写时复制) 这些结构, 视图读取时忽略高度不小于
+    快照高度的区块, 因此读写双方都无需加锁。
+    """
+    # 快照视图的高度上限, None表示读取最新状态
+    _height: Optional[int] = None
+    # 为False的索引不依赖完整的链, 未加载链时直接追加的区块也会通知
+    requires_full_chain = True
+
+    def rebuild(self, blocks: Iterable[Any]) -> None:
+        """按区块序列重建索引"""
+        raise NotImplementedError
+
+    def add(self, block: Any) -> None:
+        """追加单个区块"""
+        raise NotImplementedError
+
+    def snapshot(self, height: int) -> "BlockIndex":
+        """返回只包含高度小于height的区块的只读视图"""
+        view = copy.copy(self)
+        view._height = height
+        return view
+
+    def _visible(self, block_number: int) -> bool:
+        """区块是否在当前视图内"""
+        return self._height is None or block_number < self._height
+
+
+def normalize_time(value: TimeBound) -> str:
+    """将时间边界统一为TIMESTAMP_FORMAT字符串
+
+    该格式定长且按字典序即时间序, 索引直接比较字符串而无需解析。
+    """
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return datetime.strptime(value, TIMESTAMP_FORMAT).strftime(TIMESTAMP_FORMAT)
+
+
+class TimeIndex(BlockIndex):
+    def __init__(self) -> None:
+        """初始化按区块时间戳排序的索引
+
+        时间戳列表和高度列表作为一个元组整体替换: 时间戳单调时直接追加,
+        乱序插入时复制出新列表再替换, 已取得旧元组的读者不受影响。
+        """
+        self._state: Tuple[List[str], List[int]] = ([], [])
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+    def rebuild(self, blocks: Iterable[Any]) -> None:
+        pairs = sorted((block.timestamp, block.index) for block in blocks)
+        self._state = ([timestamp for timestamp, _ in pairs], [height for _, height in pairs])
+
+    def add(self, block: Any) -> None:
+        timestamps, heights = self._state
+        if not timestamps or timestamps[-1] <= block.timestamp:
+            # 时间戳单调递增时直接追加
+            timestamps.append(block.timestamp)
+            heights.append(block.index)
+            return
+        position = bisect.bisect_right(timestamps, block.timestamp)
+        self._state = (
+            timestamps[:position] + [block.timestamp] + timestamps[position:],
+            heights[:position] + [block.index] + heights[position:]
+        )
+
+    def heights(self, start: TimeBound, end: TimeBound) -> Iterator[int]:
+        """二分定位后连续扫描闭区间[start, end]内的区块高度"""
+        start_key = normalize_time(start)
+        end_key = normalize_time(end)
+        timestamps, heights = self._state
+        low = bisect.bisect_left(timestamps, start_key)
+        high = bisect.bisect_right(timestamps, end_key)
+        for position in range(low, min(high, len(heights))):
+            height = heights[position]
+            if self._visible(height):
+                yield height
+
+
+class OwnerIndex(BlockIndex):
+    def __init__(self) -> None:
+        """初始化所有者索引, 对应合约中的userContents
+
+        每个所有者按注册顺序保存内容哈希列表, 分页只需切片;
+        内容哈希另映射到 (所有者, 注册区块号, 许可证版本列表)。
+        许可证更新只向版本列表追加 (区块号, 许可证), 快照按高度取对应版本。
+        与合约一致, 同一内容以首次注册为准。
+        """
+        self._owner_contents: Dict[str, List[str]] = {}
+        self._items: Dict[str, Tuple[str, int, List[Tuple[int, Optional[str]]]]] = {}
+
+    def rebuild(self, blocks: Iterable[Any]) -> None:
+        rebuilt = OwnerIndex()
+        for block in blocks:
+            rebuilt.add(block)
+        # 先替换条目表, 保证读者从新列表取到的哈希都能查到
+        self._items = rebuilt._items
+        self._owner_contents = rebuilt._owner_contents
+
+    def add(self, block: Any) -> None:
+        data = block.data
+        block_type = data.get("type")
+        content_hash = data.get("content_hash")
+        if block_type == "content_registration":
+            if content_hash in self._items:
+                return
+            owner = data.get("user_id")
+            license_type = data.get("metadata", {}).get("license")
+            self._items[content_hash] = (owner, block.index, [(block.index, license_type)])
+            self._owner_contents.setdefault(owner, []).append(content_hash)
+        elif block_type == "license_update":
+            item = self._items.get(content_hash)
+            if item is not None:
+                item[2].append((block.index, data.get("new_license")))
+
+    def _license(self, versions: List[Tuple[int, Optional[str]]]) -> Optional[str]:
+        """视图内最新的许可证版本"""
+        for block_number, license_type in reversed(versions):
+            if self._visible(block_number):
+                return license_type
+        return None
+
+    def _visible_end(self, contents: List[str]) -> int:
+        """视图内可见部分的长度 (注册顺序即区块顺序, 可见部分为前缀)"""
+        if self._height is None:
+            return len(contents)
+        items = self._items
+        return bisect.bisect_left(contents, self._height, key=lambda content_hash: items[content_hash][1])
+
+    def get(self, content_hash: str) -> Optional[Tuple[str, Optional[str], int]]:
+        """查询内容的所有者、当前许可证和注册区块号"""
+        item = self._items.get(content_hash)
+        if item is None or not self._visible(item[1]):
+            return None
+        return item[0], self._license(item[2]), item[1]
+
+    def count(self, owner: str) -> int:
+        """所有者持有的内容数量"""
+        return self._visible_end(self._owner_contents.get(owner, []))
+
+    def counts(self) -> Dict[str, int]:
+        """各所有者持有的内容数量"""
+        counts = {owner: self.count(owner) for owner in list(self._owner_contents)}
+        return {owner: count for owner, count in counts.items() if count}
+
+    def page(self, owner: str, offset: int = 0, limit: int = 50) -> List[Tuple[str, Optional[str], int]]:
+        """分页列出所有者的内容: (内容哈希, 当前许可证, 注册区块号)"""
+        contents = self._owner_contents.get(owner, [])
+        end = min(offset + limit, self._visible_end(contents))
+        items = []
+        for content_hash in contents[offset:end]:
+            _, block_number, versions = self._items[content_hash]
+            items.append((content_hash, self._license(versions), block_number))
+        return items
+
+
+def block_matches(data: dict, block_type: Optional[str] = None, model: Optional[str] = None,
+                  license_type: Optional[str] = None) -> bool:
+    """按交易类型、AI模型和许可证过滤区块数据
+
+    模型只记录在注册交易中; 许可证对注册交易取metadata.license,
+    对许可证更新交易取new_license。
+    """
+    if block_type is not None and data.get("type") != block_type:
+        return False
+    metadata = data.get("metadata", {})
+    if model is not None and metadata.get("ai_info", {}).get("model") != model:
+        return False
+    if license_type is not None:
+        current = data.get("new_license") if data.get("type") == "license_update" else metadata.get("license")
+        if current != license_type:
+            return False
+    return True
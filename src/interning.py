@@ -0,0 +1,87 @@
+from typing import Any, Dict, Iterable, Optional, Set
+import json
+import sys
+from config.settings import INTERN_SETTINGS
+
+
+class FrozenDict(dict):
+    """只读字典, 在多个区块之间共享
+
+    继承dict, json序列化结果与普通字典相同, 区块哈希不受影响。
+    """
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("Shared block metadata is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self) -> Any:
+        return (FrozenDict, (dict(self),))
+
+
+class Interner:
+    def __init__(self, max_length: Optional[int] = None, shared_keys: Optional[Iterable[str]] = None) -> None:
+        """初始化区块数据去重器
+
+        不超过max_length的字符串 (键名、许可证、模型、用户ID、时间戳等) 使用
+        sys.intern驻留; 哈希等较长的字符串通常各不相同, 保持原样。
+        shared_keys下的字典按内容 (含键顺序) 去重为共享的只读FrozenDict。
+        """
+        self.max_length = max_length or INTERN_SETTINGS["max_length"]
+        self.shared_keys: Set[str] = set(shared_keys if shared_keys is not None else INTERN_SETTINGS["shared_keys"])
+        self._dicts: Dict[str, FrozenDict] = {}
+
+    def __len__(self) -> int:
+        return len(self._dicts)
+
+    def intern(self, value: Any, key: Optional[str] = None) -> Any:
+        """返回与value内容相同、重复部分共享的对象"""
+        if isinstance(value, str):
+            return sys.intern(value) if len(value) <= self.max_length else value
+        if isinstance(value, dict):
+            items = {
+                (sys.intern(k) if isinstance(k, str) else k): self.intern(v, k)
+                for k, v in value.items()
+            }
+            if key in self.shared_keys:
+                return self.share(items)
+            return items
+        if isinstance(value, list):
+            return [self.intern(item) for item in value]
+        return value
+
+    def share(self, mapping: Dict[str, Any]) -> FrozenDict:
+        """返回与mapping内容相同的共享只读字典"""
+        token = json.dumps(mapping, ensure_ascii=False)
+        shared = self._dicts.get(token)
+        if shared is None:
+            shared = self._dicts.setdefault(token, FrozenDict(mapping))
+        return shared
+
+    def intern_block(self, block: Any, previous: Optional[Any] = None) -> Any:
+        """就地去重区块字段, previous_hash与前一区块哈希相同时复用同一字符串"""
+        block.timestamp = self.intern(block.timestamp)
+        block.data = self.intern(block.data)
+        if previous is not None and block.previous_hash == previous.hash:
+            block.previous_hash = previous.hash
+        return block
+
+
+def deep_size(value: Any, seen: Optional[Set[int]] = None) -> int:
+    """递归统计对象占用的字节数, 同一对象只计一次"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += deep_size(key, seen) + deep_size(item, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += deep_size(item, seen)
+    elif hasattr(value, "__dict__"):
+        size += deep_size(vars(value), seen)
+    return size
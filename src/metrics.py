@@ -0,0 +1,291 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import bisect
+import functools
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from config.settings import METRICS_SETTINGS
+
+# 延迟直方图的桶上界 (秒)
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+# 挖矿尝试次数直方图的桶上界
+MINING_ATTEMPT_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# 每次落盘合并的区块数
+SEAL_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        """初始化直方图"""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """按Prometheus约定返回累计桶计数"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((format_value(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_depth: int = 32) -> None:
+        """初始化采样分析器, 只对正处于热点路径中的线程采样"""
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._active: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enter(self, operation: str) -> Optional[str]:
+        """标记当前线程进入热点路径, 返回外层操作名"""
+        ident = threading.get_ident()
+        outer = self._active.get(ident)
+        self._active[ident] = operation
+        return outer
+
+    def exit(self, outer: Optional[str]) -> None:
+        """标记当前线程离开热点路径"""
+        ident = threading.get_ident()
+        if outer is None:
+            self._active.pop(ident, None)
+        else:
+            self._active[ident] = outer
+
+    def start(self) -> None:
+        """启动采样线程"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止采样线程"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        """采样循环"""
+        while not self._stop.wait(self.interval):
+            active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, operation in active.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame, limit=self.max_depth)
+                names = [f"{Path(entry.filename).name}:{entry.name}" for entry in stack]
+                self.samples[";".join([operation] + names)] += 1
+
+    def collapsed(self) -> str:
+        """以折叠栈格式输出采样结果, 可直接用于生成火焰图"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def format_value(value: float) -> str:
+    """格式化Prometheus数值"""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """格式化Prometheus标签"""
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = []
+    for key, value in items:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Timer:
+    def __init__(self, registry: "MetricsRegistry", operation: str) -> None:
+        """初始化操作计时器"""
+        self.registry = registry
+        self.operation = operation
+        self.started = 0.0
+        self.outer: Optional[str] = None
+        self.failed = False
+
+    def __enter__(self) -> "_Timer":
+        profiler = self.registry.profiler
+        if profiler is not None:
+            self.outer = profiler.enter(self.operation)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        profiler = self.registry.profiler
+        if profiler is not None:
+            profiler.exit(self.outer)
+        self.registry.record(self.operation, elapsed, failed=self.failed or exc_type is not None)
+
+
+class _NullTimer:
+    failed = False
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    PREFIX = "ai_copyright"
+
+    def __init__(self) -> None:
+        """初始化指标注册表"""
+        self.enabled = False
+        self.profiler: Optional[SamplingProfiler] = None
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+
+    def enable(self, profile: bool = False, interval: Optional[float] = None) -> None:
+        """开启指标采集, 可选同时开启采样分析"""
+        self.enabled = True
+        if profile and self.profiler is None:
+            self.profiler = SamplingProfiler(interval or METRICS_SETTINGS["profile_interval"])
+            self.profiler.start()
+
+    def disable(self) -> None:
+        """关闭指标采集和采样分析"""
+        self.enabled = False
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+
+    def reset(self) -> None:
+        """清空已采集的指标"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """计数器加值"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                **labels: str) -> None:
+        """向直方图记录观测值"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def record(self, operation: str, elapsed: float, failed: bool = False) -> None:
+        """记录一次操作的耗时和结果"""
+        self.inc("operations_total", operation=operation)
+        self.observe("operation_seconds", elapsed, operation=operation)
+        if failed:
+            self.inc("operation_errors_total", operation=operation)
+
+    def timer(self, operation: str) -> Any:
+        """对代码块计时; 未开启时返回空操作的上下文管理器"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, operation)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取进程内指标快照"""
+        with self._lock:
+            counters: Dict[str, Dict[str, float]] = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[format_labels(labels) or "total"] = value
+            histograms: Dict[str, Dict[str, Any]] = {}
+            for (name, labels), histogram in self._histograms.items():
+                histograms.setdefault(name, {})[format_labels(labels) or "total"] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": dict(histogram.cumulative())
+                }
+        snapshot = {
+            "enabled": self.enabled,
+            "counters": counters,
+            "histograms": histograms
+        }
+        if self.profiler is not None:
+            snapshot["profile"] = dict(self.profiler.samples.most_common(50))
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """以Prometheus文本格式导出指标"""
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self._counters}):
+                full_name = f"{self.PREFIX}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for (n, labels), value in sorted(self._counters.items()):
+                    if n == name:
+                        lines.append(f"{full_name}{format_labels(labels)} {format_value(value)}")
+            for name in sorted({n for n, _ in self._histograms}):
+                full_name = f"{self.PREFIX}_{name}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for (n, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                    if n != name:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{full_name}_bucket{format_labels(labels, ('le', bound))} {count}")
+                    lines.append(f"{full_name}_sum{format_labels(labels)} {format_value(histogram.sum)}")
+                    lines.append(f"{full_name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+if METRICS_SETTINGS["enabled"]:
+    metrics.enable(profile=METRICS_SETTINGS["profiling"])
+
+
+def instrumented(operation: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """为函数添加计时埋点; 返回 status=error 的结果字典同样计为失败"""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            with _Timer(metrics, operation) as timer:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict) and result.get("status") == "error":
+                    timer.failed = True
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,357 @@
+"""主从复制
+
+从节点通过TCP或Unix套接字连接主节点, 请求其当前高度之后的区块,
+逐块增量校验后写入自己的存储, 之后持续接收主节点新追加的区块。
+
+协议为按行分隔的JSON消息:
+    从节点 -> 主节点  {"type": "subscribe", "height": n, "last_hash": h}
+    主节点 -> 从节点  {"type": "hello", "height": H, "consensus": ..., "consensus_params": {...},
+                       "difficulty": d, "hashing": {...}, "retarget": {...}}
+                      {"type": "blocks", "blocks": [...]}
+                      {"type": "heartbeat", "height": H}
+                      {"type": "error", "message": ...}
+
+用法 (两个进程):
+    python -m src.replication leader --backend sqlite --data leader.db --address unix:/tmp/chain.sock
+    python -m src.replication follower --backend sqlite --data replica.db --address unix:/tmp/chain.sock
+"""
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from .blockchain import Block, Blockchain
+from .hashing import HashScheme
+from .sealing import DifficultyRetarget
+from config.settings import REPLICATION_SETTINGS
+
+Address = Union[Tuple[str, int], str]
+
+
+class ReplicationError(Exception):
+    """复制错误"""
+    pass
+
+
+def parse_address(text: str) -> Address:
+    """解析地址: unix:/路径 或 主机:端口"""
+    if text.startswith("unix:"):
+        return text[len("unix:"):]
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def format_address(address: Address) -> str:
+    """地址转换为parse_address可解析的字符串"""
+    if isinstance(address, str):
+        return f"unix:{address}"
+    return f"{address[0]}:{address[1]}"
+
+
+def send_message(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """发送一条消息"""
+    stream.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """读取一条消息, 连接关闭时返回None"""
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class _ReplicationHandler(socketserver.StreamRequestHandler):
+    """为单个从节点推送区块"""
+
+    def handle(self) -> None:
+        leader: "ReplicationLeader" = self.server.leader
+        blockchain = leader.blockchain
+        request = read_message(self.rfile)
+        if request is None or request.get("type") != "subscribe":
+            return
+        position = request.get("height", 0)
+        try:
+            self._check_fork(blockchain, position, request.get("last_hash"))
+        except ReplicationError as e:
+            send_message(self.wfile, {"type": "error", "message": str(e)})
+            return
+
+        send_message(self.wfile, {
+            "type": "hello",
+            "height": blockchain.height,
+            "consensus": blockchain.consensus.name,
+            "consensus_params": blockchain.consensus.params(),
+            "difficulty": blockchain.difficulty,
+            "hashing": blockchain.hash_scheme.to_dict(),
+            "retarget": blockchain.retarget.to_dict() if blockchain.retarget is not None else None
+        })
+        try:
+            while not leader.stopping:
+                batch = list(islice(blockchain.blocks_from(position), leader.batch_size))
+                if batch:
+                    send_message(self.wfile, {"type": "blocks", "blocks": [block.to_dict() for block in batch]})
+                    position = batch[-1].index + 1
+                elif not blockchain.wait_for_block(position, leader.heartbeat_interval):
+                    send_message(self.wfile, {"type": "heartbeat", "height": blockchain.height})
+        except (BrokenPipeError, ConnectionResetError):
+            # 从节点断开连接
+            return
+
+    @staticmethod
+    def _check_fork(blockchain: Blockchain, height: int, last_hash: Optional[str]) -> None:
+        """确认从节点的链是主节点链的前缀"""
+        if height > blockchain.height:
+            raise ReplicationError(f"Follower height {height} is ahead of leader height {blockchain.height}")
+        if height == 0:
+            return
+        previous = next(blockchain.blocks_from(height - 1))
+        if previous.hash != last_hash:
+            raise ReplicationError(f"Follower chain diverges from leader at height {height - 1}")
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class ReplicationLeader:
+    def __init__(self, blockchain: Blockchain, address: Address) -> None:
+        """初始化主节点, address为 (主机, 端口) 或Unix套接字路径; 端口为0时自动分配"""
+        self.blockchain = blockchain
+        self.batch_size = REPLICATION_SETTINGS["batch_size"]
+        self.heartbeat_interval = REPLICATION_SETTINGS["heartbeat_interval"]
+        self.stopping = False
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixServer(address, _ReplicationHandler)
+        else:
+            self._server = _TCPServer(address, _ReplicationHandler)
+        self._server.leader = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Address:
+        """实际监听的地址"""
+        address = self._server.server_address
+        return address if isinstance(address, str) else (address[0], address[1])
+
+    def start(self) -> "ReplicationLeader":
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self.serve_forever, name="replication-leader", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中服务直至stop"""
+        self._server.serve_forever(poll_interval=0.1)
+
+    def stop(self) -> None:
+        """停止服务, 推送线程在一个心跳间隔内退出"""
+        self.stopping = True
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class ReplicationFollower:
+    def __init__(self, blockchain: Blockchain, address: Address) -> None:
+        """初始化从节点
+
+        blockchain应为空链 (create_genesis=False) 或此前从同一主节点复制的链。
+        """
+        self.blockchain = blockchain
+        self.address = address
+        self.heartbeat_interval = REPLICATION_SETTINGS["heartbeat_interval"]
+        self.reconnect_interval = REPLICATION_SETTINGS["reconnect_interval"]
+        self.connect_timeout = REPLICATION_SETTINGS["connect_timeout"]
+        # 主节点最近报告的高度
+        self.leader_height: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self) -> socket.socket:
+        """连接主节点"""
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.connect_timeout)
+        sock.connect(self.address)
+        # 主节点空闲时按心跳间隔发送心跳, 超过三个间隔无消息视为连接失效
+        sock.settimeout(self.heartbeat_interval * 3)
+        return sock
+
+    def sync(self) -> None:
+        """建立一次复制会话并持续应用区块, 直至连接断开或stop"""
+        sock = self._connect()
+        self._socket = sock
+        try:
+            stream = sock.makefile("rwb")
+            height = self.blockchain.height
+            send_message(stream, {
+                "type": "subscribe",
+                "height": height,
+                "last_hash": self.blockchain.get_latest_block().hash if height else None
+            })
+            hello = read_message(stream)
+            if hello is None:
+                raise ReplicationError("Leader closed the connection")
+            if hello.get("type") == "error":
+                raise ReplicationError(hello["message"])
+            if hello.get("consensus") != self.blockchain.consensus.name:
+                raise ReplicationError(
+                    f"Consensus mismatch: leader uses {hello.get('consensus')}, "
+                    f"follower uses {self.blockchain.consensus.name}"
+                )
+            try:
+                # 授权签名模式下从节点按主节点的授权公钥校验区块, 不需要私钥
+                self.blockchain.adopt_consensus(hello.get("consensus_params") or {})
+            except ValueError as e:
+                raise ReplicationError(str(e))
+            hash_scheme = HashScheme.from_dict(hello.get("hashing"))
+            retarget = DifficultyRetarget.from_dict(hello.get("retarget"))
+            if height:
+                # 已有区块的从节点按本链记录的规则校验, 不接受主节点放宽难度或更换哈希算法
+                self._check_rules(hello["difficulty"], retarget, hash_scheme)
+            self.blockchain.difficulty = hello["difficulty"]
+            # 区块记录的难度按主节点的调整规则校验
+            self.blockchain.retarget = retarget
+            self.blockchain.hash_scheme = hash_scheme
+            self.leader_height = hello["height"]
+
+            while not self._stop.is_set():
+                message = read_message(stream)
+                if message is None:
+                    return
+                if message["type"] == "blocks":
+                    try:
+                        applied = self.blockchain.apply_blocks([Block.from_dict(b) for b in message["blocks"]])
+                    except ValueError as e:
+                        raise ReplicationError(f"Rejected block from leader: {e}")
+                    self.leader_height = max(self.leader_height, applied[-1].index + 1)
+                elif message["type"] == "heartbeat":
+                    self.leader_height = message["height"]
+                elif message["type"] == "error":
+                    raise ReplicationError(message["message"])
+        except OSError:
+            if not self._stop.is_set():
+                raise
+        finally:
+            self._socket = None
+            sock.close()
+
+    def _check_rules(self, difficulty: int, retarget: Optional[DifficultyRetarget],
+                     hash_scheme: HashScheme) -> None:
+        """核对主节点的难度、难度调整规则和哈希配置与本链记录的一致"""
+        blockchain = self.blockchain
+        if difficulty != blockchain.difficulty:
+            raise ReplicationError(f"Difficulty mismatch: leader uses {difficulty}, "
+                                   f"follower uses {blockchain.difficulty}")
+        if retarget != blockchain.retarget:
+            raise ReplicationError(
+                f"Difficulty rules mismatch: leader uses {retarget.to_dict() if retarget else None}, "
+                f"follower uses {blockchain.retarget.to_dict() if blockchain.retarget else None}"
+            )
+        if hash_scheme != blockchain.hash_scheme:
+            raise ReplicationError(f"Hashing mismatch: leader uses {hash_scheme.to_dict()}, "
+                                   f"follower uses {blockchain.hash_scheme.to_dict()}")
+
+    def run(self) -> None:
+        """持续复制, 连接失败后按重连间隔重试; 链分叉等校验错误时停止"""
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except ReplicationError as e:
+                self.last_error = str(e)
+                return
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+            self._stop.wait(self.reconnect_interval)
+
+    def start(self) -> "ReplicationFollower":
+        """在后台线程中开始复制"""
+        self._thread = threading.Thread(target=self.run, name="replication-follower", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_for_height(self, height: int, timeout: Optional[float] = None) -> bool:
+        """等待本地链达到指定高度"""
+        return self.blockchain.wait_for_block(height - 1, timeout)
+
+    def stop(self) -> None:
+        """停止复制"""
+        self._stop.set()
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """以主节点或从节点身份运行"""
+    parser = argparse.ArgumentParser(description="区块链主从复制")
+    parser.add_argument("role", choices=["leader", "follower"])
+    parser.add_argument("--address", required=True, help="unix:/路径 或 主机:端口 (端口0自动分配)")
+    parser.add_argument("--backend", choices=["json", "segmented", "sqlite"], help="存储后端 (默认取配置)")
+    parser.add_argument("--data", type=Path, help="存储路径")
+    parser.add_argument("--consensus", choices=["pow", "authority", "none"], help="共识模式 (默认取配置)")
+    args = parser.parse_args(argv)
+
+    from .consensus import create_consensus
+    from .storage import create_storage
+
+    storage = create_storage(args.backend, args.data)
+    consensus = create_consensus(args.consensus)
+    if args.role == "leader":
+        blockchain = Blockchain(storage=storage, consensus=consensus)
+        leader = ReplicationLeader(blockchain, parse_address(args.address))
+        # 输出实际地址, 便于端口0时由调用方读取
+        print(json.dumps({"status": "listening", "address": format_address(leader.address)}), flush=True)
+        try:
+            leader.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            leader.stopping = True
+            blockchain.close()
+        return 0
+
+    blockchain = Blockchain(storage=storage, consensus=consensus, create_genesis=False)
+    follower = ReplicationFollower(blockchain, parse_address(args.address))
+    try:
+        follower.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        blockchain.close()
+    if follower.last_error:
+        print(json.dumps({"status": "error", "message": follower.last_error}), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
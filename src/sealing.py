@@ -0,0 +1,177 @@
+"""区块封装调度
+
+DifficultyRetarget按目标封装时间逐块调整工作量证明难度。选定的难度记录在
+区块中并参与区块哈希, 校验时只需检查区块自身记录的难度满足链的调整规则
+(取值范围、相邻区块最多变化max_step), 与封装时的计时无关, 结果是确定的。
+
+SealScheduler决定写线程何时将已封装的区块落盘: 批量达到上限、等待最久的
+交易将超出延迟预算, 或队列已空且没有剩余预算时落盘一次。
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import math
+from config.settings import SEALING_SETTINGS
+
+# 每提高一级难度, 期望的哈希次数增加的倍数 (区块哈希为十六进制, 难度为前导零个数)
+DIFFICULTY_FACTOR = 16
+
+
+class DifficultyRetarget:
+    def __init__(self, target_seal_time: Optional[float] = None, min_difficulty: Optional[int] = None,
+                 max_difficulty: Optional[int] = None, window: Optional[int] = None,
+                 max_step: int = 1) -> None:
+        """初始化难度调整规则
+
+        以当前难度最近window个区块的平均封装时间估计各难度的封装时间,
+        选择最接近target_seal_time的难度, 每个区块最多调整max_step级。
+        调整后重新采样。规则随链元数据保存; 采样只在内存中, 重启后从链尾
+        区块记录的难度重新开始。
+        """
+        self.target_seal_time = target_seal_time or SEALING_SETTINGS["target_seal_time"]
+        self.min_difficulty = SEALING_SETTINGS["min_difficulty"] if min_difficulty is None else min_difficulty
+        self.max_difficulty = SEALING_SETTINGS["max_difficulty"] if max_difficulty is None else max_difficulty
+        self.window = window or SEALING_SETTINGS["retarget_window"]
+        self.max_step = max_step
+        if not 0 <= self.min_difficulty <= self.max_difficulty:
+            raise ValueError(f"Invalid difficulty range: {self.min_difficulty}-{self.max_difficulty}")
+        self._samples: Deque[float] = deque(maxlen=self.window)
+        self._sampled_difficulty: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> Optional["DifficultyRetarget"]:
+        """按SEALING_SETTINGS创建, 未启用自适应难度时返回None"""
+        if not SEALING_SETTINGS["adaptive_difficulty"]:
+            return None
+        return cls()
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["DifficultyRetarget"]:
+        """从链元数据恢复, 未记录时返回None (固定难度)"""
+        if not data:
+            return None
+        return cls(data["target_seal_time"], data["min_difficulty"], data["max_difficulty"],
+                   data["window"], data["max_step"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为链元数据"""
+        return {
+            "target_seal_time": self.target_seal_time,
+            "min_difficulty": self.min_difficulty,
+            "max_difficulty": self.max_difficulty,
+            "window": self.window,
+            "max_step": self.max_step
+        }
+
+    def clamp(self, difficulty: int) -> int:
+        """限制在难度范围内"""
+        return max(self.min_difficulty, min(self.max_difficulty, difficulty))
+
+    def allows(self, previous: Optional[int], difficulty: int) -> bool:
+        """区块记录的难度是否符合规则
+
+        previous为前一区块记录的难度; 前一区块未记录难度 (固定难度的区块) 时
+        只检查取值范围。
+        """
+        if not self.min_difficulty <= difficulty <= self.max_difficulty:
+            return False
+        return previous is None or abs(difficulty - previous) <= self.max_step
+
+    def next_difficulty(self, previous: Optional[int], initial: int) -> int:
+        """选择下一个区块的难度
+
+        previous为前一区块记录的难度, 未记录时从initial (链的固定难度) 开始。
+        """
+        if previous is None:
+            return self.clamp(initial)
+        if self._sampled_difficulty != previous or len(self._samples) < self.window:
+            return previous
+        mean = sum(self._samples) / len(self._samples)
+        if mean <= 0:
+            return self.clamp(previous + self.max_step)
+        # 封装时间约与 DIFFICULTY_FACTOR ** 难度 成正比
+        step = round(math.log(self.target_seal_time / mean, DIFFICULTY_FACTOR))
+        step = max(-self.max_step, min(self.max_step, step))
+        return self.clamp(previous + step)
+
+    def record(self, difficulty: int, seconds: float) -> None:
+        """记录一个区块的封装时间, 难度变化后丢弃旧难度的采样"""
+        if difficulty != self._sampled_difficulty:
+            self._samples.clear()
+            self._sampled_difficulty = difficulty
+        self._samples.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """当前采样状态"""
+        samples = list(self._samples)
+        return {
+            **self.to_dict(),
+            "sampled_difficulty": self._sampled_difficulty,
+            "samples": len(samples),
+            "mean_seal_time": sum(samples) / len(samples) if samples else None
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DifficultyRetarget) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash((self.target_seal_time, self.min_difficulty, self.max_difficulty, self.window, self.max_step))
+
+
+class SealScheduler:
+    # 封装和落盘耗时估计的指数平滑系数
+    SMOOTHING = 0.2
+
+    def __init__(self, max_batch: Optional[int] = None, latency_budget: Optional[float] = None) -> None:
+        """初始化落盘调度
+
+        latency_budget为交易从提交到持久化的目标延迟(秒)。为None时写线程
+        合并队列中已有的交易后立即落盘, 不等待新交易; 设置后在预算允许时
+        继续封装后续交易, 队列为空时等待新交易直至预算用尽, 以更少的落盘
+        次数换取吞吐量。估计的封装和落盘耗时用于判断预算是否足够。
+        """
+        self.max_batch = max_batch or SEALING_SETTINGS["max_batch"]
+        self.latency_budget = (SEALING_SETTINGS["latency_budget"] if latency_budget is None
+                               else latency_budget)
+        self.seal_estimate = 0.0
+        self.flush_estimate = 0.0
+        self.flushes = 0
+
+    def _smooth(self, estimate: float, seconds: float) -> float:
+        return seconds if estimate == 0.0 else estimate + self.SMOOTHING * (seconds - estimate)
+
+    def record_seal(self, seconds: float) -> None:
+        """记录单个区块的封装耗时"""
+        self.seal_estimate = self._smooth(self.seal_estimate, seconds)
+
+    def record_flush(self, seconds: float) -> None:
+        """记录一次落盘的耗时"""
+        self.flushes += 1
+        self.flush_estimate = self._smooth(self.flush_estimate, seconds)
+
+    def remaining(self, oldest_wait: float) -> float:
+        """封装下一个区块并落盘后, 等待最久的交易还剩余的预算(秒)"""
+        return self.latency_budget - oldest_wait - self.seal_estimate - self.flush_estimate
+
+    def should_flush(self, batch_size: int, queued: int, oldest_wait: float) -> bool:
+        """已封装batch_size个区块、队列中还有queued个交易时是否立即落盘"""
+        if batch_size >= self.max_batch:
+            return True
+        if self.latency_budget is None:
+            return queued == 0
+        return self.remaining(oldest_wait) < 0
+
+    def linger(self, oldest_wait: float) -> float:
+        """队列为空时等待新交易的时间(秒), 0为立即落盘"""
+        if self.latency_budget is None:
+            return 0.0
+        return max(0.0, self.remaining(oldest_wait))
+
+    def stats(self) -> Dict[str, Any]:
+        """调度参数与耗时估计"""
+        return {
+            "max_batch": self.max_batch,
+            "latency_budget": self.latency_budget,
+            "seal_estimate": self.seal_estimate,
+            "flush_estimate": self.flush_estimate,
+            "flushes": self.flushes
+        }
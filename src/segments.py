@@ -0,0 +1,482 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from .compression import BlockCodec, preset_dictionary, train_dictionary
+from .hashing import HashScheme
+from .storage import ChainStorage
+from .utils.helpers import calculate_block_hash, load_json_file
+from config.settings import COMPRESSION_SETTINGS, SEGMENT_SETTINGS
+
+# 封存段压缩方式对应的文件后缀
+CODEC_SUFFIXES = {
+    "gzip": ".gz",
+    "zlib": ".zdf"
+}
+
+
+class SegmentError(Exception):
+    """分段存储错误"""
+    pass
+
+
+class Segment:
+    def __init__(self, segment_id: int, first_height: int, directory: Path) -> None:
+        """初始化分段描述"""
+        self.id = segment_id
+        self.first_height = first_height
+        self.directory = directory
+        self.count = 0
+        self.size = 0
+        self.sealed = False
+        # 压缩方式: None / gzip (整段) / zlib (按稀疏索引间隔分帧)
+        self.codec: Optional[str] = None
+        self.checksum: Optional[str] = None
+        self.verified = False
+        self.last_hash: Optional[str] = None
+        # 稀疏索引: (区块高度, 段内字节偏移)
+        self.index: List[Tuple[int, int]] = []
+
+    @property
+    def compressed(self) -> bool:
+        """分段是否已压缩"""
+        return self.codec is not None
+
+    @property
+    def path(self) -> Path:
+        """分段数据文件路径"""
+        name = f"segment_{self.id:06d}.jsonl"
+        return self.directory / (name + CODEC_SUFFIXES.get(self.codec, ""))
+
+    @property
+    def index_path(self) -> Path:
+        """稀疏索引文件路径; 分帧压缩段的索引记录压缩后的帧偏移"""
+        suffix = ".zdx" if self.codec == "zlib" else ".idx"
+        return self.directory / f"segment_{self.id:06d}{suffix}"
+
+    @property
+    def last_height(self) -> int:
+        """段内最后一个区块的高度"""
+        return self.first_height + self.count - 1
+
+    def open(self) -> BinaryIO:
+        """打开分段数据文件; gzip段返回可按未压缩偏移定位的文件对象"""
+        if self.codec == "gzip":
+            return gzip.open(self.path, "rb")
+        return open(self.path, "rb")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为清单记录"""
+        return {
+            "id": self.id,
+            "first_height": self.first_height,
+            "count": self.count,
+            "size": self.size,
+            "sealed": self.sealed,
+            "compressed": self.compressed,
+            "codec": self.codec,
+            "checksum": self.checksum,
+            "verified": self.verified,
+            "last_hash": self.last_hash
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], directory: Path) -> "Segment":
+        """从清单记录恢复"""
+        segment = cls(data["id"], data["first_height"], directory)
+        segment.count = data["count"]
+        segment.size = data["size"]
+        segment.sealed = data["sealed"]
+        segment.codec = data.get("codec") or ("gzip" if data.get("compressed") else None)
+        segment.checksum = data.get("checksum")
+        segment.verified = data.get("verified", False)
+        segment.last_hash = data.get("last_hash")
+        return segment
+
+
+def file_checksum(path: Path) -> str:
+    """计算文件的SHA256校验和"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SegmentedChainStore(ChainStorage):
+    MANIFEST = "manifest.json"
+    DICTIONARY = "dictionary.bin"
+    random_access = True
+
+    def __init__(self, directory: Path, segment_size: Optional[int] = None,
+                 index_interval: Optional[int] = None) -> None:
+        """初始化分段链存储
+
+        每个分段文件按行保存区块JSON, 写满segment_size个区块后封存为只读。
+        每index_interval个区块在稀疏索引中记录一次字节偏移, 读取任意区块
+        只需一次定位加最多index_interval行的顺序读取。
+        """
+        self.directory = Path(directory)
+        self.segment_size = segment_size or SEGMENT_SETTINGS["segment_size"]
+        self.index_interval = index_interval or SEGMENT_SETTINGS["index_interval"]
+        self.segments: List[Segment] = []
+        # 各分段的起始高度, 供find_segment二分查找
+        self._first_heights: List[int] = []
+        self.metadata: Dict[str, Any] = {}
+        self._codec: Optional[BlockCodec] = None
+        if self.exists():
+            self._open()
+
+    def exists(self) -> bool:
+        """存储是否已初始化"""
+        return (self.directory / self.MANIFEST).exists()
+
+    @property
+    def height(self) -> int:
+        """已持久化的区块数量"""
+        if not self.segments:
+            return 0
+        tail = self.segments[-1]
+        return tail.first_height + tail.count
+
+    def _open(self) -> None:
+        """加载清单和索引, 并恢复活动段的真实长度"""
+        manifest = load_json_file(self.directory / self.MANIFEST)
+        self.segment_size = manifest.get("segment_size", self.segment_size)
+        self.index_interval = manifest.get("index_interval", self.index_interval)
+        self.metadata = manifest.get("metadata", {})
+        self.segments = [Segment.from_dict(s, self.directory) for s in manifest.get("segments", [])]
+        self._first_heights = [segment.first_height for segment in self.segments]
+        for segment in self.segments:
+            segment.index = self._load_index(segment)
+        if self.segments and not self.segments[-1].sealed:
+            self._recover_tail(self.segments[-1])
+
+    def _load_index(self, segment: Segment) -> List[Tuple[int, int]]:
+        """读取稀疏索引文件"""
+        index = []
+        if segment.index_path.exists():
+            with open(segment.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2:
+                        index.append((int(parts[0]), int(parts[1])))
+        return index
+
+    def _recover_tail(self, segment: Segment) -> None:
+        """从最后一个索引点向后扫描活动段, 补齐索引并截断写了一半的记录"""
+        if not segment.path.exists():
+            segment.path.touch()
+        while segment.index and segment.index[-1][1] >= segment.path.stat().st_size:
+            segment.index.pop()
+        height, offset = segment.index[-1] if segment.index else (segment.first_height, 0)
+        last_line = None
+        with open(segment.path, "r+b") as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    f.truncate(offset)
+                    break
+                if ((height - segment.first_height) % self.index_interval == 0 and
+                        (not segment.index or segment.index[-1][0] < height)):
+                    segment.index.append((height, offset))
+                offset += len(line)
+                height += 1
+                last_line = line
+        segment.count = height - segment.first_height
+        segment.size = offset
+        if last_line is not None:
+            segment.last_hash = json.loads(last_line)["hash"]
+        self._write_index(segment)
+
+    def _write_index(self, segment: Segment) -> None:
+        """重写分段的稀疏索引文件"""
+        with open(segment.index_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{height} {offset}\n" for height, offset in segment.index)
+
+    def _save_manifest(self) -> None:
+        """保存清单 (先写临时文件再替换, 写入失败时旧清单保持完整并抛出异常)"""
+        path = self.directory / self.MANIFEST
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "segment_size": self.segment_size,
+                "index_interval": self.index_interval,
+                "metadata": self.metadata,
+                "segments": [segment.to_dict() for segment in self.segments]
+            }, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _new_segment(self) -> Segment:
+        """创建新的活动段"""
+        segment = Segment(len(self.segments), self.height, self.directory)
+        segment.path.touch()
+        self.segments.append(segment)
+        self._first_heights.append(segment.first_height)
+        return segment
+
+    def load(self) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        return self.iter_blocks(), self.metadata
+
+    def get_metadata(self) -> Dict[str, Any]:
+        return self.metadata
+
+    def index_path(self, name: str) -> Path:
+        return self.directory / "indexes" / name
+
+    def fingerprint(self) -> Optional[str]:
+        if not self.segments:
+            return None
+        return f"{self.height}:{self.segments[-1].last_hash}"
+
+    def save(self, chain: Sequence[Any], metadata: Dict[str, Any]) -> None:
+        """只追加尚未持久化的区块"""
+        self.append([chain[i].to_dict() for i in range(self.height, len(chain))], metadata)
+
+    def append(self, blocks: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """追加区块到活动段, 写满时封存并轮转到新段"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if metadata is not None:
+            self.metadata = metadata
+
+        position = 0
+        while position < len(blocks):
+            segment = self.segments[-1] if self.segments and not self.segments[-1].sealed else None
+            if segment is None:
+                segment = self._new_segment()
+            if segment.count >= self.segment_size:
+                self.seal(segment)
+                continue
+            room = self.segment_size - segment.count
+            chunk = blocks[position:position + room]
+            position += len(chunk)
+
+            new_index = []
+            with open(segment.path, "ab") as f:
+                for block in chunk:
+                    height = segment.first_height + segment.count
+                    if block["index"] != height:
+                        raise SegmentError(f"Expected block {height}, got {block['index']}")
+                    if (height - segment.first_height) % self.index_interval == 0:
+                        new_index.append((height, segment.size))
+                    line = (json.dumps(block, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    segment.size += len(line)
+                    segment.count += 1
+                    segment.last_hash = block["hash"]
+                f.flush()
+                os.fsync(f.fileno())
+
+            if new_index:
+                segment.index.extend(new_index)
+                with open(segment.index_path, "a", encoding="utf-8") as f:
+                    f.writelines(f"{height} {offset}\n" for height, offset in new_index)
+
+            if segment.count >= self.segment_size:
+                self.seal(segment)
+
+        self._save_manifest()
+
+    def seal(self, segment: Segment) -> None:
+        """封存分段: 之后该段只读, 记录校验和"""
+        segment.sealed = True
+        segment.checksum = file_checksum(segment.path)
+
+    def update_metadata(self, metadata: Dict[str, Any]) -> None:
+        """更新链元数据"""
+        self.metadata = metadata
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._save_manifest()
+
+    def find_segment(self, height: int) -> Segment:
+        """定位包含指定高度的分段"""
+        if not 0 <= height < self.height:
+            raise IndexError(f"Block {height} out of range")
+        return self.segments[bisect.bisect_right(self._first_heights, height) - 1]
+
+    def _iter_lines(self, segment: Segment, start: Optional[int] = None) -> Iterator[bytes]:
+        """从start高度开始遍历分段内的区块记录行, 先按稀疏索引定位"""
+        start = segment.first_height if start is None else max(start, segment.first_height)
+        position = bisect.bisect_right(segment.index, (start, float("inf"))) - 1
+        indexed_height, offset = segment.index[position] if position >= 0 else (segment.first_height, 0)
+        skip = start - indexed_height
+
+        if segment.codec == "zlib":
+            # 每帧独立压缩, 只需解压目标帧及其后的帧
+            codec = self._load_codec()
+            ends = [frame_offset for _, frame_offset in segment.index[position + 1:]] + [segment.size]
+            with open(segment.path, "rb") as f:
+                f.seek(offset)
+                for end in ends:
+                    frame = f.read(end - offset)
+                    offset = end
+                    for line in codec.decompress(frame).splitlines(keepends=True):
+                        if skip:
+                            skip -= 1
+                            continue
+                        yield line
+            return
+
+        with segment.open() as f:
+            f.seek(offset)
+            for line in f:
+                if skip:
+                    skip -= 1
+                    continue
+                yield line
+
+    def read_block(self, height: int) -> Dict[str, Any]:
+        """随机读取单个区块: 一次定位后顺序读取至目标行"""
+        for line in self._iter_lines(self.find_segment(height), height):
+            return json.loads(line)
+        raise IndexError(f"Block {height} out of range")
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """从指定高度开始顺序遍历区块"""
+        if start >= self.height:
+            return
+        first = self.find_segment(start).id
+        for segment in self.segments[first:]:
+            for line in self._iter_lines(segment, start):
+                yield json.loads(line)
+
+    def verify_segment(self, segment: Segment, previous_hash: Optional[str] = None) -> bool:
+        """校验单个分段
+
+        已封存且校验通过的分段只需比对文件校验和, 不再逐块重算哈希。
+        """
+        if segment.sealed and segment.checksum != file_checksum(segment.path):
+            return False
+        if segment.sealed and segment.verified:
+            return True
+
+        algorithm = HashScheme.from_dict(self.metadata.get("hashing")).block
+        count = 0
+        for line in self._iter_lines(segment):
+            block = json.loads(line)
+            if block["index"] != segment.first_height + count:
+                return False
+            if previous_hash is not None and block["previous_hash"] != previous_hash:
+                return False
+            expected = calculate_block_hash(
+                block["index"], block["timestamp"], block["data"],
+                block["previous_hash"], block["nonce"], algorithm, block.get("difficulty")
+            )
+            if block["hash"] != expected:
+                return False
+            previous_hash = block["hash"]
+            count += 1
+        if count != segment.count:
+            return False
+
+        if segment.sealed:
+            segment.verified = True
+            self._save_manifest()
+        return True
+
+    def verify(self) -> bool:
+        """校验全部分段及段间哈希链接"""
+        previous_hash = None
+        for segment in self.segments:
+            if segment.sealed and segment.verified and previous_hash is not None:
+                first = self.read_block(segment.first_height)
+                if first["previous_hash"] != previous_hash:
+                    return False
+            if not self.verify_segment(segment, previous_hash):
+                return False
+            previous_hash = segment.last_hash
+        return True
+
+    def _load_codec(self, samples: Optional[List[Dict[str, Any]]] = None) -> BlockCodec:
+        """获取分帧压缩使用的共享字典, 首次压缩时以样本区块训练并保存"""
+        if self._codec is None:
+            path = self.directory / self.DICTIONARY
+            if path.exists():
+                dictionary = path.read_bytes()
+            else:
+                dictionary = (train_dictionary(samples) if samples else b"") or preset_dictionary()
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(dictionary)
+                os.replace(tmp_path, path)
+            self._codec = BlockCodec(dictionary)
+        return self._codec
+
+    def _compress_frames(self, segment: Segment) -> None:
+        """将封存段按稀疏索引间隔分帧压缩, 每帧可独立解压"""
+        source = segment.path
+        source_index = segment.index_path
+        if self._codec is None and not (self.directory / self.DICTIONARY).exists():
+            samples = []
+            for line in self._iter_lines(segment):
+                samples.append(json.loads(line))
+                if len(samples) >= COMPRESSION_SETTINGS["sample_blocks"]:
+                    break
+            self._load_codec(samples)
+        codec = self._load_codec()
+
+        segment.codec = "zlib"
+        index = []
+        size = 0
+        with open(source, "rb") as src, open(segment.path, "wb") as dst:
+            frame: List[bytes] = []
+            for i, line in enumerate(src):
+                if i % self.index_interval == 0:
+                    if frame:
+                        size += dst.write(codec.compress(b"".join(frame)))
+                        frame = []
+                    index.append((segment.first_height + i, size))
+                frame.append(line)
+            if frame:
+                size += dst.write(codec.compress(b"".join(frame)))
+            dst.flush()
+            os.fsync(dst.fileno())
+        segment.index = index
+        segment.size = size
+        self._write_index(segment)
+        segment.checksum = file_checksum(segment.path)
+        # 清单保存后再删除原文件, 中途失败时旧清单仍指向完整的未压缩段
+        self._save_manifest()
+        source.unlink()
+        source_index.unlink()
+
+    def compress_cold_segments(self, keep_recent: Optional[int] = None,
+                               codec: Optional[str] = None) -> List[int]:
+        """压缩较旧的封存段, 最近keep_recent个封存段和活动段保持不压缩
+
+        zlib (默认) 按稀疏索引间隔分帧并使用共享字典, 随机读取只解压一帧;
+        gzip整段压缩, 压缩率略高, 但随机读取需从段首解压到目标偏移, 只适合
+        很少按高度读取的归档段。
+        """
+        if keep_recent is None:
+            keep_recent = SEGMENT_SETTINGS["keep_uncompressed"]
+        codec = codec or SEGMENT_SETTINGS["cold_codec"]
+        if codec not in CODEC_SUFFIXES:
+            raise SegmentError(f"Unsupported segment codec: {codec}")
+        sealed = [s for s in self.segments if s.sealed and not s.compressed]
+        cold = sealed[:max(0, len(sealed) - keep_recent)]
+        compressed = []
+        for segment in cold:
+            if codec == "zlib":
+                self._compress_frames(segment)
+                compressed.append(segment.id)
+                continue
+            source = segment.path
+            with open(source, "rb") as src, open(str(source) + ".gz", "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                    for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                        dst.write(chunk)
+                raw.flush()
+                os.fsync(raw.fileno())
+            segment.codec = "gzip"
+            segment.checksum = file_checksum(segment.path)
+            # 与zlib分帧相同, 清单保存后再删除原文件
+            self._save_manifest()
+            source.unlink()
+            compressed.append(segment.id)
+        return compressed
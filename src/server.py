@@ -0,0 +1,167 @@
+"""本地版权保护服务
+
+通过TCP或Unix套接字对外提供CopyrightProtection的操作, 供其他进程 (如负载
+生成器) 调用。每个连接按顺序处理请求, 多个连接并发处理; 消息格式与复制
+协议相同, 为按行分隔的JSON:
+    客户端 -> 服务端  {"id": n, "method": "verify_ownership", "params": [...]}
+    服务端 -> 客户端  {"id": n, "result": {...}}
+
+用法:
+    python -m src.server --backend sqlite --data chain.db --address 127.0.0.1:8765
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from .replication import Address, format_address, parse_address, read_message, send_message
+from .sharding import dispatch
+
+
+class _ProtectionHandler(socketserver.StreamRequestHandler):
+    """处理单个客户端连接"""
+
+    def handle(self) -> None:
+        protection = self.server.protection
+        try:
+            while True:
+                try:
+                    request = read_message(self.rfile)
+                except ValueError as e:
+                    send_message(self.wfile, {
+                        "id": None,
+                        "result": {"status": "error", "message": f"Bad request: {str(e)}"}
+                    })
+                    return
+                if request is None:
+                    return
+                result = dispatch(protection, request.get("method", ""), request.get("params", []))
+                send_message(self.wfile, {"id": request.get("id"), "result": result})
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开连接
+            return
+
+
+class _TCPProtectionHandler(_ProtectionHandler):
+    # 请求-响应交替的小消息, 关闭Nagle算法避免延迟确认造成的等待
+    disable_nagle_algorithm = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class ProtectionServer:
+    def __init__(self, protection: Any, address: Address) -> None:
+        """初始化服务, address为 (主机, 端口) 或Unix套接字路径; 端口为0时自动分配"""
+        self.protection = protection
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixServer(address, _ProtectionHandler)
+        else:
+            self._server = _TCPServer(address, _TCPProtectionHandler)
+        self._server.protection = protection
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Address:
+        """实际监听的地址"""
+        address = self._server.server_address
+        return address if isinstance(address, str) else (address[0], address[1])
+
+    def start(self) -> "ProtectionServer":
+        """在后台线程中开始服务"""
+        self._thread = threading.Thread(target=self.serve_forever, name="protection-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中服务直至stop"""
+        self._server.serve_forever(poll_interval=0.1)
+
+    def stop(self) -> None:
+        """停止接受新连接"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class ProtectionClient:
+    def __init__(self, address: Address, timeout: Optional[float] = None) -> None:
+        """连接本地服务; 单个客户端不是线程安全的, 并发调用方应各自创建客户端"""
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+        self._stream = self._socket.makefile("rwb")
+        self._next_id = 0
+
+    def call(self, method: str, *params: Any) -> Dict[str, Any]:
+        """调用服务端方法并返回结果字典"""
+        self._next_id += 1
+        send_message(self._stream, {"id": self._next_id, "method": method, "params": list(params)})
+        response = read_message(self._stream)
+        if response is None:
+            raise ConnectionError("Server closed the connection")
+        return response["result"]
+
+    def close(self) -> None:
+        """关闭连接"""
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self) -> "ProtectionClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """启动本地服务"""
+    parser = argparse.ArgumentParser(description="本地版权保护服务")
+    parser.add_argument("--address", required=True, help="unix:/路径 或 主机:端口 (端口0自动分配)")
+    parser.add_argument("--backend", choices=["json", "segmented", "sqlite"], help="存储后端 (默认取配置)")
+    parser.add_argument("--data", type=Path, help="存储路径")
+    parser.add_argument("--consensus", choices=["pow", "authority", "none"], help="共识模式 (默认取配置)")
+    args = parser.parse_args(argv)
+
+    from .blockchain import Blockchain
+    from .consensus import create_consensus
+    from .content_registry import ContentRegistry
+    from .copyright_protection import CopyrightProtection
+    from .storage import create_storage
+
+    blockchain = Blockchain(storage=create_storage(args.backend, args.data),
+                            consensus=create_consensus(args.consensus))
+    server = ProtectionServer(CopyrightProtection(ContentRegistry(blockchain)), parse_address(args.address))
+    # 输出实际地址, 便于端口0时由调用方读取
+    print(json.dumps({"status": "listening", "address": format_address(server.address)}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        blockchain.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
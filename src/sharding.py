@@ -0,0 +1,415 @@
+"""分片注册表
+
+注册记录按内容哈希前缀路由到N条相互独立的链, 每个分片各自挖矿和持久化。
+验证、历史和许可证更新只访问所属分片; 搜索和统计向所有分片并发查询后合并。
+
+process模式下每个分片运行在独立进程中, 挖矿不受GIL限制, 写入吞吐量随分片数
+(不超过CPU核数) 近似线性增长; thread模式下分片共享进程, 只有持久化可以并行。
+分片数和前缀长度记录在目录下的shards.json中, 重新打开时必须一致。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import multiprocessing
+import threading
+from .metrics import instrumented
+from .utils.helpers import calculate_hash, load_json_file, save_json_file
+from config.settings import BLOCKCHAIN_DATA_DIR, SHARD_SETTINGS, STORAGE_SETTINGS, get_current_timestamp
+
+MANIFEST = "shards.json"
+# 分片请求: (方法名, 位置参数)
+Call = Tuple[str, Sequence[Any]]
+
+_REGISTRY_METHODS = frozenset({
+    "register_content", "verify_content", "search_content", "get_chain_status",
+    "query_time_range", "get_owner_counts"
+})
+_PROTECTION_METHODS = frozenset({
+    "protect_ai_content", "verify_ownership", "get_content_history", "update_license", "get_statistics"
+})
+
+
+class ShardError(Exception):
+    """分片不可用"""
+    pass
+
+
+def shard_for(content_hash: str, count: int, prefix_length: Optional[int] = None) -> int:
+    """按内容哈希前缀计算所属分片"""
+    prefix_length = prefix_length or SHARD_SETTINGS["prefix_length"]
+    return int(content_hash[:prefix_length], 16) % count
+
+
+def shard_path(directory: Path, shard: int, backend: str) -> Path:
+    """分片的存储路径"""
+    names = {"json": STORAGE_SETTINGS["json_file"], "segmented": STORAGE_SETTINGS["segment_dir"],
+             "sqlite": STORAGE_SETTINGS["sqlite_file"]}
+    return directory / f"shard-{shard:02d}" / names[backend]
+
+
+def open_shard(path: Path, backend: str, consensus_mode: Optional[str]) -> Any:
+    """打开单个分片的版权保护系统"""
+    from .blockchain import Blockchain
+    from .consensus import create_consensus
+    from .content_registry import ContentRegistry
+    from .copyright_protection import CopyrightProtection
+    from .storage import create_storage
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    blockchain = Blockchain(storage=create_storage(backend, path), consensus=create_consensus(consensus_mode))
+    return CopyrightProtection(ContentRegistry(blockchain))
+
+
+def dispatch(protection: Any, method: str, args: Sequence[Any]) -> Dict[str, Any]:
+    """在分片上执行一个请求"""
+    try:
+        if method in _REGISTRY_METHODS:
+            return getattr(protection.registry, method)(*args)
+        if method in _PROTECTION_METHODS:
+            return getattr(protection, method)(*args)
+        raise ValueError(f"Unsupported shard method: {method}")
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Shard request failed: {str(e)}"
+        }
+
+
+def _serve_shard(conn: Any, path: str, backend: str, consensus_mode: Optional[str]) -> None:
+    """分片进程主循环: 按批接收请求并返回结果列表, 收到None时退出"""
+    try:
+        protection = open_shard(Path(path), backend, consensus_mode)
+    except Exception as e:
+        conn.send({"status": "error", "message": str(e)})
+        conn.close()
+        return
+    conn.send({"status": "success"})
+    try:
+        while True:
+            try:
+                batch = conn.recv()
+            except EOFError:
+                break
+            if batch is None:
+                break
+            conn.send([dispatch(protection, method, args) for method, args in batch])
+    finally:
+        protection.registry.blockchain.close()
+        conn.close()
+
+
+class _LocalShard:
+    """在当前进程中运行的分片"""
+
+    def __init__(self, path: Path, backend: str, consensus_mode: Optional[str]) -> None:
+        self.protection = open_shard(path, backend, consensus_mode)
+
+    def call(self, batch: List[Call]) -> List[Dict[str, Any]]:
+        return [dispatch(self.protection, method, args) for method, args in batch]
+
+    def close(self) -> None:
+        self.protection.registry.blockchain.close()
+
+
+class _ProcessShard:
+    """在独立进程中运行的分片"""
+
+    def __init__(self, path: Path, backend: str, consensus_mode: Optional[str]) -> None:
+        # spawn避免在已有线程的进程中fork
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_serve_shard, args=(child_conn, str(path), backend, consensus_mode),
+            name=f"shard-{path.parent.name}", daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        # 请求与响应按顺序配对, 同一时间只允许一个调用方使用管道
+        self._lock = threading.Lock()
+        try:
+            ready = self._conn.recv()
+        except EOFError:
+            ready = {"status": "error", "message": "shard process exited"}
+        if ready["status"] != "success":
+            self._process.join()
+            raise ShardError(f"Failed to open shard {path}: {ready['message']}")
+
+    def call(self, batch: List[Call]) -> List[Dict[str, Any]]:
+        with self._lock:
+            try:
+                self._conn.send(batch)
+                return self._conn.recv()
+            except (EOFError, OSError) as e:
+                raise ShardError(f"Shard process {self._process.name} is unavailable: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(10)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._conn.close()
+
+
+class ShardedRegistry:
+    def __init__(self, directory: Optional[Path] = None, shards: Optional[int] = None,
+                 backend: Optional[str] = None, consensus: Optional[str] = None,
+                 mode: Optional[str] = None) -> None:
+        """初始化分片注册表
+
+        directory下每个分片占用一个shard-NN子目录, backend和consensus为各分片的
+        存储后端与共识模式名称。接口与CopyrightProtection和ContentRegistry一致,
+        结果中的block_number是分片内的高度, 并附带shard字段。
+        """
+        self.directory = Path(directory or BLOCKCHAIN_DATA_DIR / SHARD_SETTINGS["directory"])
+        self.backend = backend or STORAGE_SETTINGS["backend"]
+        self.prefix_length = SHARD_SETTINGS["prefix_length"]
+        self.count = self._load_manifest(shards)
+        mode = mode or SHARD_SETTINGS["mode"]
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported shard mode: {mode}")
+        self.mode = mode
+
+        shard_class = _ProcessShard if mode == "process" else _LocalShard
+        self._executor = ThreadPoolExecutor(max_workers=self.count, thread_name_prefix="shard")
+        self._shards: List[Any] = []
+        # 并发启动各分片 (进程启动和链加载都较慢)
+        futures = [
+            self._executor.submit(shard_class, shard_path(self.directory, i, self.backend), self.backend, consensus)
+            for i in range(self.count)
+        ]
+        # 任一分片启动失败时关闭已启动的分片
+        error = None
+        for future in futures:
+            try:
+                self._shards.append(future.result())
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            self.close()
+            raise error
+
+    def _load_manifest(self, count: Optional[int]) -> int:
+        """读取或创建分片清单, 分片布局与已有数据不一致时报错"""
+        manifest_file = self.directory / MANIFEST
+        if manifest_file.exists():
+            manifest = load_json_file(manifest_file)
+            expected = {"count": count or manifest.get("count"), "prefix_length": self.prefix_length,
+                        "backend": self.backend}
+            if any(manifest.get(key) != value for key, value in expected.items()):
+                raise ValueError(f"Shard layout mismatch: {manifest_file} records {manifest}, requested {expected}")
+            return manifest["count"]
+        count = count or SHARD_SETTINGS["count"]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        save_json_file({"count": count, "prefix_length": self.prefix_length, "backend": self.backend},
+                       manifest_file)
+        return count
+
+    def shard_for_content(self, content: str) -> int:
+        """内容所属的分片"""
+        return shard_for(calculate_hash(content), self.count, self.prefix_length)
+
+    def _call(self, shard: int, method: str, *args: Any) -> Dict[str, Any]:
+        """在单个分片上执行请求, 结果附带分片编号"""
+        try:
+            result = self._shards[shard].call([(method, args)])[0]
+        except ShardError as e:
+            return {"status": "error", "message": str(e)}
+        result["shard"] = shard
+        return result
+
+    def _scatter(self, method: str, *args: Any) -> List[Dict[str, Any]]:
+        """在所有分片上并发执行请求, 任一分片失败时抛出ShardError"""
+        futures = [self._executor.submit(shard.call, [(method, args)]) for shard in self._shards]
+        results = [future.result()[0] for future in futures]
+        for i, result in enumerate(results):
+            if result.get("status") != "success":
+                raise ShardError(f"Shard {i}: {result.get('message')}")
+        return results
+
+    @instrumented("sharded_register_content")
+    def register_content(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """注册内容到所属分片"""
+        return self._call(self.shard_for_content(content), "register_content", content, metadata)
+
+    @instrumented("sharded_register_many")
+    def register_many(self, items: Sequence[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """批量注册, 各分片的请求合并为一批并行执行, 结果与输入顺序一致"""
+        groups: Dict[int, List[int]] = {}
+        for position, (content, _) in enumerate(items):
+            groups.setdefault(self.shard_for_content(content), []).append(position)
+
+        futures = {
+            shard: self._executor.submit(
+                self._shards[shard].call, [("register_content", tuple(items[p])) for p in positions]
+            )
+            for shard, positions in groups.items()
+        }
+        results: List[Dict[str, Any]] = [{}] * len(items)
+        for shard, future in futures.items():
+            try:
+                shard_results = future.result()
+            except ShardError as e:
+                shard_results = [{"status": "error", "message": str(e)}] * len(groups[shard])
+            for position, result in zip(groups[shard], shard_results):
+                results[position] = dict(result, shard=shard)
+        return results
+
+    @instrumented("sharded_protect_ai_content")
+    def protect_ai_content(self, content: str, title: str, description: str, ai_model: str,
+                           ai_params: Optional[Dict[str, Any]] = None,
+                           license_type: Optional[str] = None) -> Dict[str, Any]:
+        """保护AI生成的内容"""
+        return self._call(self.shard_for_content(content), "protect_ai_content",
+                          content, title, description, ai_model, ai_params, license_type)
+
+    def verify_content(self, content: str) -> Dict[str, Any]:
+        """在所属分片上验证内容"""
+        return self._call(self.shard_for_content(content), "verify_content", content)
+
+    def verify_ownership(self, content: str) -> Dict[str, Any]:
+        """在所属分片上验证内容所有权, 经分片的结果缓存"""
+        return self._call(self.shard_for_content(content), "verify_ownership", content)
+
+    def get_content_history(self, content: str) -> Dict[str, Any]:
+        """获取内容在所属分片上的历史记录"""
+        return self._call(self.shard_for_content(content), "get_content_history", content)
+
+    def update_license(self, content: str, new_license: str) -> Dict[str, Any]:
+        """在所属分片上更新许可证"""
+        return self._call(self.shard_for_content(content), "update_license", content, new_license)
+
+    @instrumented("sharded_search_content")
+    def search_content(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """在所有分片上搜索内容, 结果按时间排序"""
+        try:
+            results = []
+            for shard, result in enumerate(self._scatter("search_content", query)):
+                results.extend(dict(item, shard=shard) for item in result["results"])
+            results.sort(key=lambda item: (item["timestamp"], item["shard"], item["block_number"]))
+            return {
+                "status": "success",
+                "results": results,
+                "count": len(results),
+                "query_time": get_current_timestamp()
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Search failed: {str(e)}"
+            }
+
+    @instrumented("sharded_query_time_range")
+    def query_time_range(self, start: Any, end: Any, block_type: Optional[str] = None,
+                         model: Optional[str] = None, license_type: Optional[str] = None,
+                         limit: Optional[int] = None) -> Dict[str, Any]:
+        """在所有分片上查询时间范围内的记录, 结果按时间排序"""
+        try:
+            results = []
+            for shard, result in enumerate(
+                    self._scatter("query_time_range", start, end, block_type, model, license_type, limit)):
+                results.extend(dict(item, shard=shard) for item in result["results"])
+            results.sort(key=lambda item: (item["timestamp"], item["shard"], item["block_number"]))
+            if limit is not None:
+                results = results[:limit]
+            return {
+                "status": "success",
+                "results": results,
+                "count": len(results),
+                "query_time": get_current_timestamp()
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Time range query failed: {str(e)}"
+            }
+
+    @instrumented("sharded_get_statistics")
+    def get_statistics(self) -> Dict[str, Any]:
+        """汇总所有分片的统计信息"""
+        try:
+            totals = {"total_blocks": 0, "total_registrations": 0, "total_updates": 0}
+            models_usage: Dict[str, int] = {}
+            licenses_usage: Dict[str, int] = {}
+            for result in self._scatter("get_statistics"):
+                for key in totals:
+                    totals[key] += result[key]
+                for model, count in result["models_usage"].items():
+                    models_usage[model] = models_usage.get(model, 0) + count
+                for license_type, count in result["licenses_usage"].items():
+                    licenses_usage[license_type] = licenses_usage.get(license_type, 0) + count
+
+            return {
+                "status": "success",
+                **totals,
+                "models_usage": models_usage,
+                "licenses_usage": licenses_usage,
+                "shards": self.count,
+                "query_time": get_current_timestamp()
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to get statistics: {str(e)}"
+            }
+
+    @instrumented("sharded_get_owner_counts")
+    def get_owner_counts(self) -> Dict[str, Any]:
+        """汇总所有分片中各所有者持有的内容数量"""
+        try:
+            counts: Dict[str, int] = {}
+            for result in self._scatter("get_owner_counts"):
+                for owner, count in result["owners"].items():
+                    counts[owner] = counts.get(owner, 0) + count
+            return {
+                "status": "success",
+                "owners": counts,
+                "count": len(counts),
+                "query_time": get_current_timestamp()
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to get owner counts: {str(e)}"
+            }
+
+    @instrumented("sharded_get_chain_status")
+    def get_chain_status(self, validate: bool = True) -> Dict[str, Any]:
+        """获取各分片链的状态"""
+        try:
+            statuses = self._scatter("get_chain_status", validate)
+            return {
+                "status": "success",
+                "length": sum(status["length"] for status in statuses),
+                "is_valid": all(status["is_valid"] for status in statuses) if validate else None,
+                "shards": [
+                    {key: status[key] for key in ("length", "is_valid", "difficulty", "consensus")}
+                    for status in statuses
+                ]
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Failed to get chain status: {str(e)}"
+            }
+
+    def close(self) -> None:
+        """关闭所有分片"""
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ShardedRegistry":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
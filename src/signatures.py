@@ -0,0 +1,249 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+import functools
+import json
+import os
+import threading
+from pathlib import Path
+from .indexes import BlockIndex
+from .utils.helpers import ValidationError
+from config.settings import BLOCKCHAIN_DATA_DIR, SIGNATURE_SETTINGS
+
+try:
+    from Crypto.Hash import SHA256
+    from Crypto.PublicKey import ECC
+    from Crypto.Signature import DSS, eddsa
+except ImportError:
+    ECC = None
+
+# 签名算法 -> pycryptodome曲线名
+CURVES = {
+    "ed25519": "Ed25519",
+    "ecdsa-p256": "P-256"
+}
+
+
+class SignatureError(ValidationError):
+    """交易签名缺失或无效"""
+
+
+def crypto_available() -> bool:
+    """是否安装了pycryptodome"""
+    return ECC is not None
+
+
+def _require_crypto() -> None:
+    if ECC is None:
+        raise SignatureError("pycryptodome is required for transaction signatures")
+
+
+def transaction_message(data: Dict[str, Any]) -> bytes:
+    """交易的规范化签名消息: 除signature外全部字段的紧凑有序JSON"""
+    unsigned = {key: value for key, value in data.items() if key != "signature"}
+    return json.dumps(unsigned, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=SIGNATURE_SETTINGS["key_cache_size"])
+def load_public_key(public_key: str) -> Any:
+    """解析十六进制DER公钥, 结果按进程缓存"""
+    _require_crypto()
+    return ECC.import_key(bytes.fromhex(public_key))
+
+
+def _scheme(algorithm: str, key: Any) -> Any:
+    """创建签名/验签对象"""
+    if algorithm == "ed25519":
+        return eddsa.new(key, "rfc8032")
+    if algorithm == "ecdsa-p256":
+        return DSS.new(key, "fips-186-3")
+    raise SignatureError(f"Unsupported signature algorithm: {algorithm}")
+
+
+def _payload(algorithm: str, message: bytes) -> Any:
+    """Ed25519直接签名消息, ECDSA签名消息的SHA256摘要"""
+    return message if algorithm == "ed25519" else SHA256.new(message)
+
+
+def verify_transaction(data: Dict[str, Any]) -> bool:
+    """校验交易签名"""
+    _require_crypto()
+    signature = data.get("signature")
+    if not isinstance(signature, dict):
+        return False
+    try:
+        algorithm = signature["algorithm"]
+        key = load_public_key(signature["public_key"])
+        _scheme(algorithm, key).verify(
+            _payload(algorithm, transaction_message(data)),
+            bytes.fromhex(signature["value"])
+        )
+        return True
+    except (KeyError, TypeError, ValueError, SignatureError):
+        return False
+
+
+def verify_batch(transactions: List[Dict[str, Any]]) -> List[bool]:
+    """逐条校验一批交易 (进程池任务单元)"""
+    return [verify_transaction(data) for data in transactions]
+
+
+class TransactionSigner:
+    def __init__(self, key: Any, algorithm: str = "ed25519") -> None:
+        """初始化交易签名器"""
+        _require_crypto()
+        if algorithm not in CURVES:
+            raise SignatureError(f"Unsupported signature algorithm: {algorithm}")
+        self.key = key
+        self.algorithm = algorithm
+        self.public_key = key.public_key().export_key(format="DER").hex()
+        self._scheme = _scheme(algorithm, key)
+
+    @classmethod
+    def generate(cls, algorithm: str = "ed25519") -> "TransactionSigner":
+        """生成新密钥"""
+        _require_crypto()
+        if algorithm not in CURVES:
+            raise SignatureError(f"Unsupported signature algorithm: {algorithm}")
+        return cls(ECC.generate(curve=CURVES[algorithm]), algorithm)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None, algorithm: Optional[str] = None) -> "TransactionSigner":
+        """读取PEM私钥文件, 不存在时生成新密钥并保存 (仅所有者可读)"""
+        path = Path(path or BLOCKCHAIN_DATA_DIR / SIGNATURE_SETTINGS["key_file"])
+        algorithm = algorithm or SIGNATURE_SETTINGS["algorithm"]
+        _require_crypto()
+        if path.exists():
+            return cls(ECC.import_key(path.read_text(encoding="utf-8")), algorithm)
+        signer = cls.generate(algorithm)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(signer.key.export_key(format="PEM"))
+        return signer
+
+    def sign(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """为交易添加签名字段并返回该交易"""
+        value = self._scheme.sign(_payload(self.algorithm, transaction_message(data)))
+        data["signature"] = {
+            "algorithm": self.algorithm,
+            "public_key": self.public_key,
+            "value": value.hex()
+        }
+        return data
+
+
+class SignerIndex(BlockIndex):
+    # 未加载链时追加的区块同样需要记录绑定, 已有的绑定由Blockchain从存储补齐
+    requires_full_chain = False
+
+    def __init__(self) -> None:
+        """初始化用户ID -> 公钥的绑定索引, 以用户首个签名交易的公钥为准
+
+        complete为False时索引只包含部分绑定 (未加载链时追加的区块和从存储查询过的用户)。
+        """
+        self._keys: Dict[str, str] = {}
+        # 已从存储查询过的用户ID (包括没有绑定的用户)
+        self._queried: Set[str] = set()
+        self.complete = False
+
+    def rebuild(self, blocks: Iterable[Any]) -> None:
+        keys: Dict[str, str] = {}
+        for block in blocks:
+            signature = block.data.get("signature")
+            if isinstance(signature, dict):
+                keys.setdefault(block.data.get("user_id"), signature.get("public_key"))
+        self._keys = keys
+        self._queried = set()
+        self.complete = True
+
+    def known(self, user_id: str) -> bool:
+        """用户的绑定是否已在索引中确定"""
+        return self.complete or user_id in self._keys or user_id in self._queried
+
+    def bind(self, user_id: str, public_key: Optional[str]) -> None:
+        """记录从存储查询到的绑定, public_key为None表示该用户尚未绑定公钥"""
+        self._queried.add(user_id)
+        if public_key is not None:
+            self._keys.setdefault(user_id, public_key)
+
+    def add(self, block: Any) -> None:
+        signature = block.data.get("signature")
+        if isinstance(signature, dict):
+            self._keys.setdefault(block.data.get("user_id"), signature.get("public_key"))
+
+    def get(self, user_id: str) -> Optional[str]:
+        """用户绑定的公钥"""
+        return self._keys.get(user_id)
+
+
+class TransactionVerifier:
+    def __init__(self, require: Optional[bool] = None, workers: Optional[int] = None,
+                 batch_size: Optional[int] = None, parallel_threshold: Optional[int] = None) -> None:
+        """初始化交易签名校验器
+
+        require为True时所有交易都必须签名; 否则未签名交易仅在其用户ID
+        尚未绑定公钥时允许 (兼容启用签名之前的历史交易)。
+        整链校验在交易数达到parallel_threshold时按batch_size分批提交到进程池,
+        进程池常驻以保留各工作进程的公钥解析缓存。
+        """
+        self.require = SIGNATURE_SETTINGS["require"] if require is None else require
+        self.workers = workers or SIGNATURE_SETTINGS["workers"] or os.cpu_count() or 1
+        self.batch_size = batch_size or SIGNATURE_SETTINGS["batch_size"]
+        self.parallel_threshold = parallel_threshold or SIGNATURE_SETTINGS["parallel_threshold"]
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def check(self, data: Dict[str, Any], bound_key: Optional[str] = None) -> None:
+        """追加前校验单笔交易, bound_key为该用户已绑定的公钥"""
+        signature = data.get("signature")
+        if signature is None:
+            if self.require or bound_key is not None:
+                raise SignatureError("Transaction signature required")
+            return
+        if bound_key is not None and signature.get("public_key") != bound_key:
+            raise SignatureError("Public key does not match the key bound to this user")
+        if not verify_transaction(data):
+            raise SignatureError("Invalid transaction signature")
+
+    def verify_many(self, transactions: List[Dict[str, Any]]) -> List[bool]:
+        """批量校验签名, 交易较多时并行"""
+        if self.workers <= 1 or len(transactions) < self.parallel_threshold:
+            return verify_batch(transactions)
+        _require_crypto()
+        batches = [transactions[i:i + self.batch_size] for i in range(0, len(transactions), self.batch_size)]
+        results: List[bool] = []
+        for batch_results in self._pool().map(verify_batch, batches):
+            results.extend(batch_results)
+        return results
+
+    def verify_chain(self, transactions: List[Dict[str, Any]]) -> bool:
+        """按链顺序校验全部交易的签名及用户公钥绑定"""
+        signed = []
+        bindings: Dict[str, str] = {}
+        for data in transactions:
+            signature = data.get("signature")
+            user_id = data.get("user_id")
+            if signature is None:
+                if self.require or user_id in bindings:
+                    return False
+                continue
+            if not isinstance(signature, dict):
+                return False
+            if bindings.setdefault(user_id, signature.get("public_key")) != signature.get("public_key"):
+                return False
+            signed.append(data)
+        return all(self.verify_many(signed))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """按需创建常驻进程池"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def close(self) -> None:
+        """关闭进程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from .indexes import BlockIndex, TimeBound, normalize_time
+
+if TYPE_CHECKING:
+    from .blockchain import Block, Blockchain
+
+
+class ChainSnapshot:
+    def __init__(self, blockchain: "Blockchain", chain: Optional[List["Block"]], height: int,
+                 content_index: Dict[str, List[int]], indexes: Dict[int, BlockIndex]) -> None:
+        """初始化固定高度的只读链视图
+
+        链只追加, 加载时整体替换列表引用, 因此持有列表引用并限定高度即可得到
+        一致的前缀; 内容索引只追加高度, 二级索引使用各自的快照视图。
+        chain为None时直接从支持索引查询的存储读取, 同样只返回高度以内的区块。
+        创建和读取快照都不加锁, 写线程可以同时追加。
+        """
+        self.blockchain = blockchain
+        self.height = height
+        self.difficulty = blockchain.difficulty
+        self.consensus = blockchain.consensus
+        self._chain = chain
+        self._content_index = content_index
+        self._indexes = indexes
+        self._tip: Optional["Block"] = None
+
+    def __len__(self) -> int:
+        return self.height
+
+    def get_block(self, height: int) -> "Block":
+        """读取快照内指定高度的区块"""
+        from .blockchain import Block
+
+        if not 0 <= height < self.height:
+            raise IndexError(f"Block {height} out of range for snapshot at height {self.height}")
+        if self._chain is not None:
+            return self._chain[height]
+        return Block.from_dict(self.blockchain.storage.read_block(height), self.blockchain.hash_scheme.block)
+
+    def get_latest_block(self) -> "Block":
+        """快照内的最新区块"""
+        if self._tip is None:
+            self._tip = self.get_block(self.height - 1)
+        return self._tip
+
+    def iter_blocks(self) -> Iterator["Block"]:
+        """按高度遍历快照内的全部区块"""
+        return self.blocks_from(0)
+
+    def blocks_from(self, start: int) -> Iterator["Block"]:
+        """从指定高度遍历到快照高度"""
+        from .blockchain import Block
+
+        if self._chain is not None:
+            chain = self._chain
+            for i in range(start, self.height):
+                yield chain[i]
+            return
+        algorithm = self.blockchain.hash_scheme.block
+        for block_data in self.blockchain.storage.iter_blocks(start):
+            if block_data["index"] >= self.height:
+                return
+            yield Block.from_dict(block_data, algorithm)
+
+    def find_blocks(self, content_hash: str) -> List["Block"]:
+        """按内容哈希查找快照内的区块 (按高度排序)"""
+        from .blockchain import Block
+
+        # 布隆过滤器只增不减, 对更早的快照同样成立
+        if not self.blockchain.might_contain(content_hash):
+            return []
+        if self._chain is None:
+            algorithm = self.blockchain.hash_scheme.block
+            return [
+                Block.from_dict(block_data, algorithm)
+                for block_data in self.blockchain.storage.find_blocks(content_hash=content_hash)
+                if block_data["index"] < self.height
+            ]
+        chain = self._chain
+        return [chain[i] for i in self._content_index.get(content_hash, ()) if i < self.height]
+
+    def iter_time_range(self, start: TimeBound, end: TimeBound) -> Iterator["Block"]:
+        """按时间戳遍历闭区间内的快照区块 (按时间排序)"""
+        from .blockchain import Block
+
+        if self._chain is None:
+            algorithm = self.blockchain.hash_scheme.block
+            for block_data in self.blockchain.storage.iter_time_range(normalize_time(start), normalize_time(end)):
+                if block_data["index"] < self.height:
+                    yield Block.from_dict(block_data, algorithm)
+            return
+        chain = self._chain
+        for height in self.index(self.blockchain.time_index).heights(start, end):
+            yield chain[height]
+
+    def index(self, index: BlockIndex) -> BlockIndex:
+        """已注册二级索引在快照高度上的视图 (需以load=True创建快照)"""
+        if self._chain is None:
+            raise ValueError("Secondary indexes are only available on loaded snapshots")
+        view = self._indexes.get(id(index))
+        if view is None:
+            raise KeyError(f"{type(index).__name__} is not registered with the blockchain")
+        return view
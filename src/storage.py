@@ -0,0 +1,523 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import threading
+from pathlib import Path
+from .archive import ArchiveError, BlockArchive
+from .compression import BlockCodec, preset_dictionary, train_dictionary
+from .utils.helpers import load_json_file, save_json_file
+from config.settings import BLOCKCHAIN_DATA_DIR, COMPRESSION_SETTINGS, PRUNE_SETTINGS, STORAGE_SETTINGS
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+class ChainStorage(ABC):
+    """区块链持久化接口
+
+    save接收完整的内存链, 由各后端自行决定是整体重写还是只追加新区块。
+    random_access为True的后端可以不加载整条链读取链尾、元数据并直接追加;
+    indexed_lookups为True的后端可直接按交易字段索引查询。
+    supports_pruning为True的后端可将旧区块体移入归档, 只保留区块头和索引列。
+    """
+    random_access = False
+    indexed_lookups = False
+    supports_pruning = False
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """存储是否已初始化"""
+
+    @property
+    @abstractmethod
+    def height(self) -> int:
+        """已持久化的区块数量"""
+
+    @abstractmethod
+    def load(self) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        """加载全部区块和链元数据"""
+
+    @abstractmethod
+    def save(self, chain: Sequence[Any], metadata: Dict[str, Any]) -> None:
+        """持久化区块链 (chain中的元素需提供to_dict)"""
+
+    @abstractmethod
+    def index_path(self, name: str) -> Path:
+        """辅助索引文件的存放路径"""
+
+    def fingerprint(self) -> Optional[str]:
+        """代表当前已持久化状态的廉价标识, 用于判断辅助索引是否与存储一致"""
+        return str(self.height)
+
+    def get_metadata(self) -> Dict[str, Any]:
+        """读取链元数据"""
+        return self.load()[1]
+
+    def append(self, blocks: List[Dict[str, Any]], metadata: Dict[str, Any]) -> None:
+        """直接追加区块 (仅random_access后端支持)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support direct append")
+
+    def prune(self, below_height: int, vacuum: bool = False) -> Dict[str, Any]:
+        """将低于below_height的区块体移入归档 (仅supports_pruning后端支持)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support pruning")
+
+    def iter_headers(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """从指定高度开始顺序遍历区块头 (高度、哈希、前一区块哈希、时间戳)"""
+        for block in self.iter_blocks(start):
+            yield {
+                "index": block["index"],
+                "hash": block["hash"],
+                "previous_hash": block["previous_hash"],
+                "timestamp": block["timestamp"]
+            }
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """从指定高度开始顺序遍历区块"""
+        blocks, _ = self.load()
+        for block in blocks:
+            if block["index"] >= start:
+                yield block
+
+    def read_block(self, height: int) -> Dict[str, Any]:
+        """读取指定高度的区块"""
+        for block in self.iter_blocks(height):
+            return block
+        raise IndexError(f"Block {height} out of range")
+
+    def find_blocks(self, content_hash: Optional[str] = None, user_id: Optional[str] = None,
+                    block_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按交易字段查找区块, 默认实现为顺序扫描"""
+        results = []
+        for block in self.iter_blocks():
+            data = block["data"]
+            if content_hash is not None and data.get("content_hash") != content_hash:
+                continue
+            if user_id is not None and data.get("user_id") != user_id:
+                continue
+            if block_type is not None and data.get("type") != block_type:
+                continue
+            results.append(block)
+        return results
+
+    def iter_time_range(self, start: str, end: str) -> Iterator[Dict[str, Any]]:
+        """按区块时间戳闭区间遍历区块, 默认实现为顺序扫描"""
+        for block in sorted((b for b in self.iter_blocks() if start <= b["timestamp"] <= end),
+                            key=lambda b: (b["timestamp"], b["index"])):
+            yield block
+
+    def close(self) -> None:
+        """释放存储资源"""
+
+
+class JsonFileStorage(ChainStorage):
+    def __init__(self, chain_file: Path) -> None:
+        """初始化单文件JSON存储"""
+        self.chain_file = Path(chain_file)
+        self._height = 0
+
+    def exists(self) -> bool:
+        return self.chain_file.exists()
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def index_path(self, name: str) -> Path:
+        return self.chain_file.parent / f"{self.chain_file.stem}_indexes" / name
+
+    def fingerprint(self) -> Optional[str]:
+        # 未加载时无法得知高度, 以文件大小和修改时间标识
+        if not self.chain_file.exists():
+            return None
+        stat = self.chain_file.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def load(self) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        chain_data = load_json_file(self.chain_file)
+        blocks = chain_data.get("chain", [])
+        self._height = len(blocks)
+        return iter(blocks), chain_data.get("metadata", {})
+
+    def save(self, chain: Sequence[Any], metadata: Dict[str, Any]) -> None:
+        chain_data = {
+            "chain": [block.to_dict() for block in chain],
+            "metadata": metadata
+        }
+        self.chain_file.parent.mkdir(parents=True, exist_ok=True)
+        if not save_json_file(chain_data, self.chain_file):
+            raise OSError(f"Failed to save chain to {self.chain_file}")
+        self._height = len(chain_data["chain"])
+
+
+class SQLiteStorage(ChainStorage):
+    random_access = True
+    indexed_lookups = True
+    supports_pruning = True
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blocks (
+            height INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL,
+            previous_hash TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            type TEXT,
+            content_hash TEXT,
+            user_id TEXT,
+            body TEXT NOT NULL,
+            archive_id INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_blocks_content_hash ON blocks(content_hash);
+        CREATE INDEX IF NOT EXISTS idx_blocks_user_id ON blocks(user_id);
+        CREATE INDEX IF NOT EXISTS idx_blocks_type ON blocks(type);
+        CREATE INDEX IF NOT EXISTS idx_blocks_timestamp ON blocks(timestamp);
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dictionaries (
+            id TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS archives (
+            id INTEGER PRIMARY KEY,
+            first_height INTEGER NOT NULL,
+            last_height INTEGER NOT NULL,
+            count INTEGER NOT NULL
+        );
+    """
+    # 归档区块在线保留的区块头字段 (哈希、前一区块哈希和时间戳已在独立的列中)
+    HEADER_FIELDS = ("index", "nonce", "difficulty", "signature", "signer")
+
+    def __init__(self, db_file: Path, compression: Optional[str] = None) -> None:
+        """初始化SQLite存储
+
+        使用WAL模式: 写连接在事务中追加区块, 每个读线程使用各自的只读连接,
+        读写互不阻塞。compression为zlib时区块体以共享字典逐块压缩为BLOB,
+        随机读取仍只需解压单个区块; 未压缩的TEXT区块体照常读取。
+        prune之后旧区块的区块体移入<库名>_archive目录下的压缩归档, 在线只保留
+        区块头和索引列; 读取这些区块时按需从归档恢复, 对调用方透明。
+        """
+        if compression not in (None, "zlib"):
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.db_file = Path(db_file)
+        self.compression = compression
+        self._codec: Optional[BlockCodec] = None
+        self._write_conn: Optional["sqlite3.Connection"] = None
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List["sqlite3.Connection"] = []
+        self.archive = BlockArchive(self.db_file.parent / f"{self.db_file.stem}_archive")
+        # 最低的未归档高度, 首次使用时查询
+        self._prunable_from: Optional[int] = None
+
+    def index_path(self, name: str) -> Path:
+        return self.db_file.parent / f"{self.db_file.stem}_indexes" / name
+
+    def exists(self) -> bool:
+        if not self.db_file.exists():
+            return False
+        return self._read_conn().execute("SELECT 1 FROM blocks LIMIT 1").fetchone() is not None
+
+    def _writer(self) -> "sqlite3.Connection":
+        """获取写连接, 首次使用时建表"""
+        if self._write_conn is None:
+            import sqlite3
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(blocks)")}
+            if "archive_id" not in columns:
+                # 引入归档之前创建的库
+                conn.execute("ALTER TABLE blocks ADD COLUMN archive_id INTEGER")
+            self._write_conn = conn
+        return self._write_conn
+
+    def _read_conn(self) -> "sqlite3.Connection":
+        """获取当前线程的只读连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            if not self.db_file.exists():
+                with self._write_lock:
+                    self._writer()
+            conn = sqlite3.connect(f"{self.db_file.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._write_lock:
+                self._readers.append(conn)
+        return conn
+
+    @property
+    def height(self) -> int:
+        if not self.db_file.exists():
+            return 0
+        row = self._read_conn().execute("SELECT MAX(height) FROM blocks").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def load(self) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        return self.iter_blocks(), self.get_metadata()
+
+    def fingerprint(self) -> Optional[str]:
+        if not self.db_file.exists():
+            return None
+        row = self._read_conn().execute("SELECT height, hash FROM blocks ORDER BY height DESC LIMIT 1").fetchone()
+        return None if row is None else f"{row[0] + 1}:{row[1]}"
+
+    def get_metadata(self) -> Dict[str, Any]:
+        """读取链元数据"""
+        if not self.db_file.exists():
+            return {}
+        rows = self._read_conn().execute("SELECT key, value FROM metadata").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def save(self, chain: Sequence[Any], metadata: Dict[str, Any]) -> None:
+        with self._write_lock:
+            row = self._writer().execute("SELECT MAX(height) FROM blocks").fetchone()
+            start = 0 if row[0] is None else row[0] + 1
+            self._append([chain[i].to_dict() for i in range(start, len(chain))], metadata)
+
+    def append(self, blocks: List[Dict[str, Any]], metadata: Dict[str, Any]) -> None:
+        with self._write_lock:
+            self._append(blocks, metadata)
+
+    def _load_codec(self, conn: "sqlite3.Connection") -> Optional[BlockCodec]:
+        """读取库中保存的压缩字典"""
+        if self._codec is None:
+            row = conn.execute("SELECT data FROM dictionaries LIMIT 1").fetchone()
+            if row is not None:
+                self._codec = BlockCodec(row[0])
+        return self._codec
+
+    def _writer_codec(self, blocks: List[Dict[str, Any]]) -> BlockCodec:
+        """获取写入用的编解码器, 首次压缩时以已有区块 (或待写入区块) 训练字典并保存"""
+        conn = self._writer()
+        codec = self._load_codec(conn)
+        if codec is None:
+            limit = COMPRESSION_SETTINGS["sample_blocks"]
+            samples = [json.loads(body) for (body,) in conn.execute(
+                "SELECT body FROM blocks WHERE typeof(body) = 'text' AND archive_id IS NULL "
+                "ORDER BY height DESC LIMIT ?", (limit,)
+            )]
+            samples.extend(blocks[:max(0, limit - len(samples))])
+            dictionary = train_dictionary(samples) if len(samples) >= 2 else b""
+            dictionary = dictionary or preset_dictionary()
+            codec = BlockCodec(dictionary)
+            with conn:
+                conn.execute("INSERT INTO dictionaries VALUES (?, ?)", (codec.dictionary_id, dictionary))
+            self._codec = codec
+        return codec
+
+    def _decode(self, body: Any) -> Dict[str, Any]:
+        """解码区块体: TEXT为JSON, BLOB为压缩后的区块, 已归档的区块头从归档恢复"""
+        if isinstance(body, bytes):
+            return self._load_codec(self._read_conn()).decode_block(body)
+        block = json.loads(body)
+        if "archive" in block:
+            return self._restore(block)
+        return block
+
+    def _encode(self, blocks: List[Dict[str, Any]]) -> List[Any]:
+        """编码写入的区块体"""
+        codec = self._writer_codec(blocks) if self.compression and blocks else None
+        if codec is not None:
+            return [codec.encode_block(block) for block in blocks]
+        return [json.dumps(block, ensure_ascii=False) for block in blocks]
+
+    def _restore(self, header: Dict[str, Any]) -> Dict[str, Any]:
+        """从归档读取完整区块并与在线区块头核对 (帧校验和记录在在线区块头中)"""
+        height = header["index"]
+        try:
+            block = self.archive.read(header["archive"], height)
+        except ArchiveError:
+            # 归档可能刚被restore写回在线存储后删除
+            row = self._read_conn().execute(
+                "SELECT body, archive_id FROM blocks WHERE height = ?", (height,)
+            ).fetchone()
+            if row is None or row[1] is not None:
+                raise
+            return self._decode(row[0])
+        if any(block.get(field) != header.get(field) for field in ("nonce", "difficulty", "signature")):
+            raise ArchiveError(f"Archived block {height} does not match its header")
+        return block
+
+    def _append(self, blocks: List[Dict[str, Any]], metadata: Dict[str, Any]) -> None:
+        """在单个事务中写入区块和元数据"""
+        conn = self._writer()
+        rows = []
+        for block, body in zip(blocks, self._encode(blocks)):
+            data = block["data"]
+            rows.append((
+                block["index"], block["hash"], block["previous_hash"], block["timestamp"],
+                data.get("type"), data.get("content_hash"), data.get("user_id"), body
+            ))
+        with conn:
+            conn.executemany(
+                "INSERT INTO blocks (height, hash, previous_hash, timestamp, type, content_hash, user_id, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in metadata.items()]
+            )
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        if not self.db_file.exists():
+            return
+        cursor = self._read_conn().execute(
+            "SELECT body FROM blocks WHERE height >= ? ORDER BY height", (start,)
+        )
+        for (body,) in cursor:
+            yield self._decode(body)
+
+    def read_block(self, height: int) -> Dict[str, Any]:
+        row = None
+        if self.db_file.exists():
+            row = self._read_conn().execute("SELECT body FROM blocks WHERE height = ?", (height,)).fetchone()
+        if row is None:
+            raise IndexError(f"Block {height} out of range")
+        return self._decode(row[0])
+
+    def find_blocks(self, content_hash: Optional[str] = None, user_id: Optional[str] = None,
+                    block_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses = []
+        params = []
+        for column, value in (("content_hash", content_hash), ("user_id", user_id), ("type", block_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if not self.db_file.exists():
+            return []
+        rows = self._read_conn().execute(f"SELECT body FROM blocks {where} ORDER BY height", params)
+        return [self._decode(body) for (body,) in rows]
+
+    def iter_time_range(self, start: str, end: str) -> Iterator[Dict[str, Any]]:
+        if not self.db_file.exists():
+            return
+        cursor = self._read_conn().execute(
+            "SELECT body FROM blocks WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp, height", (start, end)
+        )
+        for (body,) in cursor:
+            yield self._decode(body)
+
+    def iter_headers(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        if not self.db_file.exists():
+            return
+        cursor = self._read_conn().execute(
+            "SELECT height, hash, previous_hash, timestamp FROM blocks WHERE height >= ? ORDER BY height", (start,)
+        )
+        for height, block_hash, previous_hash, timestamp in cursor:
+            yield {"index": height, "hash": block_hash, "previous_hash": previous_hash, "timestamp": timestamp}
+
+    def prunable_from(self) -> int:
+        """最低的未归档高度"""
+        if self._prunable_from is None:
+            if not self.db_file.exists():
+                return 0
+            row = self._read_conn().execute(
+                "SELECT MIN(height) FROM blocks WHERE archive_id IS NULL"
+            ).fetchone()
+            self._prunable_from = self.height if row[0] is None else row[0]
+        return self._prunable_from
+
+    def prune(self, below_height: int, vacuum: bool = False) -> Dict[str, Any]:
+        """将低于below_height的在线区块体移入压缩归档
+
+        每个归档文件最多PRUNE_SETTINGS["archive_blocks"]个区块, 先写归档文件,
+        再在一个事务中把对应行的区块体替换为带归档位置的区块头。
+        vacuum为True时随后执行VACUUM归还磁盘空间 (否则空闲页留给之后的写入复用)。
+        """
+        batch = PRUNE_SETTINGS["archive_blocks"]
+        archived = 0
+        archives = 0
+        with self._write_lock:
+            conn = self._writer()
+            while True:
+                rows = conn.execute(
+                    "SELECT body FROM blocks WHERE height < ? AND archive_id IS NULL ORDER BY height LIMIT ?",
+                    (below_height, batch)
+                ).fetchall()
+                if not rows:
+                    break
+                blocks = [self._decode(body) for (body,) in rows]
+                archive_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM archives").fetchone()[0]
+                pointers = self.archive.write(archive_id, blocks)
+                updates = []
+                for block, pointer in zip(blocks, pointers):
+                    header = {"archive": pointer}
+                    header.update((field, block[field]) for field in self.HEADER_FIELDS if field in block)
+                    updates.append((json.dumps(header, ensure_ascii=False), archive_id, block["index"]))
+                with conn:
+                    conn.execute("INSERT INTO archives VALUES (?, ?, ?, ?)",
+                                 (archive_id, blocks[0]["index"], blocks[-1]["index"], len(blocks)))
+                    conn.executemany("UPDATE blocks SET body = ?, archive_id = ? WHERE height = ?", updates)
+                archived += len(blocks)
+                archives += 1
+            self._prunable_from = None
+            if vacuum and archived:
+                conn.execute("VACUUM")
+                # WAL模式下VACUUM的结果在检查点之后才写回主库文件
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "archived_blocks": archived,
+            "archives": archives
+        }
+
+    def restore(self, start: int = 0, end: Optional[int] = None) -> int:
+        """将与[start, end)相交的归档写回在线存储并删除归档文件, 返回恢复的区块数"""
+        restored = 0
+        with self._write_lock:
+            conn = self._writer()
+            archive_ids = [row[0] for row in conn.execute(
+                "SELECT id FROM archives WHERE last_height >= ? AND first_height < ? ORDER BY id",
+                (start, end if end is not None else self.height)
+            )]
+            for archive_id in archive_ids:
+                rows = conn.execute(
+                    "SELECT body FROM blocks WHERE archive_id = ? ORDER BY height", (archive_id,)
+                ).fetchall()
+                blocks = [self._decode(body) for (body,) in rows]
+                updates = [(body, block["index"]) for block, body in zip(blocks, self._encode(blocks))]
+                with conn:
+                    conn.executemany("UPDATE blocks SET body = ?, archive_id = NULL WHERE height = ?", updates)
+                    conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+                self.archive.delete(archive_id)
+                restored += len(blocks)
+            self._prunable_from = None
+        return restored
+
+    def archive_stats(self) -> Dict[str, Any]:
+        """归档状态"""
+        if not self.db_file.exists():
+            return {"archived_blocks": 0, "archives": 0, "archive_bytes": 0, "prunable_from": 0}
+        count, blocks = self._read_conn().execute("SELECT COUNT(*), COALESCE(SUM(count), 0) FROM archives").fetchone()
+        return {
+            "archived_blocks": blocks,
+            "archives": count,
+            "archive_bytes": self.archive.size(),
+            "prunable_from": self.prunable_from()
+        }
+
+    def close(self) -> None:
+        with self._write_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._local = threading.local()
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
+
+
+def create_storage(backend: Optional[str] = None, path: Optional[Path] = None) -> ChainStorage:
+    """按配置创建存储后端: json / segmented / sqlite"""
+    backend = backend or STORAGE_SETTINGS["backend"]
+    if backend == "json":
+        return JsonFileStorage(path or BLOCKCHAIN_DATA_DIR / STORAGE_SETTINGS["json_file"])
+    if backend == "segmented":
+        from .segments import SegmentedChainStore
+        return SegmentedChainStore(path or BLOCKCHAIN_DATA_DIR / STORAGE_SETTINGS["segment_dir"])
+    if backend == "sqlite":
+        return SQLiteStorage(path or BLOCKCHAIN_DATA_DIR / STORAGE_SETTINGS["sqlite_file"],
+                             STORAGE_SETTINGS["compression"])
+    raise ValueError(f"Unsupported storage backend: {backend}")
@@ -1,10 +1,17 @@
 from datetime import datetime, UTC
 import hashlib
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from pathlib import Path
 from config.settings import get_current_timestamp, get_user_id
 
+# 支持的哈希算法, 摘要均为32字节 (64位十六进制), 与存储和索引的列宽一致
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "blake2b": lambda data: hashlib.blake2b(data, digest_size=32)
+}
+DEFAULT_HASH_ALGORITHM = "sha256"
+
 def get_current_info() -> Dict[str, str]:
     """获取当前用户和时间信息"""
     return {
@@ -12,13 +19,30 @@ def get_current_info() -> Dict[str, str]:
         "timestamp": get_current_timestamp()
     }
 
-def calculate_hash(data: Any) -> str:
-    """计算数据的SHA256哈希值"""
+def calculate_hash(data: Any, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """计算数据的哈希值 (默认SHA256)"""
     if isinstance(data, (dict, list)):
         data = json.dumps(data, sort_keys=True)
     elif not isinstance(data, str):
         data = str(data)
-    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    return HASH_ALGORITHMS[algorithm](data.encode('utf-8')).hexdigest()
+
+def calculate_block_hash(index: int, timestamp: str, data: Dict[str, Any],
+                         previous_hash: str, nonce: int,
+                         algorithm: str = DEFAULT_HASH_ALGORITHM,
+                         difficulty: Optional[int] = None) -> str:
+    """计算区块头字段的哈希值, 区块记录了难度时难度也参与哈希"""
+    fields = {
+        "index": index,
+        "timestamp": timestamp,
+        "data": data,
+        "previous_hash": previous_hash,
+        "nonce": nonce
+    }
+    if difficulty is not None:
+        fields["difficulty"] = difficulty
+    block_string = json.dumps(fields, sort_keys=True)
+    return calculate_hash(block_string, algorithm)
 
 def validate_metadata(metadata: Dict[str, Any]) -> bool:
     """验证元数据格式"""
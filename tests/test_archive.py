@@ -0,0 +1,157 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from src.archive import ArchiveError
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.storage import JsonFileStorage, SQLiteStorage
+from src.utils.helpers import calculate_hash
+from config.settings import PRUNE_SETTINGS
+
+
+class TestPruning(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.saved_settings = dict(PRUNE_SETTINGS)
+        PRUNE_SETTINGS.update({"archive_blocks": 8, "frame_blocks": 3})
+
+    def tearDown(self):
+        PRUNE_SETTINGS.clear()
+        PRUNE_SETTINGS.update(self.saved_settings)
+        self.tmp_dir.cleanup()
+
+    def open_chain(self, compression=None):
+        storage = SQLiteStorage(self.tmp_path / "chain.db", compression)
+        blockchain = Blockchain(storage=storage, consensus=NoWork())
+        return blockchain, CopyrightProtection(ContentRegistry(blockchain))
+
+    def protect(self, protection, start, count):
+        for i in range(start, start + count):
+            result = protection.protect_ai_content(f"archived content {i}", f"Title {i}", "Pruning test", "GPT-4")
+            self.assertEqual(result["status"], "success")
+
+    def check_prune_and_read(self, compression):
+        blockchain, protection = self.open_chain(compression)
+        self.protect(protection, 0, 20)
+        before = [blockchain.storage.read_block(i) for i in range(21)]
+
+        result = blockchain.prune(15)
+        self.assertEqual(result, {"archived_blocks": 15, "archives": 2})
+        self.assertEqual(blockchain.prune(15)["archived_blocks"], 0)
+        stats = blockchain.storage.archive_stats()
+        self.assertEqual(stats["archived_blocks"], 15)
+        self.assertEqual(stats["prunable_from"], 15)
+        self.assertGreater(stats["archive_bytes"], 0)
+        # 在线只保留区块头
+        body = blockchain.storage._read_conn().execute("SELECT body FROM blocks WHERE height = 3").fetchone()[0]
+        self.assertNotIn("metadata", body)
+        blockchain.close()
+
+        reopened, protection = self.open_chain(compression)
+        self.assertTrue(reopened.verify_headers())
+        self.assertTrue(protection.verify_ownership("archived content 2")["verified"])
+        self.assertEqual(protection.get_content_history("archived content 5")["count"], 1)
+        self.assertFalse(reopened.loaded)
+        self.assertEqual([reopened.storage.read_block(i) for i in range(21)], before)
+        self.assertTrue(reopened.is_chain_valid())
+        self.assertEqual(protection.update_license("archived content 1", "MIT")["status"], "success")
+        reopened.close()
+
+    def test_prune_and_read(self):
+        """测试归档后区块头在线, 区块体按需恢复"""
+        self.check_prune_and_read(None)
+
+    def test_prune_compressed(self):
+        """测试压缩存储的区块同样可以归档和恢复"""
+        self.check_prune_and_read("zlib")
+
+    def test_restore(self):
+        """测试将归档写回在线存储"""
+        blockchain, protection = self.open_chain()
+        self.protect(protection, 0, 20)
+        blockchain.prune(16)
+        archive_dir = blockchain.storage.archive.directory
+        self.assertEqual(len(list(archive_dir.glob("*.zdf"))), 2)
+
+        self.assertEqual(blockchain.storage.restore(0, 4), 8)
+        self.assertEqual(len(list(archive_dir.glob("*.zdf"))), 1)
+        self.assertEqual(blockchain.storage.prunable_from(), 0)
+        self.assertEqual(blockchain.storage.restore(), 8)
+        self.assertEqual(blockchain.storage.archive_stats()["archived_blocks"], 0)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+    def test_tampered_archive(self):
+        """测试归档被篡改时拒绝恢复"""
+        blockchain, protection = self.open_chain()
+        self.protect(protection, 0, 10)
+        blockchain.prune(8)
+        blockchain.close()
+
+        path = blockchain.storage.archive.path(1)
+        data = bytearray(path.read_bytes())
+        data[5] ^= 0xFF
+        path.write_bytes(bytes(data))
+        reopened, _ = self.open_chain()
+        with self.assertRaises(ArchiveError):
+            reopened.storage.read_block(1)
+        self.assertTrue(reopened.verify_headers())
+        reopened.close()
+
+    def test_auto_prune(self):
+        """测试启用自动归档时写入后只保留最新的区块体在线"""
+        PRUNE_SETTINGS.update({"enabled": True, "keep_recent": 5})
+        blockchain, protection = self.open_chain()
+        self.assertTrue(blockchain.auto_prune)
+        self.protect(protection, 0, 30)
+        stats = blockchain.storage.archive_stats()
+        self.assertGreaterEqual(stats["archived_blocks"], 16)
+        self.assertLessEqual(blockchain.height - stats["prunable_from"], 5 + 8)
+        self.assertTrue(protection.verify_ownership("archived content 0")["verified"])
+        blockchain.close()
+
+    def test_concurrent_reads(self):
+        """测试归档期间读者始终读到完整区块"""
+        blockchain, protection = self.open_chain()
+        self.protect(protection, 0, 40)
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    for i in range(0, 40, 7):
+                        if not protection.registry.verify_content_hash(calculate_hash(f"archived content {i}"))["verified"]:
+                            errors.append(i)
+                except Exception as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            blockchain.prune(35)
+            blockchain.storage.restore()
+            blockchain.prune(35)
+        finally:
+            stop.set()
+            reader.join()
+        self.assertEqual(errors, [])
+        blockchain.close()
+
+    def test_unsupported_storage(self):
+        """测试不支持归档的存储"""
+        blockchain = Blockchain(storage=JsonFileStorage(self.tmp_path / "chain.json"), consensus=NoWork())
+        self.assertFalse(blockchain.auto_prune)
+        with self.assertRaises(ValueError):
+            blockchain.prune(1)
+        self.assertTrue(blockchain.verify_headers())
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
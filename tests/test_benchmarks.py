@@ -0,0 +1,108 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from benchmarks.synthetic import synthetic_content, write_chain_file
+from benchmarks.bench_registry import main, percentile
+from benchmarks import bench_compression, workload
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_synthetic_chain(self):
+        """测试合成链可加载且有效"""
+        chain_file = write_chain_file(self.tmp_path / "chain.json", 50)
+        blockchain = Blockchain(chain_file, consensus=NoWork())
+
+        self.assertEqual(blockchain.height, 50)
+        self.assertTrue(blockchain.is_chain_valid())
+        result = ContentRegistry(blockchain).verify_content(synthetic_content(7))
+        self.assertTrue(result["verified"])
+        self.assertEqual(result["block_number"], 7)
+
+    def test_percentile(self):
+        """测试分位数计算"""
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 50.0)
+        self.assertEqual(percentile(samples, 99), 99.0)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+    def test_report_json(self):
+        """测试基准结果输出为JSON"""
+        output = self.tmp_path / "bench.json"
+        main(["--sizes", "20", "--difficulties", "1", "--iterations", "3",
+              "--time-budget", "0", "--output", str(output)])
+
+        report = json.loads(output.read_text(encoding="utf-8"))
+        operations = {r["operation"] for r in report["results"]}
+        self.assertIn("verify_content[hit]", operations)
+        self.assertIn("mine_block[difficulty=1]", operations)
+        self.assertIn("content_hash[blake2b]", operations)
+        for result in report["results"]:
+            self.assertIn("p99", result["latency_ms"])
+            self.assertGreaterEqual(result["peak_memory_bytes"], 0)
+
+    def test_compression_report(self):
+        """测试压缩基准报告压缩比和解码吞吐量"""
+        report = bench_compression.main(["--blocks", "60", "--time-budget", "0"])
+        results = {r["method"]: r for r in report["results"]}
+        self.assertEqual(results["json_pretty"]["ratio_vs_pretty_json"], 1.0)
+        self.assertGreater(results["zlib_block[trained_dictionary]"]["ratio_vs_pretty_json"],
+                           results["zlib_block[no_dictionary]"]["ratio_vs_pretty_json"])
+        for result in results.values():
+            self.assertGreater(result["decode_mb_s"], 0)
+
+    def test_workload_generator(self):
+        """测试负载生成器按比例生成可复现的操作"""
+        generator = workload.WorkloadGenerator(mix={"verify": 1.0}, size_median=500, miss_ratio=0.0, seed=3)
+        ops = [generator.register_op() for _ in range(3)] + [generator.next_op() for _ in range(20)]
+
+        self.assertTrue(all(op["op"] == "verify" and 0 <= op["content_id"] < 3 for op in ops[3:]))
+        self.assertEqual(generator.content(1), workload.WorkloadGenerator(seed=3, size_median=500).content(1))
+        self.assertNotEqual(generator.content(1), generator.content(2))
+        schedule = list(workload.WorkloadGenerator(seed=1).schedule(200, 1.0, "uniform"))
+        self.assertEqual(len(schedule), 200)
+
+    def test_workload_report(self):
+        """测试负载运行报告延迟分位数并可回放记录的轨迹"""
+        trace = self.tmp_path / "trace.jsonl"
+        report = workload.main(["run", "--rates", "40", "80", "--duration", "0.5", "--preload", "10",
+                                "--consensus", "none", "--size-median", "256", "--record", str(trace)])
+        self.assertEqual([step["target_rate"] for step in report["steps"]], [40, 80])
+        step = report["steps"][0]
+        self.assertEqual(step["error_rate"], 0.0)
+        self.assertGreater(step["count"], 0)
+        self.assertLessEqual(step["latency_ms"]["p50"], step["latency_ms"]["p999"])
+        self.assertTrue(step["timeline"])
+        self.assertIsNotNone(report["knee_rate"])
+
+        header, ops = workload.read_trace(trace)
+        self.assertEqual(header["preload"], 10)
+        self.assertEqual(len(ops), sum(step["count"] for step in report["steps"]))
+        replayed = workload.main(["replay", str(trace), "--speed", "4", "--consensus", "none"])
+        self.assertEqual(replayed["steps"][0]["count"], len(ops))
+        self.assertEqual(replayed["steps"][0]["error_rate"], 0.0)
+
+    def test_find_knee(self):
+        """测试按吞吐量和SLO寻找拐点"""
+        steps = [
+            {"target_rate": 100, "offered_rate": 102, "throughput": 101, "latency_ms": {"p99": 5}},
+            {"target_rate": 200, "offered_rate": 196, "throughput": 195, "latency_ms": {"p99": 40}},
+            {"target_rate": 400, "offered_rate": 405, "throughput": 260, "latency_ms": {"p99": 900}}
+        ]
+        self.assertEqual(workload.find_knee(steps, None), 200)
+        self.assertEqual(workload.find_knee(steps, 10), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
 import unittest
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC
+from pathlib import Path
+from unittest import mock
 from src.blockchain import Blockchain, Block
+from src.storage import SQLiteStorage
 from src.utils.helpers import calculate_hash
 from config.settings import get_current_timestamp, get_user_id
 
@@ -55,5 +60,76 @@ class TestBlockchain(unittest.TestCase):
         self.assertTrue(block.hash.startswith("00"))
 
 
+class TestBlockchainConcurrency(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blockchain = Blockchain(Path(self.tmp_dir.name) / "chain.json")
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_concurrent_add_block(self):
+        """测试多线程并发添加区块"""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            blocks = list(pool.map(
+                lambda i: self.blockchain.add_block({"message": f"Block {i}"}),
+                range(32)
+            ))
+
+        self.assertEqual(len(self.blockchain.chain), 33)
+        self.assertEqual(sorted(b.index for b in blocks), list(range(1, 33)))
+        self.assertTrue(self.blockchain.is_chain_valid())
+
+        reloaded = Blockchain(self.blockchain.chain_file)
+        self.assertEqual(reloaded.get_latest_block().hash, self.blockchain.get_latest_block().hash)
+
+    def test_snapshot_iteration(self):
+        """测试遍历期间追加区块不影响已固定的快照"""
+        self.blockchain.add_block({"message": "Block 1"})
+        snapshot = self.blockchain.iter_blocks()
+        first = next(snapshot)
+        self.blockchain.add_block({"message": "Block 2"})
+
+        self.assertEqual(first.index, 0)
+        self.assertEqual([b.index for b in snapshot], [1])
+        self.assertEqual(self.blockchain.height, 3)
+
+    def test_submit_block(self):
+        """测试异步提交区块"""
+        future = self.blockchain.submit_block({"message": "Async Block"})
+        block = future.result(timeout=10)
+        self.assertEqual(block.index, 1)
+        self.assertIs(self.blockchain.get_latest_block(), block)
+
+    def test_failed_flush_rolls_back(self):
+        """测试落盘失败的区块从内存中撤回, 之后的落盘也不会写入"""
+        sqlite_chain = Blockchain(storage=SQLiteStorage(Path(self.tmp_dir.name) / "chain.db"))
+        self.addCleanup(sqlite_chain.close)
+        for name, blockchain, method in (("json", self.blockchain, "save"),
+                                         ("sqlite loaded", sqlite_chain, "save"),
+                                         ("sqlite unloaded", None, "append")):
+            with self.subTest(name):
+                if blockchain is None:
+                    blockchain = Blockchain(storage=SQLiteStorage(Path(self.tmp_dir.name) / "chain.db"))
+                    self.addCleanup(blockchain.close)
+                else:
+                    blockchain.chain
+                height = blockchain.height
+                failed_hash = calculate_hash(f"failed {name}")
+                with mock.patch.object(blockchain.storage, method, side_effect=OSError("disk full")):
+                    future = blockchain.submit_block({"content_hash": failed_hash})
+                    with self.assertRaises(OSError):
+                        future.result(timeout=10)
+                self.assertEqual(blockchain.height, height)
+                self.assertEqual(blockchain.find_blocks(failed_hash), [])
+
+                block = blockchain.add_block({"content_hash": calculate_hash(f"saved {name}")})
+                self.assertEqual(block.index, height)
+                self.assertEqual(blockchain.find_blocks(failed_hash), [])
+                self.assertTrue(blockchain.is_chain_valid())
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
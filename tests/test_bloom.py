@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.bloom import ScalableBloomFilter
+from src.blockchain import Blockchain
+from src.content_registry import ContentRegistry
+from src.storage import SQLiteStorage
+from src.utils.helpers import calculate_hash
+
+
+class TestScalableBloomFilter(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "bloom"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_no_false_negatives_and_growth(self):
+        """测试扩容后无漏判"""
+        bloom = ScalableBloomFilter(self.path, error_rate=0.01, initial_capacity=100)
+        keys = [calculate_hash(f"key {i}") for i in range(2000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertGreater(len(bloom.filters), 1)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate(self):
+        """测试误判率接近配置值"""
+        bloom = ScalableBloomFilter(self.path, error_rate=0.01, initial_capacity=5000)
+        for i in range(5000):
+            bloom.add(calculate_hash(f"key {i}"))
+
+        false_positives = sum(calculate_hash(f"other {i}") in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_persistence(self):
+        """测试刷写后重新打开"""
+        bloom = ScalableBloomFilter(self.path, error_rate=0.01, initial_capacity=100)
+        bloom.add(calculate_hash("persisted"))
+        bloom.flush(5, "fingerprint")
+
+        reopened = ScalableBloomFilter(self.path, error_rate=0.01, initial_capacity=100)
+        self.assertIn(calculate_hash("persisted"), reopened)
+        self.assertEqual(reopened.height, 5)
+        self.assertEqual(reopened.fingerprint, "fingerprint")
+
+
+class TestBlockchainBloom(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.test_metadata = {
+            "title": "Bloom Content",
+            "description": "Content for bloom testing",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_negative_lookup_without_loading(self):
+        """测试未注册内容无需加载链即可判定"""
+        chain_file = Path(self.tmp_dir.name) / "chain.json"
+        blockchain = Blockchain(chain_file)
+        ContentRegistry(blockchain).register_content("registered", dict(self.test_metadata))
+        blockchain.close()
+
+        reopened = Blockchain(chain_file)
+        registry = ContentRegistry(reopened)
+        self.assertFalse(registry.verify_content("never registered")["verified"])
+        self.assertFalse(reopened.loaded)
+        self.assertTrue(registry.verify_content("registered")["verified"])
+        self.assertTrue(reopened.loaded)
+        reopened.close()
+
+    def test_stale_filter_catch_up(self):
+        """测试过滤器落后于存储时增量补齐"""
+        db_file = Path(self.tmp_dir.name) / "chain.db"
+        blockchain = Blockchain(storage=SQLiteStorage(db_file))
+        registry = ContentRegistry(blockchain)
+        registry.register_content("first", dict(self.test_metadata))
+        blockchain.content_filter = None
+        registry.register_content("second", dict(self.test_metadata))
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(db_file))
+        self.assertEqual(reopened.content_filter.height, 2)
+        self.assertTrue(reopened.might_contain(calculate_hash("second")))
+        self.assertEqual(reopened.content_filter.height, 3)
+        self.assertFalse(reopened.loaded)
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Block, Blockchain
+from src.cache import ResultCache
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.storage import SQLiteStorage
+from src.utils.helpers import calculate_hash
+
+
+def touch(index, content_hash):
+    return Block(index, "2025-04-24 11:17:09", {"content_hash": content_hash}, "0")
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_by_bytes(self):
+        """测试按字节数上限淘汰最久未使用的条目"""
+        cache = ResultCache(max_bytes=3000)
+        for i in range(3):
+            self.assertTrue(cache.put(cache.token(1), "verify", f"h{i}", {"status": "success", "value": "x" * 500}))
+        cache.get("verify", "h0")
+        cache.put(cache.token(1), "verify", "h3", {"status": "success", "value": "y" * 500})
+
+        self.assertIsNotNone(cache.get("verify", "h0"))
+        self.assertIsNone(cache.get("verify", "h1"))
+        self.assertLessEqual(cache.bytes, 3000)
+        self.assertGreaterEqual(cache.stats()["evictions"], 1)
+        self.assertFalse(cache.put(cache.token(1), "verify", "big", {"value": "z" * 5000}))
+
+    def test_precise_invalidation(self):
+        """测试追加区块只使同一内容哈希的条目失效"""
+        cache = ResultCache()
+        cache.put(cache.token(5), "verify", "a", {"status": "success"})
+        cache.put(cache.token(5), "history", "a", {"status": "success"})
+        cache.put(cache.token(5), "verify", "b", {"status": "success"})
+        cache.add(touch(5, "a"))
+
+        self.assertIsNone(cache.get("verify", "a"))
+        self.assertIsNone(cache.get("history", "a"))
+        self.assertEqual(cache.get("verify", "b"), {"status": "success"})
+        self.assertEqual(cache.stats()["invalidations"], 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_stale_results_not_cached(self):
+        """测试计算期间追加了相关区块的结果不写入缓存"""
+        cache = ResultCache(recent_touches=2)
+        token = cache.token(5)
+        cache.add(touch(5, "a"))
+        self.assertFalse(cache.put(token, "verify", "a", {"status": "success"}))
+        self.assertTrue(cache.put(token, "verify", "b", {"status": "success"}))
+
+        # 最近追加记录溢出后无法确认, 放弃写入
+        cache.add(touch(6, "c"))
+        cache.add(touch(7, "d"))
+        self.assertFalse(cache.put(token, "verify", "e", {"status": "success"}))
+        stale = cache.token(8)
+        cache.clear()
+        self.assertFalse(cache.put(stale, "verify", "e", {"status": "success"}))
+
+
+class TestProtectionCache(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def check_protection(self, blockchain):
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        self.assertFalse(protection.verify_ownership("popular content")["verified"])
+        self.assertFalse(protection.verify_ownership("popular content")["verified"])
+        # 布隆过滤器判定未上链的内容不经缓存
+        self.assertEqual(protection.get_cache_stats()["misses"], 0)
+
+        protection.protect_ai_content("popular content", "Title", "Description", "GPT-4")
+        for _ in range(4):
+            result = protection.verify_ownership("popular content")
+            self.assertTrue(result["verified"])
+        self.assertEqual(protection.get_content_history("popular content")["count"], 1)
+
+        self.assertEqual(protection.update_license("popular content", "MIT")["status"], "success")
+        self.assertEqual(protection.get_content_history("popular content")["count"], 2)
+        self.assertEqual(protection.verify_ownership("")["status"], "error")
+        stats = protection.get_cache_stats()
+        self.assertGreaterEqual(stats["hits"], 3)
+        self.assertGreaterEqual(stats["invalidations"], 2)
+        return protection
+
+    def test_loaded_chain(self):
+        """测试已加载链上的缓存命中与失效"""
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        protection = self.check_protection(blockchain)
+        result = protection.verify_ownership("popular content")
+        result["metadata"] = None
+        self.assertIsNotNone(protection.verify_ownership("popular content")["metadata"])
+        blockchain.close()
+
+    def test_unloaded_chain(self):
+        """测试未加载链直接追加时同样使缓存失效"""
+        Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork()).close()
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        self.check_protection(blockchain)
+        self.assertFalse(blockchain.loaded)
+        self.assertEqual(blockchain.find_blocks(calculate_hash("popular content"))[0].index, 1)
+        blockchain.close()
+
+    def test_negative_lookup_without_loading(self):
+        """测试启用缓存时未注册内容的验证和历史查询不加载链"""
+        chain_file = self.tmp_path / "chain.json"
+        blockchain = Blockchain(chain_file, consensus=NoWork())
+        CopyrightProtection(ContentRegistry(blockchain)).protect_ai_content(
+            "registered content", "Title", "Description", "GPT-4")
+        blockchain.close()
+
+        reopened = Blockchain(chain_file, consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(reopened))
+        for _ in range(2):
+            self.assertFalse(protection.verify_ownership("never registered")["verified"])
+            self.assertEqual(protection.get_content_history("never registered")["count"], 0)
+        self.assertFalse(reopened.loaded)
+
+        self.assertTrue(protection.verify_ownership("registered content")["verified"])
+        self.assertTrue(protection.verify_ownership("registered content")["verified"])
+        self.assertEqual(protection.get_cache_stats()["hits"], 1)
+        reopened.close()
+
+    def test_disabled(self):
+        """测试未启用缓存时直接查询"""
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        protection.cache = None
+        self.assertFalse(protection.verify_ownership("anything")["verified"])
+        self.assertFalse(protection.get_cache_stats()["enabled"])
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.cli import main
+from src.content_registry import ContentRegistry
+from src.storage import SQLiteStorage
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp_dir.name) / "chain.db"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = main(["--backend", "sqlite", "--data", str(self.db_file), *argv])
+        return code, json.loads(output.getvalue())
+
+    def test_register_and_verify(self):
+        """测试注册后验证与查询历史"""
+        code, result = self.run_cli(
+            "register", "--content", "CLI content", "--title", "CLI",
+            "--description", "CLI test", "--model", "GPT-4", "--license", "MIT"
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual(result["metadata"]["license"], "MIT")
+
+        code, result = self.run_cli("verify", "--content", "CLI content")
+        self.assertEqual(code, 0)
+        self.assertTrue(result["verified"])
+        self.assertEqual(result["block_number"], 1)
+
+        code, result = self.run_cli("history", "--content", "CLI content")
+        self.assertEqual(result["count"], 1)
+
+        code, result = self.run_cli("stats")
+        self.assertEqual(result["total_registrations"], 1)
+
+        code, result = self.run_cli("status")
+        self.assertTrue(result["is_valid"])
+        self.assertEqual(result["length"], 2)
+
+    def test_error_exit_code(self):
+        """测试失败时退出码为1"""
+        code, result = self.run_cli(
+            "register", "--content", "CLI content", "--title", "CLI",
+            "--description", "CLI test", "--model", "Unknown"
+        )
+        self.assertEqual(code, 1)
+        self.assertEqual(result["status"], "error")
+
+    def test_lazy_lookup(self):
+        """测试带索引的后端无需加载整条链即可验证和追加"""
+        self.run_cli(
+            "register", "--content", "Lazy content", "--title", "Lazy",
+            "--description", "Lazy test", "--model", "GPT-4"
+        )
+        blockchain = Blockchain(storage=SQLiteStorage(self.db_file))
+        registry = ContentRegistry(blockchain)
+
+        self.assertTrue(registry.verify_content("Lazy content")["verified"])
+        self.assertFalse(registry.verify_content("Other content")["verified"])
+        status = registry.get_chain_status(validate=False)
+        self.assertEqual(status["length"], 2)
+
+        block = blockchain.add_block({"message": "Appended lazily"})
+        self.assertEqual(block.index, 2)
+        self.assertFalse(blockchain.loaded)
+
+        self.assertEqual(blockchain.chain[2].hash, block.hash)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
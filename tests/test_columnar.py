@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.columnar import MISSING, ColumnarExport, numpy_available
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.storage import SQLiteStorage
+
+
+@unittest.skipUnless(numpy_available(), "numpy not installed")
+class TestColumnarExport(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        self.protection = CopyrightProtection(ContentRegistry(self.blockchain))
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def protect(self, start, count, model="GPT-4", license_type="MIT"):
+        for i in range(start, start + count):
+            result = self.protection.protect_ai_content(
+                f"columnar content {i}" + "x" * i, f"Title {i}", "Columnar test", model,
+                license_type=license_type
+            )
+            self.assertEqual(result["status"], "success")
+
+    def test_columns_and_statistics(self):
+        """测试列内容及与get_statistics一致的统计"""
+        self.protect(0, 3)
+        self.protect(3, 2, model="Gemini Pro", license_type="Apache 2.0")
+        self.protection.update_license("columnar content 0", "Apache 2.0")
+
+        export = ColumnarExport(self.blockchain)
+        self.assertEqual(export.refresh(), 7)
+        self.assertEqual(list(export.column("index")), list(range(7)))
+        self.assertEqual(export.column("content_size")[0], MISSING)
+        self.assertEqual(export.column("content_size")[1], len("columnar content 0"))
+        self.assertEqual(export.categories("type"), ["content_registration", "license_update"])
+
+        stats = self.protection.get_statistics()
+        for key, value in export.statistics().items():
+            self.assertEqual(value, stats[key])
+
+        registrations = export.where(type="content_registration")
+        groups = export.group_by("model", "content_size", registrations)
+        self.assertEqual(groups["Gemini Pro"]["count"], 2)
+        self.assertEqual(groups["GPT-4"]["mean"], len("columnar content 1") + 1)
+        counts, _ = export.histogram("timestamp", bins=1, mask=registrations)
+        self.assertEqual(counts.sum(), 5)
+        with self.assertRaises(ValueError):
+            export.column("index")[0] = 1
+
+    def test_unseen_values(self):
+        """测试从未出现的取值不匹配缺失该字段的行"""
+        self.protect(0, 2)
+        export = ColumnarExport(self.blockchain)
+        export.refresh()
+
+        # 创世区块没有type和model字段
+        self.assertEqual(export.column("type")[0], MISSING)
+        self.assertEqual(int(export.where(type="license_update").sum()), 0)
+        self.assertEqual(int(export.where(model="Claude 2").sum()), 0)
+        self.assertEqual(int(export.where(type="content_registration", model="Claude 2").sum()), 0)
+        stats = self.protection.get_statistics()
+        self.assertEqual(stats["total_updates"], 0)
+        for key, value in export.statistics().items():
+            self.assertEqual(value, stats[key])
+
+    def test_incremental_refresh(self):
+        """测试refresh只追加新增区块"""
+        export = ColumnarExport(self.blockchain)
+        self.protect(0, 2)
+        self.assertEqual(export.refresh(), 3)
+        view = export.column("model")
+        self.protect(2, 3, model="Gemini Pro")
+        self.assertEqual(export.refresh(), 3)
+        self.assertEqual(export.refresh(), 0)
+
+        self.assertEqual(len(view), 3)
+        self.assertEqual(export.value_counts("model"), {"GPT-4": 2, "Gemini Pro": 3})
+        self.assertEqual(export.statistics()["total_blocks"], self.blockchain.height)
+
+    def test_memory_mapped_files(self):
+        """测试列文件跨实例复用并增量追加"""
+        directory = self.tmp_path / "columns"
+        self.protect(0, 4)
+        export = ColumnarExport(self.blockchain, directory)
+        self.assertEqual(export.refresh(), 5)
+
+        reopened = ColumnarExport(self.blockchain, directory)
+        self.assertEqual(reopened.height, 5)
+        self.protect(4, 2, model="Gemini Pro")
+        self.assertEqual(reopened.refresh(), 2)
+        self.assertEqual(reopened.value_counts("model"), {"GPT-4": 4, "Gemini Pro": 2})
+        self.assertEqual((directory / "index.bin").stat().st_size, 7 * 8)
+
+        # 链被替换时重新导出
+        other = Blockchain(self.tmp_path / "other.json", consensus=NoWork())
+        replaced = ColumnarExport(other, directory)
+        self.assertEqual(replaced.refresh(), 1)
+        self.assertEqual(replaced.value_counts("model"), {})
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.compression import BlockCodec, preset_dictionary, serialize_block, train_dictionary
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.storage import SQLiteStorage
+from benchmarks.synthetic import generate_blocks
+
+
+class TestBlockCodec(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.blocks = [block.to_dict() for block in generate_blocks(200)][1:]
+
+    def test_round_trip(self):
+        """测试压缩后可还原"""
+        codec = BlockCodec(train_dictionary(self.blocks[:100]))
+        for block in self.blocks[100:]:
+            self.assertEqual(codec.decode_block(codec.encode_block(block)), block)
+
+    def test_dictionary_improves_ratio(self):
+        """测试共享字典提升逐块压缩比"""
+        test = self.blocks[100:]
+
+        def size(codec):
+            return sum(len(codec.encode_block(block)) for block in test)
+
+        plain = size(BlockCodec())
+        self.assertLess(size(BlockCodec(preset_dictionary())), plain)
+        self.assertLess(size(BlockCodec(train_dictionary(self.blocks[:100]))), plain * 0.8)
+        self.assertLess(size(BlockCodec()), sum(len(serialize_block(block)) for block in test))
+
+    def test_dictionary_size_limit(self):
+        """测试字典大小不超过上限"""
+        self.assertLessEqual(len(train_dictionary(self.blocks, size=1024)), 1024)
+
+
+class TestCompressedSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp_dir.name) / "chain.db"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compressed_blocks(self):
+        """测试逐块压缩存储的读写和索引查询"""
+        blockchain = Blockchain(storage=SQLiteStorage(self.db_file, "zlib"), consensus=NoWork())
+        registry = ContentRegistry(blockchain)
+        for i in range(5):
+            registry.register_content(f"compressed {i}", {
+                "title": f"Title {i}",
+                "description": "Compression test",
+                "content_type": "text"
+            })
+        content_hash = blockchain.chain[3].data["content_hash"]
+        blockchain.close()
+
+        conn = sqlite3.connect(self.db_file)
+        types = {row[0] for row in conn.execute("SELECT typeof(body) FROM blocks")}
+        self.assertEqual(types, {"blob"})
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM dictionaries").fetchone()[0], 1)
+        conn.close()
+
+        # 读取时不需要开启压缩
+        storage = SQLiteStorage(self.db_file)
+        reloaded = Blockchain(storage=storage, consensus=NoWork())
+        self.assertEqual([b["index"] for b in storage.find_blocks(content_hash=content_hash)], [3])
+        self.assertEqual(storage.read_block(3)["data"]["content_hash"], content_hash)
+        self.assertTrue(reloaded.is_chain_valid())
+        reloaded.close()
+
+    def test_mixed_bodies(self):
+        """测试已有未压缩区块的库开启压缩后新旧区块均可读取"""
+        blockchain = Blockchain(storage=SQLiteStorage(self.db_file), consensus=NoWork())
+        blockchain.add_block({"message": "plain"})
+        blockchain.close()
+
+        blockchain = Blockchain(storage=SQLiteStorage(self.db_file, "zlib"), consensus=NoWork())
+        blockchain.add_block({"message": "compressed"})
+        self.assertEqual([b["data"]["message"] for b in blockchain.storage.iter_blocks(1)],
+                         ["plain", "compressed"])
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+    def test_unsupported_compression(self):
+        """测试不支持的压缩方式"""
+        with self.assertRaises(ValueError):
+            SQLiteStorage(self.db_file, "brotli")
+
+
+if __name__ == '__main__':
+    unittest.main()
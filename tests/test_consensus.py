@@ -0,0 +1,154 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import (
+    AuthoritySeal,
+    NoWork,
+    ProofOfWork,
+    create_consensus,
+    generate_authority_key,
+    load_authority_key
+)
+from src.content_registry import ContentRegistry
+from src.signatures import crypto_available
+from src.storage import SQLiteStorage
+
+
+class TestConsensus(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.test_metadata = {
+            "title": "Consensus Content",
+            "description": "Content for consensus testing",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def register(self, blockchain, count=3):
+        registry = ContentRegistry(blockchain)
+        for i in range(count):
+            registry.register_content(f"consensus content {i}", self.test_metadata)
+
+    @unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+    def test_authority_seal(self):
+        """测试授权签名模式不搜索nonce, 只持有公钥的节点也可校验"""
+        consensus = AuthoritySeal(generate_authority_key())
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=consensus)
+        self.register(blockchain)
+
+        block = blockchain.get_latest_block()
+        self.assertEqual(block.nonce, 0)
+        self.assertEqual(block.signer, consensus.authority_id)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+        # 没有私钥的节点按链元数据中的公钥校验, 但不能封装新区块
+        verifier = AuthoritySeal(key_file=self.tmp_path / "missing.key")
+        reloaded = Blockchain(self.tmp_path / "chain.json", consensus=verifier)
+        self.assertEqual(reloaded.chain[-1].signature, block.signature)
+        self.assertTrue(reloaded.is_chain_valid())
+        self.assertEqual(verifier.authority_id, consensus.authority_id)
+        result = ContentRegistry(reloaded).register_content("unsealed", self.test_metadata)
+        self.assertEqual(result["status"], "error")
+        self.assertIn("can only verify", result["message"])
+        self.assertFalse((self.tmp_path / "missing.key").exists())
+        reloaded.close()
+
+    @unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+    def test_authority_rejects_other_key_and_tampering(self):
+        """测试其他授权方的密钥或篡改后的区块校验失败"""
+        consensus = AuthoritySeal(generate_authority_key())
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=consensus)
+        self.register(blockchain)
+        blockchain.close()
+
+        with self.assertRaises(ValueError):
+            Blockchain(self.tmp_path / "chain.json", consensus=AuthoritySeal(generate_authority_key())).chain
+
+        # 其他密钥签名的区块不能通过授权公钥校验
+        forger = AuthoritySeal(generate_authority_key())
+        forged = Blockchain(self.tmp_path / "chain.json", consensus=AuthoritySeal(public_key=consensus.public_key))
+        block = forged.chain[2]
+        forger.seal(block, 0)
+        block.signer = consensus.authority_id
+        self.assertFalse(forged.is_chain_valid())
+
+        tampered = Blockchain(self.tmp_path / "chain.json", consensus=AuthoritySeal(public_key=consensus.public_key))
+        block = tampered.chain[2]
+        block.data["user_id"] = "mallory"
+        block.hash = block.calculate_hash()
+        self.assertFalse(tampered.is_chain_valid())
+
+    def test_mode_aware_validation(self):
+        """测试校验按共识模式进行"""
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=ProofOfWork())
+        self.register(blockchain, 1)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+        # 未满足难度前缀的区块不是有效的工作量证明
+        reloaded = Blockchain(self.tmp_path / "chain.json", consensus=ProofOfWork())
+        # 加载链会恢复元数据中的难度, 加载后再提高
+        self.assertEqual(len(reloaded.chain), 2)
+        reloaded.difficulty = 8
+        self.assertFalse(reloaded.is_chain_valid())
+
+    def test_rejects_other_consensus_mode(self):
+        """测试以创建时以外的共识模式打开链时报错, 不追加区块也不改写元数据"""
+        db_file = self.tmp_path / "chain.db"
+        blockchain = Blockchain(storage=SQLiteStorage(db_file), consensus=ProofOfWork())
+        self.register(blockchain, 1)
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(db_file), consensus=NoWork())
+        with self.assertRaises(ValueError):
+            reopened.add_block({"message": "no work", "user_id": "mallory"})
+        with self.assertRaises(ValueError):
+            reopened.is_chain_valid()
+        reopened.close()
+        self.assertEqual(SQLiteStorage(db_file).get_metadata()["consensus"], "pow")
+
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        blockchain.close()
+        with self.assertRaises(ValueError):
+            Blockchain(self.tmp_path / "chain.json", consensus=ProofOfWork()).chain
+
+    @unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+    def test_unloaded_append(self):
+        """测试未加载链时直接追加也按共识模式封装"""
+        db_file = self.tmp_path / "chain.db"
+        key = generate_authority_key()
+        blockchain = Blockchain(storage=SQLiteStorage(db_file), consensus=AuthoritySeal(key))
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(db_file), consensus=AuthoritySeal(key))
+        self.register(reopened, 2)
+        self.assertFalse(reopened.loaded)
+        self.assertEqual(reopened.storage.get_metadata()["consensus"], "authority")
+        self.assertIsNotNone(reopened.storage.read_block(2)["signature"])
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.close()
+
+    @unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+    def test_create_consensus(self):
+        """测试按名称创建共识模式及密钥文件"""
+        key_file = self.tmp_path / "authority.key"
+        with self.assertRaises(FileNotFoundError):
+            load_authority_key(key_file)
+        key = load_authority_key(key_file, create=True)
+        self.assertEqual(load_authority_key(key_file), key)
+        self.assertEqual(key_file.stat().st_mode & 0o777, 0o600)
+
+        self.assertIsInstance(create_consensus("pow"), ProofOfWork)
+        self.assertIsInstance(create_consensus("none"), NoWork)
+        self.assertEqual(create_consensus("authority", key).authority_id, AuthoritySeal(key).authority_id)
+        with self.assertRaises(ValueError):
+            create_consensus("proof-of-stake")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.feed import ContentRegistered, LicenseUpdated
+from src.storage import SQLiteStorage
+
+
+class TestChangeFeed(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        self.registry = ContentRegistry(self.blockchain)
+        self.test_metadata = {
+            "title": "Feed Content",
+            "description": "Content for feed testing",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def register(self, start, count):
+        for i in range(start, start + count):
+            self.registry.register_content(f"feed content {i}", dict(self.test_metadata))
+
+    def test_typed_events(self):
+        """测试注册和许可证更新产生对应事件"""
+        protection = CopyrightProtection(self.registry)
+        self.register(0, 1)
+        protection.update_license("feed content 0", "MIT")
+
+        events = list(self.blockchain.subscribe(follow=False))
+        self.assertEqual([type(e) for e in events], [ContentRegistered, LicenseUpdated])
+        self.assertEqual(events[0].block_number, 1)
+        self.assertEqual(events[0].license, "All rights reserved")
+        self.assertEqual(events[1].old_license, "All rights reserved")
+        self.assertEqual(events[1].new_license, "MIT")
+        self.assertEqual(events[1].to_dict()["event"], "LicenseUpdated")
+
+    def test_start_height(self):
+        """测试从指定高度订阅"""
+        self.register(0, 5)
+        events = list(self.blockchain.subscribe(start=3, follow=False))
+        self.assertEqual([e.block_number for e in events], [3, 4, 5])
+
+    def test_follow_new_blocks(self):
+        """测试订阅者收到之后追加的区块"""
+        subscription = self.blockchain.subscribe(start=1, timeout=5)
+        received = []
+
+        def consume():
+            for event in subscription:
+                received.append(event.block_number)
+                if len(received) == 3:
+                    break
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        self.register(0, 3)
+        consumer.join(5)
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(received, [1, 2, 3])
+
+    def test_idle_timeout(self):
+        """测试等待超时后结束迭代"""
+        self.register(0, 1)
+        events = list(self.blockchain.subscribe(timeout=0.05))
+        self.assertEqual(len(events), 1)
+
+    def test_durable_offsets(self):
+        """测试消费者重启后从保存的位置继续"""
+        self.register(0, 4)
+        with self.blockchain.subscribe(consumer="search", follow=False) as subscription:
+            first = [next(subscription).block_number for _ in range(2)]
+        self.assertEqual(first, [1, 2])
+        # 最后投递的事件未确认, 重启后重新投递
+        self.assertEqual(self.blockchain.consumer_offsets.get("search"), 2)
+
+        self.register(4, 2)
+        reopened = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        events = list(reopened.subscribe(consumer="search", follow=False))
+        self.assertEqual([e.block_number for e in events], [2, 3, 4, 5, 6])
+        self.assertEqual(reopened.consumer_offsets.get("search"), 7)
+        self.assertEqual(list(reopened.subscribe(consumer="search", follow=False)), [])
+        reopened.close()
+
+    def test_invalid_consumer_name(self):
+        """测试非法消费者名称"""
+        with self.assertRaises(ValueError):
+            self.blockchain.subscribe(consumer="../escape")
+
+    def test_async_iterator(self):
+        """测试异步迭代"""
+        self.register(0, 3)
+
+        async def consume():
+            return [event.block_number async for event in self.blockchain.subscribe(follow=False)]
+
+        self.assertEqual(asyncio.run(consume()), [1, 2, 3])
+
+    def test_unloaded_storage(self):
+        """测试未加载链时直接从存储读取"""
+        db_file = self.tmp_path / "chain.db"
+        blockchain = Blockchain(storage=SQLiteStorage(db_file), consensus=NoWork())
+        ContentRegistry(blockchain).register_content("sqlite feed", dict(self.test_metadata))
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(db_file), consensus=NoWork())
+        events = list(reopened.subscribe(follow=False))
+        self.assertFalse(reopened.loaded)
+        self.assertEqual([e.block_number for e in events], [1])
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
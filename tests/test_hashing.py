@@ -0,0 +1,140 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.hashing import HashScheme
+from src.storage import SQLiteStorage
+from src.utils.helpers import calculate_hash
+
+
+class TestHashScheme(unittest.TestCase):
+    def test_algorithms(self):
+        """测试各算法的摘要长度一致且互不相同"""
+        sha256 = calculate_hash("content")
+        blake2b = calculate_hash("content", "blake2b")
+        self.assertEqual(len(sha256), 64)
+        self.assertEqual(len(blake2b), 64)
+        self.assertNotEqual(sha256, blake2b)
+        with self.assertRaises(ValueError):
+            HashScheme("md5")
+
+    def test_migrate(self):
+        """测试迁移后当前算法在前, 旧算法保留"""
+        scheme = HashScheme().migrate("blake2b")
+        self.assertTrue(scheme.migrating)
+        self.assertEqual(list(scheme.content_digests("content")),
+                         ["blake2b", "sha256"])
+        self.assertEqual(HashScheme.from_dict(scheme.to_dict()), scheme)
+        self.assertEqual(len({scheme, HashScheme.from_dict(scheme.to_dict()), HashScheme()}), 2)
+        self.assertEqual(HashScheme.from_dict(None), HashScheme())
+        self.assertEqual(scheme.migrate("sha256").legacy, ("blake2b",))
+
+
+class TestChainHashing(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.test_metadata = {
+            "title": "Hashing Content",
+            "description": "Content for hash algorithm testing",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_blake2b_chain(self):
+        """测试新建链使用指定算法并记录在元数据中"""
+        scheme = HashScheme("blake2b", "blake2b")
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"),
+                                consensus=NoWork(), hash_scheme=scheme)
+        result = ContentRegistry(blockchain).register_content("blake content", dict(self.test_metadata))
+        self.assertEqual(result["content_hash"], calculate_hash("blake content", "blake2b"))
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+        # 已有的链使用元数据中的算法, 未加载与加载后都能验证
+        reopened = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        registry = ContentRegistry(reopened)
+        self.assertEqual(reopened.storage.get_metadata()["hashing"]["block"], "blake2b")
+        self.assertTrue(registry.verify_content("blake content")["verified"])
+        self.assertFalse(reopened.loaded)
+        self.assertEqual(reopened.hash_scheme, scheme)
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.chain[1].hash_algorithm = "sha256"
+        self.assertFalse(reopened.is_chain_valid())
+        reopened.close()
+
+    def test_migration_keeps_first_registration(self):
+        """测试迁移后以新算法重新注册同一内容不取代原注册"""
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        original = protection.protect_ai_content("disputed content", "Original", "First registration", "GPT-4")
+        blockchain.migrate_content_hash("blake2b")
+        again = protection.protect_ai_content("disputed content", "Copy", "Registered again", "GPT-4")
+        self.assertGreater(again["block_number"], original["block_number"])
+
+        result = protection.verify_ownership("disputed content")
+        self.assertEqual(result["block_number"], original["block_number"])
+        self.assertEqual(result["content_hash"], calculate_hash("disputed content"))
+        self.assertEqual(result["metadata"]["title"], "Original")
+        blockchain.close()
+
+    def test_json_chain_without_loading(self):
+        """测试JSON链由布隆过滤器取得哈希配置, 否定查询无需加载链"""
+        chain_file = self.tmp_path / "chain.json"
+        blockchain = Blockchain(chain_file, consensus=NoWork(), hash_scheme=HashScheme("blake2b"))
+        ContentRegistry(blockchain).register_content("json content", dict(self.test_metadata))
+        blockchain.close()
+
+        reopened = Blockchain(chain_file, consensus=NoWork())
+        registry = ContentRegistry(reopened)
+        self.assertFalse(registry.verify_content("never registered")["verified"])
+        self.assertFalse(reopened.loaded)
+        self.assertTrue(registry.verify_content("json content")["verified"])
+        self.assertEqual(reopened.hash_scheme.content, "blake2b")
+        reopened.close()
+
+    def test_migration(self):
+        """测试迁移期间旧算法注册的内容仍可验证和更新许可证"""
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        protection.protect_ai_content("old content", "Old", "Registered with SHA-256", "GPT-4")
+        self.assertTrue(protection.verify_ownership("old content")["verified"])
+
+        blockchain.migrate_content_hash("blake2b")
+        self.assertEqual(blockchain.storage.get_metadata()["hashing"]["legacy"], ["sha256"])
+        old = protection.verify_ownership("old content")
+        self.assertTrue(old["verified"])
+        self.assertEqual(old["content_hash"], calculate_hash("old content"))
+
+        new = protection.protect_ai_content("new content", "New", "Registered during migration", "GPT-4")
+        self.assertEqual(new["content_hash"], calculate_hash("new content", "blake2b"))
+        block = blockchain.find_blocks(new["content_hash"])[0]
+        self.assertEqual(block.data["content_digests"]["sha256"], calculate_hash("new content"))
+
+        # 许可证更新沿用注册时的哈希, 并使以新算法摘要为键的缓存失效
+        invalidations = protection.get_cache_stats()["invalidations"]
+        self.assertEqual(protection.update_license("old content", "MIT")["status"], "success")
+        self.assertGreater(protection.get_cache_stats()["invalidations"], invalidations)
+        history = protection.get_content_history("old content")
+        self.assertEqual([h["action"] for h in history["history"]], ["content_registration", "license_update"])
+        self.assertEqual(blockchain.find_blocks(calculate_hash("old content"))[-1].data["new_license"], "MIT")
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        self.assertTrue(reopened.hash_scheme.migrating)
+        registry = ContentRegistry(reopened)
+        self.assertTrue(registry.verify_content("old content")["verified"])
+        reopened.end_hash_migration()
+        self.assertFalse(registry.verify_content("old content")["verified"])
+        self.assertTrue(registry.verify_content("new content")["verified"])
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+from src.blockchain import Blockchain
+from src.content_registry import ContentRegistry
+from src.storage import SQLiteStorage
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        """测试初始化: 在不同日期注册内容并更新许可证"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp_dir.name) / "chain.db"
+        self.blockchain = Blockchain(storage=SQLiteStorage(self.db_file))
+        self.registry = ContentRegistry(self.blockchain)
+        models = ["GPT-4", "Claude 2", "GPT-4", "Gemini Pro"]
+        for day, model in enumerate(models, 1):
+            with mock.patch("src.blockchain.get_current_timestamp", return_value=f"2025-05-0{day} 10:00:00"):
+                self.registry.register_content(f"content {day}", {
+                    "title": f"Title {day}",
+                    "description": "Time index test",
+                    "content_type": "text",
+                    "ai_info": {"model": model},
+                    "license": "MIT"
+                })
+        with mock.patch("src.blockchain.get_current_timestamp", return_value="2025-05-03 12:00:00"):
+            self.blockchain.add_block({
+                "type": "license_update",
+                "content_hash": self.blockchain.chain[1].data["content_hash"],
+                "previous_license": "MIT",
+                "new_license": "Apache 2.0",
+                "user_id": "202400130071"
+            })
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_range_query(self):
+        """测试闭区间范围查询"""
+        result = self.registry.query_time_range("2025-05-02 00:00:00", "2025-05-03 23:59:59")
+        self.assertEqual(result["status"], "success")
+        self.assertEqual([r["block_number"] for r in result["results"]], [2, 3, 5])
+
+        result = self.registry.query_time_range(datetime(2025, 5, 1, 10), datetime(2025, 5, 1, 10))
+        self.assertEqual([r["block_number"] for r in result["results"]], [1])
+
+    def test_filters(self):
+        """测试按类型、模型和许可证过滤"""
+        start, end = "2025-05-01 00:00:00", "2025-05-31 00:00:00"
+        updates = self.registry.query_time_range(start, end, block_type="license_update")
+        self.assertEqual(updates["count"], 1)
+        self.assertEqual(updates["results"][0]["new_license"], "Apache 2.0")
+
+        gpt = self.registry.query_time_range(start, end, model="GPT-4")
+        self.assertEqual([r["block_number"] for r in gpt["results"]], [1, 3])
+
+        apache = self.registry.query_time_range(start, end, license_type="Apache 2.0")
+        self.assertEqual([r["block_number"] for r in apache["results"]], [5])
+
+    def test_streaming_and_limit(self):
+        """测试流式遍历与结果数量限制"""
+        records = self.registry.iter_time_range("2025-05-01 00:00:00", "2025-05-31 00:00:00")
+        self.assertEqual(next(records)["block_number"], 1)
+        result = self.registry.query_time_range("2025-05-01 00:00:00", "2025-05-31 00:00:00", limit=2)
+        self.assertEqual(result["count"], 2)
+
+    def test_out_of_order_append(self):
+        """测试时间戳乱序追加仍保持有序"""
+        with mock.patch("src.blockchain.get_current_timestamp", return_value="2025-04-30 09:00:00"):
+            block = self.blockchain.add_block({"message": "late"})
+        heights = list(self.blockchain.time_index.heights("2025-04-01 00:00:00", "2025-05-01 23:00:00"))
+        self.assertEqual(heights, [0, block.index, 1])
+
+    def test_unloaded_storage_query(self):
+        """测试未加载链时使用存储的时间戳索引"""
+        reopened = Blockchain(storage=SQLiteStorage(self.db_file))
+        registry = ContentRegistry(reopened)
+        result = registry.query_time_range("2025-05-02 00:00:00", "2025-05-03 23:59:59")
+        self.assertEqual([r["block_number"] for r in result["results"]], [2, 3, 5])
+        self.assertFalse(reopened.loaded)
+        reopened.close()
+
+    def test_invalid_bound(self):
+        """测试非法时间格式"""
+        result = self.registry.query_time_range("last week", "2025-05-03 23:59:59")
+        self.assertEqual(result["status"], "error")
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestOwnerIndex(unittest.TestCase):
+    def setUp(self):
+        """测试初始化: 两个所有者注册内容"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blockchain = Blockchain(Path(self.tmp_dir.name) / "chain.json")
+        self.registry = ContentRegistry(self.blockchain)
+        self.hashes = []
+        for i in range(5):
+            owner = "alice" if i % 2 == 0 else "bob"
+            with mock.patch("src.content_registry.get_user_id", return_value=owner):
+                result = self.registry.register_content(f"owner content {i}", {
+                    "title": f"Title {i}",
+                    "description": "Owner index test",
+                    "content_type": "text"
+                })
+            self.hashes.append(result["content_hash"])
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_pagination(self):
+        """测试分页列出所有者内容"""
+        first = self.registry.list_owner_contents("alice", offset=0, limit=2)
+        self.assertEqual(first["total"], 3)
+        self.assertEqual([item["content_hash"] for item in first["items"]], [self.hashes[0], self.hashes[2]])
+        second = self.registry.list_owner_contents("alice", offset=2, limit=2)
+        self.assertEqual([item["block_number"] for item in second["items"]], [5])
+
+        invalid = self.registry.list_owner_contents("alice", offset=-1)
+        self.assertEqual(invalid["status"], "error")
+
+    def test_snapshot_pagination(self):
+        """测试快照视图只分页列出快照高度之前注册的内容"""
+        view = self.registry.owner_index.snapshot(4)
+        self.assertEqual(view.count("alice"), 2)
+        self.assertEqual([item[0] for item in view.page("alice", offset=1, limit=5)], [self.hashes[2]])
+        self.assertEqual(view.page("alice", offset=2, limit=5), [])
+        self.assertEqual(view.page("alice", offset=5, limit=5), [])
+
+    def test_counts_and_license(self):
+        """测试所有者计数与当前许可证"""
+        self.assertEqual(self.registry.get_owner_counts()["owners"], {"alice": 3, "bob": 2})
+
+        self.blockchain.add_block({
+            "type": "license_update",
+            "content_hash": self.hashes[1],
+            "previous_license": "All rights reserved",
+            "new_license": "MIT",
+            "user_id": "bob"
+        })
+        items = self.registry.list_owner_contents("bob")["items"]
+        self.assertEqual(items[0]["license"], "MIT")
+        self.assertEqual(items[1]["license"], "All rights reserved")
+
+    def test_first_registration_wins(self):
+        """测试重复注册以首次为准"""
+        with mock.patch("src.content_registry.get_user_id", return_value="bob"):
+            self.registry.register_content("owner content 0", {
+                "title": "Duplicate",
+                "description": "Owner index test",
+                "content_type": "text"
+            })
+        self.assertEqual(self.registry.owner_index.get(self.hashes[0])[0], "alice")
+        self.assertEqual(self.registry.owner_index.count("bob"), 2)
+
+    def test_rebuild_on_load(self):
+        """测试重新加载后索引重建"""
+        reopened = ContentRegistry(Blockchain(self.blockchain.chain_file))
+        self.assertEqual(reopened.list_owner_contents("alice")["total"], 3)
+        reopened.blockchain.close()
@@ -0,0 +1,87 @@
+import copy
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.interning import FrozenDict, Interner, deep_size
+from benchmarks.synthetic import write_chain_file
+
+
+class TestInterner(unittest.TestCase):
+    def test_shared_parameters(self):
+        """测试相同参数字典共享同一只读对象"""
+        interner = Interner()
+        first = interner.intern({"ai_info": {"model": "GPT-4", "parameters": {"temperature": 0.7}}})
+        second = interner.intern({"ai_info": {"model": "GPT-4", "parameters": {"temperature": 0.7}}})
+
+        self.assertIs(first["ai_info"], second["ai_info"])
+        self.assertIsInstance(first["ai_info"]["parameters"], FrozenDict)
+        with self.assertRaises(TypeError):
+            first["ai_info"]["parameters"]["temperature"] = 1.0
+        self.assertEqual(first, {"ai_info": {"model": "GPT-4", "parameters": {"temperature": 0.7}}})
+
+    def test_strings(self):
+        """测试短字符串驻留而长哈希保持原样"""
+        interner = Interner(max_length=48)
+        short = "".join(["MI", "T"])
+        self.assertIs(interner.intern(short), interner.intern("MIT"))
+        digest = "a" * 64
+        self.assertIs(interner.intern(digest), digest)
+
+    def test_frozen_dict_copy_and_pickle(self):
+        """测试共享字典可复制和序列化"""
+        shared = FrozenDict({"temperature": 0.7})
+        self.assertEqual(pickle.loads(pickle.dumps(shared)), shared)
+        self.assertEqual(copy.deepcopy(shared), shared)
+        self.assertIsInstance(shared.copy(), dict)
+
+
+class TestBlockchainInterning(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.chain_file = Path(self.tmp_dir.name) / "chain.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, interner):
+        blockchain = Blockchain(self.chain_file, consensus=NoWork())
+        blockchain.interner = interner
+        blockchain.load_chain()
+        return blockchain
+
+    def test_load_preserves_hashes(self):
+        """测试去重后区块哈希不变且占用更少内存"""
+        write_chain_file(self.chain_file, 200)
+        plain = self.load(None)
+        interned = self.load(Interner())
+
+        self.assertTrue(interned.is_chain_valid())
+        self.assertEqual([b.calculate_hash() for b in interned.chain], [b.hash for b in plain.chain])
+        self.assertEqual([b.to_dict() for b in interned.chain], [b.to_dict() for b in plain.chain])
+        self.assertIs(interned.chain[2].previous_hash, interned.chain[1].hash)
+        self.assertLess(deep_size(interned.chain), deep_size(plain.chain) * 0.8)
+        plain.close()
+        interned.close()
+
+    def test_registration_path(self):
+        """测试注册路径共享默认参数字典"""
+        blockchain = Blockchain(self.chain_file, consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        for i in range(2):
+            result = protection.protect_ai_content(f"interned {i}", f"Title {i}", "Description", "GPT-4")
+            self.assertEqual(result["status"], "success")
+
+        first, second = (blockchain.chain[i].data["metadata"]["ai_info"] for i in (1, 2))
+        self.assertIs(first, second)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
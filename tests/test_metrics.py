@@ -0,0 +1,76 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.content_registry import ContentRegistry
+from src.metrics import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blockchain = Blockchain(Path(self.tmp_dir.name) / "chain.json")
+        self.registry = ContentRegistry(self.blockchain)
+        self.test_metadata = {
+            "title": "Test Content",
+            "description": "Content for testing",
+            "content_type": "text"
+        }
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_disabled_records_nothing(self):
+        """测试关闭时不记录指标"""
+        self.registry.register_content("metrics content", self.test_metadata)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"], {})
+        self.assertEqual(snapshot["histograms"], {})
+
+    def test_operation_metrics(self):
+        """测试操作计数与延迟直方图"""
+        metrics.enable()
+        self.registry.register_content("metrics content", self.test_metadata)
+        self.registry.verify_content("metrics content")
+        self.registry.register_content("", self.test_metadata)
+
+        snapshot = metrics.snapshot()
+        operations = snapshot["counters"]["operations_total"]
+        self.assertEqual(operations['{operation="register_content"}'], 2)
+        self.assertEqual(operations['{operation="verify_content"}'], 1)
+        self.assertEqual(operations['{operation="mine_block"}'], 1)
+        self.assertEqual(snapshot["counters"]["operation_errors_total"]['{operation="register_content"}'], 1)
+        self.assertGreaterEqual(snapshot["counters"]["mining_attempts_total"]["total"], 1)
+        self.assertEqual(snapshot["histograms"]["operation_seconds"]['{operation="disk_write"}']["count"], 1)
+
+    def test_prometheus_format(self):
+        """测试Prometheus文本格式导出"""
+        metrics.enable()
+        self.registry.verify_content("metrics content")
+
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE ai_copyright_operations_total counter", text)
+        self.assertIn('ai_copyright_operations_total{operation="verify_content"} 1', text)
+        self.assertIn('ai_copyright_operation_seconds_bucket{operation="verify_content",le="+Inf"} 1', text)
+        self.assertIn('ai_copyright_operation_seconds_count{operation="verify_content"} 1', text)
+
+    def test_sampling_profiler(self):
+        """测试热点路径采样"""
+        metrics.enable(profile=True, interval=0.001)
+        with metrics.timer("hot_path"):
+            time.sleep(0.05)
+        profiler = metrics.profiler
+        metrics.disable()
+
+        self.assertTrue(any(stack.startswith("hot_path;") for stack in profiler.samples))
+        self.assertIn("test_sampling_profiler", profiler.collapsed())
+
+
+if __name__ == '__main__':
+    unittest.main()
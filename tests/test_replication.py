@@ -0,0 +1,175 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Block, Blockchain
+from src.consensus import AuthoritySeal, NoWork, generate_authority_key
+from src.content_registry import ContentRegistry
+from src.replication import ReplicationFollower, ReplicationLeader, parse_address
+from src.signatures import crypto_available
+from src.storage import SQLiteStorage
+from config.settings import PROJECT_ROOT
+
+
+class TestReplication(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.leader_chain = Blockchain(self.tmp_path / "leader.json", consensus=NoWork())
+        self.registry = ContentRegistry(self.leader_chain)
+        self.register(0, 5)
+
+    def tearDown(self):
+        self.leader_chain.close()
+        self.tmp_dir.cleanup()
+
+    def register(self, start, count, registry=None):
+        for i in range(start, start + count):
+            (registry or self.registry).register_content(f"replicated content {i}", {
+                "title": f"Title {i}",
+                "description": "Replication test",
+                "content_type": "text"
+            })
+
+    def create_follower(self, name="follower.json"):
+        return Blockchain(self.tmp_path / name, consensus=NoWork(), create_genesis=False)
+
+    def test_catch_up_and_follow(self):
+        """测试从节点追上主节点并持续接收新区块"""
+        leader = ReplicationLeader(self.leader_chain, ("127.0.0.1", 0)).start()
+        replica = self.create_follower()
+        follower = ReplicationFollower(replica, leader.address).start()
+        try:
+            self.assertTrue(follower.wait_for_height(6, timeout=5))
+            self.register(5, 3)
+            self.assertTrue(follower.wait_for_height(9, timeout=5))
+        finally:
+            follower.stop()
+            leader.stop()
+
+        self.assertEqual([b.hash for b in replica.chain], [b.hash for b in self.leader_chain.chain])
+        self.assertTrue(replica.is_chain_valid())
+        replica.close()
+
+        # 重启后从已有高度继续
+        restarted = self.create_follower()
+        self.register(8, 2)
+        leader = ReplicationLeader(self.leader_chain, ("127.0.0.1", 0)).start()
+        follower = ReplicationFollower(restarted, leader.address).start()
+        try:
+            self.assertTrue(follower.wait_for_height(11, timeout=5))
+        finally:
+            follower.stop()
+            leader.stop()
+        self.assertEqual(restarted.get_latest_block().hash, self.leader_chain.get_latest_block().hash)
+        restarted.close()
+
+    @unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+    def test_authority_follower_without_private_key(self):
+        """测试授权签名模式下从节点只凭主节点的公钥校验区块"""
+        consensus = AuthoritySeal(generate_authority_key())
+        leader_chain = Blockchain(self.tmp_path / "authority.json", consensus=consensus)
+        self.register(0, 3, ContentRegistry(leader_chain))
+        leader = ReplicationLeader(leader_chain, ("127.0.0.1", 0)).start()
+        replica = Blockchain(self.tmp_path / "authority_follower.json", create_genesis=False,
+                             consensus=AuthoritySeal(key_file=self.tmp_path / "missing.key"))
+        follower = ReplicationFollower(replica, leader.address).start()
+        try:
+            self.assertTrue(follower.wait_for_height(4, timeout=5))
+        finally:
+            follower.stop()
+            leader.stop()
+            leader_chain.close()
+        self.assertEqual(replica.consensus.authority_id, consensus.authority_id)
+        self.assertTrue(replica.is_chain_valid())
+        self.assertFalse((self.tmp_path / "missing.key").exists())
+        replica.close()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Unix sockets required")
+    def test_unix_socket_and_fork_detection(self):
+        """测试Unix套接字复制及分叉检测"""
+        address = str(self.tmp_path / "leader.sock")
+        leader = ReplicationLeader(self.leader_chain, address).start()
+        diverged = Blockchain(self.tmp_path / "diverged.json", consensus=NoWork())
+        diverged.add_block({"message": "local only", "user_id": "mallory"})
+        follower = ReplicationFollower(diverged, parse_address(f"unix:{address}"))
+        try:
+            follower.run()
+        finally:
+            leader.stop()
+        self.assertIn("diverges", follower.last_error)
+        self.assertEqual(diverged.height, 2)
+        diverged.close()
+
+    def test_rejects_changed_rules(self):
+        """测试已有区块的从节点拒绝主节点更改后的难度"""
+        replica = self.create_follower()
+        replica.apply_blocks(self.leader_chain.chain[:3])
+        difficulty = replica.difficulty
+        self.leader_chain.difficulty = difficulty - 1
+        leader = ReplicationLeader(self.leader_chain, ("127.0.0.1", 0)).start()
+        follower = ReplicationFollower(replica, leader.address)
+        try:
+            follower.run()
+        finally:
+            leader.stop()
+        self.assertIn("Difficulty mismatch", follower.last_error)
+        self.assertEqual(replica.difficulty, difficulty)
+        self.assertEqual(replica.height, 3)
+        replica.close()
+
+    def test_rejects_invalid_block(self):
+        """测试增量校验拒绝不衔接或被篡改的区块"""
+        replica = self.create_follower()
+        replica.apply_blocks([self.leader_chain.chain[0], self.leader_chain.chain[1]])
+
+        with self.assertRaises(ValueError):
+            replica.apply_blocks([self.leader_chain.chain[3]])
+        tampered = Block.from_dict(self.leader_chain.chain[2].to_dict())
+        tampered.data = dict(tampered.data, user_id="mallory")
+        with self.assertRaises(ValueError):
+            replica.apply_blocks([tampered])
+        self.assertEqual(replica.height, 2)
+        replica.close()
+
+    def test_two_processes(self):
+        """测试主节点运行在独立进程中"""
+        leader_db = self.tmp_path / "leader.db"
+        writer = Blockchain(storage=SQLiteStorage(leader_db), consensus=NoWork())
+        registry = ContentRegistry(writer)
+        self.register(0, 3, registry)
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.replication", "leader", "--backend", "sqlite",
+             "--data", str(leader_db), "--address", "127.0.0.1:0", "--consensus", "none"],
+            cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True
+        )
+        replica = Blockchain(storage=SQLiteStorage(self.tmp_path / "replica.db"), consensus=NoWork(),
+                             create_genesis=False)
+        follower = None
+        try:
+            address = parse_address(json.loads(process.stdout.readline())["address"])
+            follower = ReplicationFollower(replica, address).start()
+            self.assertTrue(follower.wait_for_height(4, timeout=10))
+            # 其他进程写入主节点存储后, 主节点在一个心跳间隔内推送
+            self.register(3, 2, registry)
+            self.assertTrue(follower.wait_for_height(6, timeout=10))
+        finally:
+            if follower is not None:
+                follower.stop()
+            process.terminate()
+            process.wait(10)
+            process.stdout.close()
+            writer.close()
+
+        self.assertEqual(replica.get_latest_block().hash, writer.get_latest_block().hash)
+        self.assertTrue(replica.is_chain_valid())
+        replica.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import tempfile
+import unittest
+from concurrent.futures import wait
+from pathlib import Path
+from src.blockchain import Block, Blockchain
+from src.consensus import NoWork, ProofOfWork
+from src.content_registry import ContentRegistry
+from src.sealing import DifficultyRetarget, SealScheduler
+from src.storage import SQLiteStorage
+
+
+class TestDifficultyRetarget(unittest.TestCase):
+    def test_next_difficulty(self):
+        """测试采样满一个窗口后按目标封装时间逐级调整"""
+        retarget = DifficultyRetarget(target_seal_time=0.01, min_difficulty=1, max_difficulty=4, window=2)
+        self.assertEqual(retarget.next_difficulty(None, 9), 4)
+        retarget.record(2, 0.5)
+        self.assertEqual(retarget.next_difficulty(2, 2), 2)
+        retarget.record(2, 0.5)
+        self.assertEqual(retarget.next_difficulty(2, 2), 1)
+        # 与目标相差不到一级时保持不变
+        retarget.record(3, 0.02)
+        retarget.record(3, 0.02)
+        self.assertEqual(retarget.next_difficulty(3, 2), 3)
+        retarget.record(3, 0.0001)
+        retarget.record(3, 0.0001)
+        self.assertEqual(retarget.next_difficulty(3, 2), 4)
+
+    def test_rules(self):
+        """测试难度规则的校验和元数据往返"""
+        retarget = DifficultyRetarget(target_seal_time=0.01, min_difficulty=1, max_difficulty=4, window=2)
+        self.assertTrue(retarget.allows(None, 4))
+        self.assertTrue(retarget.allows(2, 3))
+        self.assertFalse(retarget.allows(2, 4))
+        self.assertFalse(retarget.allows(1, 0))
+        self.assertEqual(DifficultyRetarget.from_dict(retarget.to_dict()), retarget)
+        self.assertIn(DifficultyRetarget.from_dict(retarget.to_dict()), {retarget})
+        self.assertIsNone(DifficultyRetarget.from_dict(None))
+        with self.assertRaises(ValueError):
+            DifficultyRetarget(min_difficulty=3, max_difficulty=2)
+
+
+class TestSealScheduler(unittest.TestCase):
+    def test_should_flush(self):
+        """测试按批量上限、队列深度和延迟预算决定落盘"""
+        scheduler = SealScheduler(max_batch=4)
+        self.assertTrue(scheduler.should_flush(1, 0, 0.0))
+        self.assertFalse(scheduler.should_flush(1, 3, 0.0))
+        self.assertTrue(scheduler.should_flush(4, 3, 0.0))
+        self.assertEqual(scheduler.linger(0.0), 0.0)
+
+        scheduler = SealScheduler(max_batch=4, latency_budget=0.1)
+        scheduler.record_seal(0.01)
+        scheduler.record_flush(0.02)
+        self.assertFalse(scheduler.should_flush(1, 0, 0.0))
+        self.assertAlmostEqual(scheduler.linger(0.0), 0.07)
+        self.assertTrue(scheduler.should_flush(1, 3, 0.08))
+        self.assertEqual(scheduler.linger(0.08), 0.0)
+
+
+class TestAdaptiveChain(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.test_metadata = {
+            "title": "Sealing Content",
+            "description": "Content for sealing tests",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def register(self, blockchain, count, start=0):
+        registry = ContentRegistry(blockchain)
+        for i in range(start, start + count):
+            self.assertEqual(registry.register_content(f"sealing content {i}", self.test_metadata)["status"],
+                             "success")
+
+    def test_recorded_difficulty(self):
+        """测试难度逐块记录并参与校验, 重新打开后规则保持"""
+        retarget = DifficultyRetarget(target_seal_time=1e-9, min_difficulty=1, max_difficulty=3, window=2)
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=ProofOfWork(), retarget=retarget)
+        self.register(blockchain, 5)
+
+        difficulties = [block.difficulty for block in blockchain.chain[1:]]
+        self.assertEqual(difficulties, [2, 2, 1, 1, 1])
+        for block in blockchain.chain[1:]:
+            self.assertTrue(block.hash.startswith("0" * block.difficulty))
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+        reloaded = Blockchain(self.tmp_path / "chain.json", consensus=ProofOfWork())
+        self.assertEqual(reloaded.retarget, retarget)
+        self.assertTrue(reloaded.is_chain_valid())
+
+        # 记录的难度参与区块哈希, 改写难度后哈希不再匹配
+        block = reloaded.chain[3]
+        block.difficulty = 2
+        self.assertFalse(reloaded.is_chain_valid())
+        reloaded.close()
+
+    def test_rejects_difficulty_outside_rules(self):
+        """测试追加的区块记录的难度超出规则时被拒绝"""
+        retarget = DifficultyRetarget(target_seal_time=1e-9, min_difficulty=1, max_difficulty=3, window=2)
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=ProofOfWork(),
+                                retarget=retarget)
+        latest = blockchain.get_latest_block()
+        block = Block(latest.index + 1, latest.timestamp, {"message": "cheap"}, latest.hash, difficulty=0)
+        with self.assertRaises(ValueError):
+            blockchain.apply_blocks([block])
+
+        block = Block(latest.index + 1, latest.timestamp, {"message": "valid"}, latest.hash, difficulty=1)
+        block.mine_block(1)
+        blockchain.apply_blocks([block])
+        self.assertEqual(blockchain.storage.read_block(1)["difficulty"], 1)
+        blockchain.close()
+
+    def test_set_retarget_on_existing_chain(self):
+        """测试已有的固定难度链切换为自适应难度"""
+        db_file = self.tmp_path / "chain.db"
+        blockchain = Blockchain(storage=SQLiteStorage(db_file), consensus=ProofOfWork())
+        self.assertIsNone(blockchain.retarget)
+        self.register(blockchain, 2)
+        blockchain.set_retarget(DifficultyRetarget(target_seal_time=1e-9, min_difficulty=1, window=1))
+        blockchain.close()
+
+        reopened = Blockchain(storage=SQLiteStorage(db_file), consensus=ProofOfWork())
+        self.register(reopened, 3, start=2)
+        self.assertFalse(reopened.loaded)
+        self.assertEqual([reopened.storage.read_block(i).get("difficulty") for i in range(1, 6)],
+                         [None, None, 2, 1, 1])
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.close()
+
+        with self.assertRaises(ValueError):
+            Blockchain(self.tmp_path / "other.json", consensus=NoWork(), retarget=DifficultyRetarget())
+
+    def test_latency_budget_merges_flushes(self):
+        """测试设置延迟预算后写线程合并更多交易再落盘"""
+        scheduler = SealScheduler(latency_budget=1.0)
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork(), scheduler=scheduler)
+        futures = [blockchain.submit_block({"message": f"block {i}"}) for i in range(10)]
+        wait(futures, timeout=10)
+        self.assertEqual(blockchain.height, 11)
+        self.assertLess(scheduler.flushes, 10)
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.hashing import HashScheme
+from src.segments import SegmentedChainStore
+
+
+class TestSegmentedChainStore(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.segment_dir = Path(self.tmp_dir.name) / "segments"
+        self.blockchain = Blockchain(segment_dir=self.segment_dir)
+        self.blockchain.storage.segment_size = 4
+        self.blockchain.storage.index_interval = 2
+        for i in range(10):
+            self.blockchain.add_block({"message": f"Block {i}"})
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_rotation(self):
+        """测试写满后封存并轮转分段"""
+        store = self.blockchain.storage
+        self.assertEqual(store.height, 11)
+        self.assertEqual([s.count for s in store.segments], [4, 4, 3])
+        self.assertEqual([s.sealed for s in store.segments], [True, True, False])
+        self.assertIsNotNone(store.segments[0].checksum)
+
+    def test_random_access(self):
+        """测试按高度随机读取区块"""
+        store = SegmentedChainStore(self.segment_dir)
+        for height in (0, 3, 5, 10):
+            self.assertEqual(store.read_block(height)["hash"], self.blockchain.chain[height].hash)
+        self.assertEqual([b["index"] for b in store.iter_blocks(6)], [6, 7, 8, 9, 10])
+        with self.assertRaises(IndexError):
+            store.read_block(11)
+
+    def test_reload(self):
+        """测试从分段存储重新加载区块链"""
+        reloaded = Blockchain(segment_dir=self.segment_dir)
+        self.assertEqual(reloaded.height, 11)
+        self.assertEqual(reloaded.get_latest_block().hash, self.blockchain.get_latest_block().hash)
+        self.assertTrue(reloaded.is_chain_valid())
+
+    def test_verify_once(self):
+        """测试封存段校验一次后只比对校验和"""
+        store = self.blockchain.storage
+        self.assertTrue(store.verify())
+        self.assertTrue(all(s.verified for s in store.segments if s.sealed))
+
+        path = store.segments[0].path
+        path.write_bytes(path.read_bytes().replace(b"Block 0", b"Block X"))
+        self.assertFalse(store.verify())
+
+    def test_verify_blake2b_chain(self):
+        """测试按链元数据中的区块哈希算法校验分段"""
+        segment_dir = Path(self.tmp_dir.name) / "blake2b"
+        blockchain = Blockchain(segment_dir=segment_dir, consensus=NoWork(),
+                                hash_scheme=HashScheme("blake2b", "blake2b"))
+        blockchain.storage.segment_size = 4
+        for i in range(6):
+            blockchain.add_block({"message": f"Block {i}"})
+        blockchain.close()
+        self.assertTrue(blockchain.is_chain_valid())
+        self.assertTrue(SegmentedChainStore(segment_dir).verify())
+
+    def test_compress_cold_segments(self):
+        """测试压缩冷分段后仍可随机读取"""
+        store = self.blockchain.storage
+        self.assertEqual(store.compress_cold_segments(keep_recent=1, codec="gzip"), [0])
+        self.assertTrue(store.segments[0].path.name.endswith(".gz"))
+        with gzip.open(store.segments[0].path, "rb") as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        reopened = SegmentedChainStore(self.segment_dir)
+        self.assertEqual(reopened.read_block(3)["hash"], self.blockchain.chain[3].hash)
+        self.assertTrue(reopened.verify())
+        self.blockchain.add_block({"message": "After compression"})
+        self.assertEqual(Blockchain(segment_dir=self.segment_dir).height, 12)
+
+    def test_compress_keeps_source_until_manifest_saved(self):
+        """测试清单保存失败时未压缩的原分段保留, 重新打开仍可读取"""
+        store = self.blockchain.storage
+        source = store.segments[0].path
+        with mock.patch.object(SegmentedChainStore, "_save_manifest", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.compress_cold_segments(keep_recent=1, codec="gzip")
+        self.assertTrue(source.exists())
+
+        reopened = SegmentedChainStore(self.segment_dir)
+        self.assertFalse(reopened.segments[0].compressed)
+        self.assertEqual(reopened.read_block(2)["hash"], self.blockchain.chain[2].hash)
+        self.assertTrue(reopened.verify())
+
+    def test_frame_compression(self):
+        """测试分帧压缩后随机读取只解压所需帧"""
+        store = self.blockchain.storage
+        self.assertEqual(store.compress_cold_segments(keep_recent=0), [0, 1])
+        self.assertTrue(store.segments[0].path.name.endswith(".zdf"))
+        self.assertEqual([h for h, _ in store.segments[1].index], [4, 6])
+        self.assertTrue((self.segment_dir / "dictionary.bin").exists())
+
+        reopened = SegmentedChainStore(self.segment_dir)
+        for height in range(11):
+            self.assertEqual(reopened.read_block(height)["hash"], self.blockchain.chain[height].hash)
+        self.assertEqual([b["index"] for b in reopened.iter_blocks(3)], list(range(3, 11)))
+        self.assertTrue(reopened.verify())
+        self.assertTrue(Blockchain(segment_dir=self.segment_dir).is_chain_valid())
+
+    def test_recover_partial_write(self):
+        """测试截断活动段中写了一半的记录"""
+        tail = self.blockchain.storage.segments[-1]
+        with open(tail.path, "ab") as f:
+            f.write(b'{"index": 11, "trunc')
+
+        store = SegmentedChainStore(self.segment_dir)
+        self.assertEqual(store.height, 11)
+        self.assertTrue(store.verify())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.server import ProtectionClient, ProtectionServer
+
+
+class TestProtectionServer(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        self.protection = CopyrightProtection(ContentRegistry(self.blockchain))
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def round_trip(self, address):
+        server = ProtectionServer(self.protection, address).start()
+        try:
+            with ProtectionClient(server.address, timeout=5) as client:
+                registered = client.call("protect_ai_content", "served content", "Title", "Description", "GPT-4")
+                self.assertEqual(registered["status"], "success")
+                verified = client.call("verify_ownership", "served content")
+                self.assertTrue(verified["verified"])
+                self.assertEqual(verified["block_number"], registered["block_number"])
+                self.assertEqual(client.call("search_content", {"title": "Title"})["count"], 1)
+                rejected = client.call("load_chain")
+                self.assertEqual(rejected["status"], "error")
+        finally:
+            server.stop()
+
+    def test_tcp(self):
+        """测试通过TCP调用版权保护操作"""
+        self.round_trip(("127.0.0.1", 0))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "Unix sockets required")
+    def test_unix_socket(self):
+        """测试通过Unix套接字调用并拒绝未开放的方法"""
+        self.round_trip(str(self.tmp_path / "server.sock"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.sharding import ShardedRegistry, shard_for
+from src.utils.helpers import calculate_hash
+from config.settings import get_user_id
+
+
+def make_metadata(i):
+    return {"title": f"Title {i}", "description": "Sharding test", "content_type": "text"}
+
+
+class TestShardedRegistry(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp_dir.name) / "shards"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def open(self, **kwargs):
+        kwargs.setdefault("shards", 4)
+        kwargs.setdefault("mode", "thread")
+        return ShardedRegistry(self.directory, backend="json", consensus="none", **kwargs)
+
+    def test_routing(self):
+        """测试按内容哈希前缀路由, 查询只访问所属分片"""
+        self.assertEqual(shard_for("0000000a" + "f" * 56, 4), 10 % 4)
+        with self.open() as registry:
+            contents = [f"sharded content {i}" for i in range(20)]
+            for i, content in enumerate(contents):
+                result = registry.register_content(content, make_metadata(i))
+                self.assertEqual(result["status"], "success")
+                self.assertEqual(result["shard"], shard_for(calculate_hash(content), 4))
+
+            self.assertGreater(len({registry.shard_for_content(c) for c in contents}), 1)
+            verified = registry.verify_ownership(contents[3])
+            self.assertTrue(verified["verified"])
+            self.assertEqual(verified["shard"], registry.shard_for_content(contents[3]))
+            self.assertFalse(registry.verify_content("never registered")["verified"])
+
+            # 所有权验证经所属分片的结果缓存
+            cache = registry._shards[verified["shard"]].protection.cache
+            hits = cache.hits
+            self.assertTrue(registry.verify_ownership(contents[3])["verified"])
+            self.assertEqual(cache.hits, hits + 1)
+
+            update = registry.update_license(contents[3], "MIT")
+            self.assertEqual(update["status"], "success")
+            history = registry.get_content_history(contents[3])
+            self.assertEqual([h["action"] for h in history["history"]],
+                             ["content_registration", "license_update"])
+
+    def test_scatter_gather(self):
+        """测试跨分片搜索与统计"""
+        with self.open() as registry:
+            results = registry.register_many([(f"gathered {i}", make_metadata(i)) for i in range(12)])
+            self.assertTrue(all(r["status"] == "success" for r in results))
+            self.assertEqual([r["content_hash"] for r in results],
+                             [calculate_hash(f"gathered {i}") for i in range(12)])
+
+            search = registry.search_content({"title": "Title 5"})
+            self.assertEqual(search["count"], 1)
+            self.assertEqual(search["results"][0]["content_hash"], calculate_hash("gathered 5"))
+            self.assertEqual(registry.search_content({"description": "Sharding test"})["count"], 12)
+
+            stats = registry.get_statistics()
+            self.assertEqual(stats["total_registrations"], 12)
+            self.assertEqual(stats["total_blocks"], 12 + 4)
+            self.assertEqual(registry.get_owner_counts()["owners"], {get_user_id(): 12})
+
+            status = registry.get_chain_status()
+            self.assertTrue(status["is_valid"])
+            self.assertEqual(status["length"], 16)
+            self.assertEqual(len(status["shards"]), 4)
+
+    def test_layout_is_fixed(self):
+        """测试重新打开时沿用清单中的分片数"""
+        with self.open() as registry:
+            registry.register_content("persisted", make_metadata(0))
+        with self.assertRaises(ValueError):
+            self.open(shards=2)
+        with self.open(shards=None) as registry:
+            self.assertEqual(registry.count, 4)
+            self.assertTrue(registry.verify_content("persisted")["verified"])
+
+    def test_process_mode(self):
+        """测试每个分片运行在独立进程中"""
+        with self.open(shards=2, mode="process") as registry:
+            results = registry.register_many([(f"process {i}", make_metadata(i)) for i in range(6)])
+            self.assertTrue(all(r["status"] == "success" for r in results))
+            self.assertTrue(registry.verify_content("process 4")["verified"])
+            self.assertEqual(registry.get_statistics()["total_registrations"], 6)
+            self.assertTrue(registry.get_chain_status()["is_valid"])
+
+
+if __name__ == '__main__':
+    unittest.main()
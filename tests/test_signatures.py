@@ -0,0 +1,162 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.segments import SegmentedChainStore
+from src.signatures import (
+    SignatureError,
+    TransactionSigner,
+    TransactionVerifier,
+    crypto_available,
+    load_public_key,
+    verify_transaction
+)
+from src.storage import SQLiteStorage
+
+
+class SignatureTestCase(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.test_metadata = {
+            "title": "Signed Content",
+            "description": "Content for signature testing",
+            "content_type": "text"
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_blockchain(self, verifier):
+        return Blockchain(self.tmp_path / "chain.json", consensus=NoWork(), verifier=verifier)
+
+
+class TestSignaturePolicy(SignatureTestCase):
+    def test_require_rejects_unsigned(self):
+        """测试要求签名时拒绝未签名交易"""
+        blockchain = self.create_blockchain(TransactionVerifier(require=True))
+        result = ContentRegistry(blockchain).register_content("unsigned content", self.test_metadata)
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn("signature required", result["message"])
+        self.assertEqual(blockchain.height, 1)
+        blockchain.close()
+
+    def test_unsigned_history_allowed(self):
+        """测试未要求签名时兼容未签名的历史交易"""
+        blockchain = self.create_blockchain(TransactionVerifier(require=False))
+        result = ContentRegistry(blockchain).register_content("legacy content", self.test_metadata)
+
+        self.assertEqual(result["status"], "success")
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.verifier.require = True
+        self.assertFalse(blockchain.is_chain_valid())
+        blockchain.close()
+
+
+@unittest.skipUnless(crypto_available(), "pycryptodome not installed")
+class TestSignedTransactions(SignatureTestCase):
+    def test_sign_and_verify(self):
+        """测试两种算法的签名与校验"""
+        for algorithm in ("ed25519", "ecdsa-p256"):
+            signer = TransactionSigner.generate(algorithm)
+            data = signer.sign({"type": "content_registration", "user_id": "alice", "content_hash": "ab"})
+            self.assertTrue(verify_transaction(data))
+            data["user_id"] = "mallory"
+            self.assertFalse(verify_transaction(data))
+
+    def test_signed_registration(self):
+        """测试注册交易签名后上链并通过整链校验"""
+        blockchain = self.create_blockchain(TransactionVerifier(require=True))
+        registry = ContentRegistry(blockchain, TransactionSigner.generate())
+        for i in range(3):
+            self.assertEqual(registry.register_content(f"signed {i}", self.test_metadata)["status"], "success")
+
+        self.assertIn("signature", blockchain.get_latest_block().data)
+        self.assertTrue(blockchain.is_chain_valid())
+        blockchain.close()
+
+        reloaded = self.create_blockchain(TransactionVerifier(require=True))
+        self.assertTrue(reloaded.is_chain_valid())
+        reloaded.chain[2].data["metadata"]["title"] = "Forged"
+        reloaded.chain[2].hash = reloaded.chain[2].calculate_hash()
+        reloaded.chain[3].previous_hash = reloaded.chain[2].hash
+        reloaded.chain[3].hash = reloaded.chain[3].calculate_hash()
+        self.assertFalse(reloaded.is_chain_valid())
+        reloaded.close()
+
+    def test_key_binding(self):
+        """测试同一用户不能改用其他公钥"""
+        blockchain = self.create_blockchain(TransactionVerifier())
+        ContentRegistry(blockchain, TransactionSigner.generate()).register_content("first", self.test_metadata)
+
+        result = ContentRegistry(blockchain, TransactionSigner.generate()).register_content(
+            "second", self.test_metadata
+        )
+        self.assertEqual(result["status"], "error")
+        self.assertIn("does not match", result["message"])
+
+        result = ContentRegistry(blockchain).register_content("unsigned", self.test_metadata)
+        self.assertEqual(result["status"], "error")
+        blockchain.close()
+
+    def test_key_binding_unloaded(self):
+        """测试未加载链时追加同样检查用户与公钥的绑定"""
+        for name, create_storage in (("sqlite", lambda: SQLiteStorage(self.tmp_path / "chain.db")),
+                                     ("segmented", lambda: SegmentedChainStore(self.tmp_path / "segments"))):
+            with self.subTest(storage=name):
+                blockchain = Blockchain(storage=create_storage(), consensus=NoWork(), verifier=TransactionVerifier())
+                ContentRegistry(blockchain, TransactionSigner.generate()).register_content(
+                    "first", self.test_metadata
+                )
+                blockchain.close()
+
+                reopened = Blockchain(storage=create_storage(), consensus=NoWork(), verifier=TransactionVerifier())
+                result = ContentRegistry(reopened, TransactionSigner.generate()).register_content(
+                    "second", self.test_metadata
+                )
+                self.assertEqual(result["status"], "error")
+                self.assertIn("does not match", result["message"])
+                result = ContentRegistry(reopened).register_content("unsigned", self.test_metadata)
+                self.assertEqual(result["status"], "error")
+                self.assertFalse(reopened.loaded)
+                self.assertTrue(reopened.is_chain_valid())
+                reopened.close()
+
+    def test_parallel_batches(self):
+        """测试进程池分批校验结果与顺序校验一致"""
+        signer = TransactionSigner.generate()
+        transactions = [signer.sign({"user_id": "alice", "content_hash": str(i)}) for i in range(40)]
+        transactions[17]["content_hash"] = "tampered"
+
+        verifier = TransactionVerifier(workers=2, batch_size=8, parallel_threshold=10)
+        try:
+            results = verifier.verify_many(transactions)
+        finally:
+            verifier.close()
+        self.assertEqual(len(results), 40)
+        self.assertEqual([i for i, ok in enumerate(results) if not ok], [17])
+
+    def test_public_key_cache(self):
+        """测试公钥解析结果被缓存"""
+        signer = TransactionSigner.generate()
+        load_public_key.cache_clear()
+        for i in range(5):
+            verify_transaction(signer.sign({"user_id": "alice", "content_hash": str(i)}))
+        info = load_public_key.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 4)
+
+    def test_key_file(self):
+        """测试私钥文件生成与重新读取"""
+        key_file = self.tmp_path / "signing_key.pem"
+        signer = TransactionSigner.load(key_file)
+        self.assertEqual(TransactionSigner.load(key_file).public_key, signer.public_key)
+        self.assertEqual(key_file.stat().st_mode & 0o777, 0o600)
+
+
+if __name__ == '__main__':
+    unittest.main()
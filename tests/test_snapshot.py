@@ -0,0 +1,139 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from src.blockchain import Block, Blockchain
+from src.consensus import NoWork
+from src.content_registry import ContentRegistry
+from src.copyright_protection import CopyrightProtection
+from src.indexes import OwnerIndex, TimeIndex
+from src.storage import SQLiteStorage
+from src.utils.helpers import calculate_hash
+
+
+def make_block(index, timestamp, data=None):
+    return Block(index, timestamp, data or {}, "0")
+
+
+class TestIndexSnapshots(unittest.TestCase):
+    def test_time_index_copy_on_write(self):
+        """测试乱序插入不影响已取得的时间索引视图"""
+        index = TimeIndex()
+        index.rebuild([make_block(0, "2025-04-01 00:00:00"), make_block(1, "2025-04-03 00:00:00")])
+        view = index.snapshot(2)
+        index.add(make_block(2, "2025-04-02 00:00:00"))
+
+        bounds = ("2025-04-01 00:00:00", "2025-04-30 00:00:00")
+        self.assertEqual(list(view.heights(*bounds)), [0, 1])
+        self.assertEqual(list(index.heights(*bounds)), [0, 2, 1])
+
+    def test_owner_index_versions(self):
+        """测试所有者视图保留快照高度时的许可证和内容列表"""
+        index = OwnerIndex()
+        index.add(make_block(1, "", {"type": "content_registration", "content_hash": "a",
+                                     "user_id": "alice", "metadata": {"license": "MIT"}}))
+        view = index.snapshot(2)
+        index.add(make_block(2, "", {"type": "license_update", "content_hash": "a", "new_license": "Apache 2.0"}))
+        index.add(make_block(3, "", {"type": "content_registration", "content_hash": "b",
+                                     "user_id": "alice", "metadata": {"license": "MIT"}}))
+
+        self.assertEqual(view.get("a"), ("alice", "MIT", 1))
+        self.assertIsNone(view.get("b"))
+        self.assertEqual(view.count("alice"), 1)
+        self.assertEqual(view.page("alice"), [("a", "MIT", 1)])
+        self.assertEqual(index.get("a"), ("alice", "Apache 2.0", 1))
+        self.assertEqual(index.counts(), {"alice": 2})
+
+
+class TestChainSnapshot(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def register(self, registry, start, count):
+        for i in range(start, start + count):
+            result = registry.register_content(f"snapshot content {i}", {
+                "title": f"Title {i}",
+                "description": "Snapshot test",
+                "content_type": "text"
+            })
+            self.assertEqual(result["status"], "success")
+
+    def test_pinned_height(self):
+        """测试快照不受之后追加和重新加载的影响"""
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        registry = ContentRegistry(blockchain)
+        self.register(registry, 0, 3)
+        snapshot = blockchain.snapshot(load=True)
+        older = blockchain.snapshot(2)
+        self.register(registry, 3, 2)
+        blockchain.load_chain()
+
+        self.assertEqual(snapshot.height, 4)
+        self.assertEqual([b.index for b in snapshot.iter_blocks()], [0, 1, 2, 3])
+        self.assertEqual(snapshot.get_latest_block().index, 3)
+        self.assertEqual(snapshot.find_blocks(calculate_hash("snapshot content 4")), [])
+        self.assertEqual(len(snapshot.find_blocks(calculate_hash("snapshot content 1"))), 1)
+        self.assertEqual(snapshot.index(registry.owner_index).counts(), {blockchain.chain[1].data["user_id"]: 3})
+        self.assertEqual(len(older), 2)
+        self.assertEqual(len(list(older.iter_time_range("2000-01-01 00:00:00", "2100-01-01 00:00:00"))), 2)
+        self.assertEqual(blockchain.height, 6)
+        with self.assertRaises(ValueError):
+            blockchain.snapshot(7)
+        blockchain.close()
+
+    def test_storage_snapshot(self):
+        """测试未加载链时快照直接读取存储"""
+        blockchain = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        registry = ContentRegistry(blockchain)
+        self.register(registry, 0, 2)
+        reopened = Blockchain(storage=SQLiteStorage(self.tmp_path / "chain.db"), consensus=NoWork())
+        snapshot = reopened.snapshot()
+        reopened.add_block({"type": "content_registration", "content_hash": calculate_hash("late"),
+                            "user_id": "bob", "metadata": {}})
+
+        self.assertFalse(reopened.loaded)
+        self.assertEqual(snapshot.height, 3)
+        self.assertEqual(len(list(snapshot.iter_blocks())), 3)
+        self.assertEqual(snapshot.find_blocks(calculate_hash("late")), [])
+        self.assertEqual(len(reopened.snapshot().find_blocks(calculate_hash("late"))), 1)
+        with self.assertRaises(ValueError):
+            snapshot.index(reopened.time_index)
+        blockchain.close()
+        reopened.close()
+
+    def test_readers_during_writes(self):
+        """测试写线程追加时读者看到一致的统计结果"""
+        blockchain = Blockchain(self.tmp_path / "chain.json", consensus=NoWork())
+        protection = CopyrightProtection(ContentRegistry(blockchain))
+        self.register(protection.registry, 0, 5)
+        stop = threading.Event()
+
+        def write():
+            i = 5
+            while not stop.is_set():
+                self.register(protection.registry, i, 1)
+                i += 1
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(20):
+                stats = protection.get_statistics()
+                self.assertEqual(stats["status"], "success")
+                self.assertEqual(stats["total_blocks"], stats["snapshot_height"])
+                self.assertEqual(stats["total_registrations"], stats["snapshot_height"] - 1)
+                owners = protection.registry.get_owner_counts()["owners"]
+                self.assertGreaterEqual(sum(owners.values()), stats["total_registrations"])
+        finally:
+            stop.set()
+            writer.join()
+        blockchain.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
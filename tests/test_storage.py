@@ -0,0 +1,94 @@
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from src.blockchain import Blockchain
+from src.content_registry import ContentRegistry
+from src.storage import JsonFileStorage, SQLiteStorage, create_storage
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = Path(self.tmp_dir.name) / "chain.db"
+        self.blockchain = Blockchain(storage=SQLiteStorage(self.db_file))
+        self.registry = ContentRegistry(self.blockchain)
+        for i in range(5):
+            self.registry.register_content(f"content {i}", {
+                "title": f"Title {i}",
+                "description": "SQLite test",
+                "content_type": "text"
+            })
+
+    def tearDown(self):
+        self.blockchain.close()
+        self.tmp_dir.cleanup()
+
+    def test_reload(self):
+        """测试从SQLite重新加载区块链"""
+        storage = SQLiteStorage(self.db_file)
+        reloaded = Blockchain(storage=storage)
+        self.assertEqual(reloaded.height, 6)
+        self.assertEqual(reloaded.get_latest_block().hash, self.blockchain.get_latest_block().hash)
+        self.assertEqual(reloaded.difficulty, self.blockchain.difficulty)
+        self.assertTrue(reloaded.is_chain_valid())
+        storage.close()
+
+    def test_wal_mode(self):
+        """测试启用WAL模式"""
+        conn = sqlite3.connect(self.db_file)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        conn.close()
+
+    def test_indexed_lookup(self):
+        """测试按内容哈希的索引查询"""
+        content_hash = self.blockchain.chain[3].data["content_hash"]
+        blocks = self.blockchain.storage.find_blocks(content_hash=content_hash)
+        self.assertEqual([b["index"] for b in blocks], [3])
+        self.assertEqual(len(self.blockchain.storage.find_blocks(block_type="content_registration")), 5)
+        self.assertEqual(self.blockchain.storage.read_block(2)["hash"], self.blockchain.chain[2].hash)
+
+        conn = sqlite3.connect(self.db_file)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT body FROM blocks WHERE content_hash = ?", (content_hash,)
+        ).fetchall()
+        conn.close()
+        self.assertIn("idx_blocks_content_hash", str(plan))
+
+    def test_concurrent_readers(self):
+        """测试多线程只读查询与写入并行"""
+        storage = self.blockchain.storage
+        hashes = [block.data["content_hash"] for block in self.blockchain.chain[1:]]
+
+        def lookup(i):
+            return len(storage.find_blocks(content_hash=hashes[i % len(hashes)]))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            writes = pool.submit(lambda: [self.blockchain.add_block({"message": str(i)}) for i in range(5)])
+            counts = list(pool.map(lookup, range(40)))
+            writes.result()
+
+        self.assertEqual(counts, [1] * 40)
+        self.assertEqual(storage.height, 11)
+
+
+class TestCreateStorage(unittest.TestCase):
+    def test_backends(self):
+        """测试按名称创建存储后端"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "chain.json"
+            storage = create_storage("json", path)
+            self.assertIsInstance(storage, JsonFileStorage)
+            blockchain = Blockchain(storage=storage)
+            blockchain.add_block({"message": "JSON backend"})
+            blockchain.close()
+            self.assertEqual(Blockchain(path).height, 2)
+
+            with self.assertRaises(ValueError):
+                create_storage("unknown", path)
+
+
+if __name__ == '__main__':
+    unittest.main()